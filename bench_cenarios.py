@@ -0,0 +1,145 @@
+# ==========================================
+# BENCHMARK DOS CENÁRIOS PADRÃO
+# ==========================================
+# Roda a máquina de estados dos workers (valentao.py) no simulador pelos
+# mesmos cenários em vários tamanhos de cluster e mede, do primeiro evento
+# até todo mundo concordar num lider só:
+#   - quantas mensagens do protocolo isso custou
+#   - quantos passos levou (e quantos depois do último evento)
+#   - quanto tempo de relógio o processo gastou
+# Cenários:
+#   leader     - o lider cai
+#   cascade    - os k maiores caem um atrás do outro, com a eleição andando
+#   storm      - 8 nós baixos caem e voltam todos no mesmo passo
+#   monitor    - o rank 1 (o vigia do detector single) cai e depois o lider
+# O resultado sai em JSON (com a versão do código e a data) pra guardar e
+# comparar entre commits:
+#     python bench_cenarios.py --out resultados.json
+#     python bench_cenarios.py --sizes 8,32 --scenario leader --election modified --fanout tree
+# Com --latency/--drop a rede entre os workers deixa de ser perfeita (ver rede.py):
+#     python bench_cenarios.py --sizes 32 --latency exp:4 --drop 0.02 --detector rotating
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from eleicao import ELECTIONS
+from difusao import FANOUTS
+from vigia import DETECTORS
+from rede import NetworkModel
+from valentao import build_sim_cluster, run_headless
+
+SIZES = (8, 32, 128, 512, 1024)
+START = 10  # Passo do primeiro evento (antes disso o cluster só se acomoda)
+STORM = 8   # Quantos voltam juntos no storm
+
+def leader_crash(n, k):
+    return f"kill:leader@{START}"
+
+# Um novo lider cai a cada 2 passos, antes da eleição anterior terminar
+def cascade(n, k):
+    return ",".join(f"kill:leader@{START + 2*i}" for i in range(min(k, n - 1)))
+
+def revive_storm(n, k):
+    ranks = range(1, min(STORM, n // 2) + 1)
+    return ",".join([f"kill:{r}@{START}" for r in ranks] + [f"revive:{r}@{START + 50}" for r in ranks])
+
+def monitor_death(n, k):
+    return f"kill:1@{START},kill:leader@{START + 20}"
+
+SCENARIOS = {
+    'leader': leader_crash,
+    'cascade': cascade,
+    'storm': revive_storm,
+    'monitor': monitor_death,
+}
+
+def run(n, scenario, k=3, election="bully", fanout="direct", detector="single", max_steps=1000,
+        latency=None, drop=0.0, seed=0, election_opts=None, detector_opts=None):
+    text = SCENARIOS[scenario](n, k)
+    model = NetworkModel(latency or 1, drop, seed=seed) if latency or drop else None
+    network, workers = build_sim_cluster(n + 1, election=election, fanout=fanout, detector=detector, model=model,
+                                         election_opts=election_opts, detector_opts=detector_opts)
+    result = run_headless(network.endpoint(0), text, max_steps=max_steps, verbose=False)
+    first, last = result['events'][0], result['events'][-1]
+    converged = result['converged']
+    return {
+        'scenario': scenario,
+        'workers': n,
+        'election': election,
+        'fanout': fanout,
+        'detector': detector,
+        'latency': latency,
+        'drop': drop,
+        'seed': seed,
+        'election_opts': election_opts or {},
+        'detector_opts': detector_opts or {},
+        'script': text,
+        'converged': converged,
+        # Do primeiro evento até concordarem (o headless para assim que converge)
+        'steps': result['steps'] - first['step'] if converged else None,
+        'messages': result['messages'] - first['messages_at'] if converged else None,
+        'last_event_steps': last['converged_steps'],
+        'seconds': result['seconds'],
+        'max_sent_per_step': result['max_sent_per_step'],
+        'suspicions': result['suspicions'],
+        'false_suspicions': result['false_suspicions'],
+    }
+
+# De onde veio o resultado, pra comparar rodadas de commits diferentes
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'date': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': platform.python_version(), 'argv': sys.argv[1:]}
+
+def compare(sizes, scenarios, elections=("bully",), fanouts=("direct",), detectors=("single",), k=3,
+            max_steps=1000, latency=None, drop=0.0, seed=0):
+    rows = []
+    for scenario in scenarios:
+        for election in elections:
+            for fanout in fanouts:
+                for detector in detectors:
+                    for n in sizes:
+                        rows.append(run(n, scenario, k, election, fanout, detector, max_steps,
+                                        latency, drop, seed))
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Custo de convergência dos cenários padrão por tamanho de cluster")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="números de workers separados por vírgula")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="cenário a rodar (pode repetir; padrão: todos)")
+    parser.add_argument("--election", action="append", choices=sorted(ELECTIONS), help="(pode repetir; padrão: bully)")
+    parser.add_argument("--fanout", action="append", choices=sorted(FANOUTS), help="(pode repetir; padrão: direct)")
+    parser.add_argument("--detector", action="append", choices=sorted(DETECTORS), help="(pode repetir; padrão: single)")
+    parser.add_argument("-k", type=int, default=3, help="quantos caem no cascade")
+    parser.add_argument("--max-steps", type=int, default=1000)
+    parser.add_argument("--latency", metavar="DIST", help='latência entre workers em passos, ex: "3", "2-6", "exp:4"')
+    parser.add_argument("--drop", type=float, default=0.0, help="probabilidade de perder cada mensagem")
+    parser.add_argument("--seed", type=int, default=0, help="seed do modelo de rede")
+    parser.add_argument("--out", metavar="ARQUIVO", help="salva o JSON nesse arquivo (senão imprime a tabela)")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    scenarios = args.scenario or list(SCENARIOS)
+
+    rows = compare(sizes, scenarios, args.election or ("bully",), args.fanout or ("direct",),
+                   args.detector or ("single",), args.k, args.max_steps, args.latency, args.drop, args.seed)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({'meta': metadata(), 'rows': rows}, f, indent=2)
+        print(f"{len(rows)} resultados salvos em {args.out}")
+    else:
+        print(f"{'cenário':<8} {'eleição':<9} {'difusão':<7} {'vigia':<8} {'workers':>7} {'passos':>6} "
+              f"{'último':>6} {'mensagens':>10} {'falsos':>6} {'segundos':>9}")
+        for r in rows:
+            steps = "-" if r['steps'] is None else r['steps']
+            last = "-" if r['last_event_steps'] is None else r['last_event_steps']
+            msgs = "-" if r['messages'] is None else r['messages']
+            print(f"{r['scenario']:<8} {r['election']:<9} {r['fanout']:<7} {r['detector']:<8} {r['workers']:>7} "
+                  f"{steps:>6} {last:>6} {msgs:>10} {r['false_suspicions']:>6} {r['seconds']:>9.3f}")
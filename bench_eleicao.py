@@ -0,0 +1,73 @@
+# ==========================================
+# COMPARAÇÃO DAS ESTRATÉGIAS DE ELEIÇÃO
+# ==========================================
+# Roda o mesmo roteiro no simulador (sem MPI) pra cada estratégia e cada
+# tamanho de cluster e mostra quantas mensagens e quantos passos a eleição
+# custou até todo mundo concordar no lider.
+# Com --fanout dá pra comparar também o broadcast direto com o em árvore
+# (a coluna max/passo é o máximo que um worker mandou num passo só).
+#     python bench_eleicao.py --sizes 8,32,128 --scenario "kill:leader@5"
+#     python bench_eleicao.py --fanout direct --fanout tree
+import argparse
+import json
+
+from eleicao import ELECTIONS
+from difusao import FANOUTS
+from valentao import build_sim_cluster, run_headless
+
+def compare(sizes, scenario, elections=None, max_steps=5000, fanouts=("direct",)):
+    rows = []
+    runs = [(name, fanout) for name in elections or sorted(ELECTIONS) for fanout in fanouts]
+    for name, fanout in runs:
+        for n in sizes:
+            network, workers = build_sim_cluster(n + 1, election=name, fanout=fanout)
+            result = run_headless(network.endpoint(0), scenario, max_steps=max_steps, verbose=False)
+            # Cada worker conta o que a estratégia dele mandou
+            stats = [w.election.stats() for w in workers.values()]
+            sent = {}
+            for s in stats:
+                for tag, count in s['sent'].items():
+                    sent[tag] = sent.get(tag, 0) + count
+            # E a difusão conta o que ele repassou pros outros
+            relays = [w.fanout.stats() for w in workers.values()]
+            rows.append({
+                'strategy': name,
+                'fanout': fanout,
+                'workers': n,
+                'converged': result['converged'],
+                'steps': [e['converged_steps'] for e in result['events']],
+                'messages': [e['messages'] for e in result['events']],
+                'election_messages': sent,
+                'elections_started': sum(s['started'] for s in stats),
+                'relayed': sum(r['relayed'] for r in relays),
+                'relay_acks': sum(r['acks'] for r in relays),
+                'redelegated': sum(r['redelegated'] for r in relays),
+                'max_sent_per_step': result['max_sent_per_step'],
+                'seconds': result['seconds'],
+            })
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara as estratégias de eleição no simulador")
+    parser.add_argument("--sizes", default="8,32,128", help="números de workers separados por vírgula")
+    parser.add_argument("--scenario", default="kill:leader@5")
+    parser.add_argument("--election", action="append", choices=sorted(ELECTIONS),
+                        help="estratégia a rodar (pode repetir; padrão: todas)")
+    parser.add_argument("--fanout", action="append", choices=sorted(FANOUTS),
+                        help="difusão do ELECTION/COORD (pode repetir; padrão: direct)")
+    parser.add_argument("--json", action="store_true", help="imprime o resultado em JSON")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+
+    rows = compare(sizes, args.scenario, args.election, fanouts=args.fanout or ("direct",))
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"{'estratégia':<10} {'difusão':<7} {'workers':>7} {'passos':>8} {'mensagens':>10} {'eleições':>9} "
+              f"{'max/passo':>9}  ELECTION/OK/COORD (+repasses)")
+        for r in rows:
+            sent = r['election_messages']
+            steps = "/".join("-" if s is None else str(s) for s in r['steps'])
+            msgs = "/".join("-" if m is None else str(m) for m in r['messages'])
+            print(f"{r['strategy']:<10} {r['fanout']:<7} {r['workers']:>7} {steps:>8} {msgs:>10} {r['elections_started']:>9} "
+                  f"{r['max_sent_per_step']:>9}  {sent['ELECTION']}/{sent['OK']}/{sent['COORD']} (+{r['relayed']})")
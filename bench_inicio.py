@@ -0,0 +1,56 @@
+# ==========================================
+# CUSTO DE SUBIR O CLUSTER
+# ==========================================
+# Lança o valentao.py de verdade (mpiexec) com vários números de processos,
+# num roteiro curtinho headless com --metrics, e mostra:
+#   - o relógio do mpiexec inteiro (lançar, rodar e sair)
+#   - quanto cada processo levou pra ficar pronto (até a barreira inicial)
+#     e a CPU gasta nisso (interpretador + imports)
+#   - o RSS de cada processo (maestro e workers)
+# Os workers não importam pygame nem NumPy: o custo de subir tem que crescer
+# com o número de workers, não com o tamanho da tela.
+#     python bench_inicio.py --sizes 4,16,64
+#     python bench_inicio.py --sizes 16 --mpiexec "mpiexec --oversubscribe" --virtual 256
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+SIZES = (4, 16, 32)
+
+def launch(processes, mpiexec="mpiexec", virtual=0):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "metricas.json")
+        cmd = shlex.split(mpiexec) + ["-n", str(processes), sys.executable, "valentao.py", "--headless",
+                                      "--max-steps", "5", "--metrics", path]
+        if virtual: cmd += ["--virtual", str(virtual)]
+        started = time.perf_counter()
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, cwd=os.path.dirname(os.path.abspath(__file__)))
+        elapsed = time.perf_counter() - started
+        with open(path) as f:
+            startup = json.load(f)['maestro']['startup']
+    return {'processes': processes, 'virtual': virtual, 'seconds': elapsed, **startup}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tempo e memória pra subir o cluster com N processos")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="números de processos MPI")
+    parser.add_argument("--mpiexec", default="mpiexec", help='lançador, ex: "mpiexec --oversubscribe"')
+    parser.add_argument("--virtual", type=int, default=0, help="nós virtuais (--virtual N, conta o maestro) em vez de 1 por processo")
+    parser.add_argument("--json", action="store_true", help="imprime JSON em vez da tabela")
+    args = parser.parse_args()
+
+    rows = [launch(int(n), args.mpiexec, args.virtual) for n in args.sizes.split(",") if n]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"{'procs':>5} {'mpiexec s':>9} {'maestro ms':>10} {'maestro MB':>10} "
+              f"{'workers ms':>10} {'CPU ms':>7} {'RSS MB':>7} {'máx MB':>7}")
+        for r in rows:
+            m, w = r['maestro'], r['workers']
+            print(f"{r['processes']:>5} {r['seconds']:>9.2f} {m['startup_ms'] or 0:>10.0f} {m['rss_kb'] / 1024:>10.1f} "
+                  f"{w['startup_ms_max'] or 0:>10.0f} {w['cpu_ms_mean']:>7.0f} {w['rss_kb_mean'] / 1024:>7.1f} "
+                  f"{w['rss_kb_max'] / 1024:>7.1f}")
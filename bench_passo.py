@@ -0,0 +1,79 @@
+# ==========================================
+# MICROBENCHMARK DO PASSO DO WORKER
+# ==========================================
+# Mede quanto custa um Worker.step() isolado (um worker só, no simulador,
+# sem entregar o que ele manda) conforme o tamanho do cluster cresce:
+#   - storm: o maior rank recebe ELECTION de todos os outros no mesmo passo
+#     (a caixa tem N-1 mensagens e sai um lote de N-1 OKs). O passo é O(N)
+#     por natureza, então o que tem que ficar parado é o custo por mensagem.
+#   - queue: a fila de ações fica sempre com N respostas esperando e a cada
+#     passo chega um PING e um WHO_IS_LEADER novo. O passo inteiro tem que
+#     custar o mesmo com qualquer N (fila e lotes indexados, sem varredura).
+#     python bench_passo.py
+#     python bench_passo.py --sizes 64,4096 --repeat 50 --json
+import argparse
+import json
+import time
+
+from transporte import SimNetwork
+from valentao import Worker, TAG_ELECTION, TAG_PING, TAG_WHO_IS_LEADER
+
+SIZES = (16, 128, 1024, 8192)
+
+# Um worker solto no rank mais alto de uma rede de n ranks
+def lone_worker(n):
+    network = SimNetwork(n)
+    return network, Worker(network.endpoint(n - 1))
+
+def bench_storm(n, repeat):
+    network, w = lone_worker(n)
+    total = 0
+    for _ in range(repeat):
+        for source in range(1, n - 1):
+            w.mailbox.append((TAG_ELECTION, source, 0, 0))
+        started = time.perf_counter_ns()
+        w.step()  # Lê a caixa e agenda o lote
+        w.step()  # Manda o lote
+        total += time.perf_counter_ns() - started
+        network.pending.clear()
+    return total / repeat, max(n - 2, 1)
+
+def bench_queue(n, repeat):
+    network, w = lone_worker(n)
+    for source in range(n):
+        w.schedule(w.ACT_SEND_PONG, 1 + source % (n - 2))
+    total = 0
+    for i in range(repeat):
+        w.mailbox.append((TAG_PING, 1, 0, 0))
+        w.mailbox.append((TAG_WHO_IS_LEADER, 1 + i % (n - 2), 0, 0))
+        started = time.perf_counter_ns()
+        w.step()
+        total += time.perf_counter_ns() - started
+        network.pending.clear()
+    return total / repeat, 2
+
+BENCHES = {'storm': bench_storm, 'queue': bench_queue}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Custo de um passo do worker por tamanho de cluster")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="tamanhos separados por vírgula")
+    parser.add_argument("--bench", action="append", choices=list(BENCHES), help="(pode repetir; padrão: todos)")
+    parser.add_argument("--repeat", type=int, default=200, help="passos medidos por tamanho")
+    parser.add_argument("--json", action="store_true", help="imprime JSON em vez da tabela")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+
+    rows = []
+    for name in args.bench or list(BENCHES):
+        for n in sizes:
+            # Storm é O(N) por passo: menos repetições nos tamanhos grandes
+            repeat = max(10, args.repeat * 128 // max(n, 128)) if name == 'storm' else args.repeat
+            ns, messages = BENCHES[name](n, repeat)
+            rows.append({'bench': name, 'workers': n, 'repeat': repeat, 'us_per_step': ns / 1000,
+                         'ns_per_message': ns / messages})
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"{'bench':<6} {'workers':>7} {'µs/passo':>10} {'ns/mensagem':>12}")
+        for r in rows:
+            print(f"{r['bench']:<6} {r['workers']:>7} {r['us_per_step']:>10.1f} {r['ns_per_message']:>12.0f}")
@@ -0,0 +1,65 @@
+# ==========================================
+# CUSTO DE UMA TEMPESTADE DE REVIVE
+# ==========================================
+# Mata `storm` nós de rank baixo, espera o sistema acalmar e revive todos
+# no mesmo passo. Roda no simulador com cada jeito de voltar (--rejoin) e
+# mostra quantas mensagens e quantos passos a volta custou:
+#   - election: o jeito antigo, cada um que volta abre uma eleição
+#   - ask: pergunta quem é o lider e só briga se for maior que ele
+#     python bench_rejoin.py --sizes 16,64,256 --storm 8
+import argparse
+import json
+
+from eleicao import ELECTIONS
+from valentao import build_sim_cluster, run_headless, REJOINS
+
+def storm_scenario(storm, kill_at=5, revive_at=60):
+    ranks = range(1, storm + 1)
+    return ",".join([f"kill:{r}@{kill_at}" for r in ranks] + [f"revive:{r}@{revive_at}" for r in ranks])
+
+def compare(sizes, storm, rejoins=REJOINS, elections=("bully",), max_steps=2000):
+    rows = []
+    for election in elections:
+        for rejoin in rejoins:
+            for n in sizes:
+                k = min(storm, n - 1)  # O maior fica vivo pra continuar lider
+                network, workers = build_sim_cluster(n + 1, election=election, rejoin=rejoin)
+                result = run_headless(network.endpoint(0), storm_scenario(k), max_steps=max_steps, verbose=False)
+                # O último evento é a tempestade inteira (os revives do mesmo passo viram um só)
+                revive = result['events'][-1]
+                rows.append({
+                    'strategy': election,
+                    'rejoin': rejoin,
+                    'workers': n,
+                    'revived': k,
+                    'converged': result['converged'],
+                    'steps': revive['converged_steps'],
+                    'messages': revive['messages'],
+                    'messages_per_revive': revive['messages'] / k if revive['messages'] is not None else None,
+                    'elections_started': sum(w.election.stats()['started'] for w in workers.values()),
+                    'rejoin_elections': sum(w.rejoin_elections for w in workers.values()),
+                })
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede quanto custa reviver vários nós de uma vez")
+    parser.add_argument("--sizes", default="16,64,256", help="números de workers separados por vírgula")
+    parser.add_argument("--storm", type=int, default=8, help="quantos nós morrem e revivem juntos")
+    parser.add_argument("--election", action="append", choices=sorted(ELECTIONS),
+                        help="estratégia de eleição (pode repetir; padrão: bully)")
+    parser.add_argument("--json", action="store_true", help="imprime o resultado em JSON")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+
+    rows = compare(sizes, args.storm, elections=args.election or ("bully",))
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"{'estratégia':<10} {'rejoin':<8} {'workers':>7} {'revividos':>9} {'passos':>6} "
+              f"{'mensagens':>9} {'msg/revive':>10} {'eleições':>8}")
+        for r in rows:
+            steps = "-" if r['steps'] is None else r['steps']
+            msgs = "-" if r['messages'] is None else r['messages']
+            per = "-" if r['messages_per_revive'] is None else f"{r['messages_per_revive']:.1f}"
+            print(f"{r['strategy']:<10} {r['rejoin']:<8} {r['workers']:>7} {r['revived']:>9} {steps:>6} "
+                  f"{msgs:>9} {per:>10} {r['elections_started']:>8}")
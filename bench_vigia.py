@@ -0,0 +1,67 @@
+# ==========================================
+# COMPARAÇÃO DOS DETECTORES DE FALHA (VIGIA)
+# ==========================================
+# Roda um roteiro com quedas do lider (e do rank 1, o vigia original) no
+# simulador pra cada detector e cada combinação de período/timeout e mostra:
+#   - em quantos passos alguém percebeu que o lider caiu
+#   - quantas suspeitas foram alarme falso (lider estava vivo)
+#   - quantos pings por passo isso custou (o preço de detectar rápido)
+#     python bench_vigia.py --sizes 16,128 --periods 2,4,8 --timeouts 2,3
+# No MPI de verdade os PONGs atrasam mais; pra medir lá use o próprio
+#     mpiexec -n 16 python valentao.py --headless --detector rotating --scenario ...
+import argparse
+import json
+
+from vigia import DETECTORS
+from valentao import build_sim_cluster, run_headless
+
+SCENARIO = "kill:leader@50,kill:1@100,kill:leader@150"
+
+def compare(sizes, periods, timeouts, detectors=None, scenario=SCENARIO, monitors=1, max_steps=1000):
+    rows = []
+    for name in detectors or sorted(DETECTORS):
+        for n in sizes:
+            for period in periods:
+                for timeout in timeouts:
+                    opts = {'period': period, 'timeout': timeout}
+                    if name == "rotating": opts['monitors'] = monitors
+                    network, workers = build_sim_cluster(n + 1, detector=name, detector_opts=opts)
+                    result = run_headless(network.endpoint(0), scenario, max_steps=max_steps, verbose=False)
+                    leader_kills = [e for e in result['events'] if e['event'] != "kill:1"]
+                    rows.append({
+                        'detector': name,
+                        'workers': n,
+                        'period': period,
+                        'timeout': timeout,
+                        'converged': result['converged'],
+                        'detected_steps': [e['detected_steps'] for e in leader_kills],
+                        'heartbeats_per_step': result['heartbeats_per_step'],
+                        'suspicions': result['suspicions'],
+                        'false_suspicions': result['false_suspicions'],
+                    })
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara os detectores de falha no simulador")
+    parser.add_argument("--sizes", default="16,128", help="números de workers separados por vírgula")
+    parser.add_argument("--periods", default="2,4,8", help="intervalos entre pings (passos)")
+    parser.add_argument("--timeouts", default="1,2,3", help="esperas pelo PONG (passos)")
+    parser.add_argument("--monitors", type=int, default=1, help="vigias por rodada no rotating")
+    parser.add_argument("--scenario", default=SCENARIO)
+    parser.add_argument("--detector", action="append", choices=sorted(DETECTORS),
+                        help="detector a rodar (pode repetir; padrão: todos)")
+    parser.add_argument("--json", action="store_true", help="imprime o resultado em JSON")
+    args = parser.parse_args()
+    ints = lambda text: [int(x) for x in text.split(",") if x]
+
+    rows = compare(ints(args.sizes), ints(args.periods), ints(args.timeouts), args.detector,
+                   args.scenario, args.monitors)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"{'detector':<9} {'workers':>7} {'período':>7} {'timeout':>7} {'percebeu em':>12} "
+              f"{'pings/passo':>11} {'suspeitas':>9} {'falsas':>6}")
+        for r in rows:
+            detected = "/".join("-" if d is None else str(d) for d in r['detected_steps'])
+            print(f"{r['detector']:<9} {r['workers']:>7} {r['period']:>7} {r['timeout']:>7} {detected:>12} "
+                  f"{r['heartbeats_per_step']:>11.2f} {r['suspicions']:>9} {r['false_suspicions']:>6}")
@@ -0,0 +1,78 @@
+# ==========================================
+# MICROBENCHMARK DO FORMATO DE MENSAGEM
+# ==========================================
+# Compara quantas mensagens por segundo passam entre dois ranks:
+#   - pickle: comm.send("ELECTION") / comm.recv() (o jeito antigo)
+#   - buffer: Send/Recv num array fixo no formato MSG_* do valentao.py
+# Rodar com 2 processos:
+#     mpiexec -n 2 python bench_wire.py --count 200000
+import argparse
+import json
+import time
+
+from transporte import MPITransport
+from valentao import TAG_ELECTION, new_msg
+
+# A cada WINDOW mensagens o receptor confirma, pra fila não crescer sem limite
+WINDOW = 1000
+TAG_BENCH_ACK = 99
+
+def bench_pickle(comm, count):
+    if comm.rank == 0:
+        for i in range(count):
+            comm.send("ELECTION", dest=1, tag=TAG_ELECTION)
+            if (i + 1) % WINDOW == 0: comm.recv(source=1, tag=TAG_BENCH_ACK)
+    else:
+        for i in range(count):
+            comm.recv(source=0, tag=TAG_ELECTION)
+            if (i + 1) % WINDOW == 0: comm.send(None, dest=0, tag=TAG_BENCH_ACK)
+
+def bench_buffer(comm, count):
+    # Buffers alocados uma vez só, igual no worker
+    buf = new_msg()
+    if comm.rank == 0:
+        for i in range(count):
+            comm.Send(buf, dest=1, tag=TAG_ELECTION)
+            if (i + 1) % WINDOW == 0: comm.recv(source=1, tag=TAG_BENCH_ACK)
+    else:
+        for i in range(count):
+            comm.Recv(buf, source=0, tag=TAG_ELECTION)
+            if (i + 1) % WINDOW == 0: comm.send(None, dest=0, tag=TAG_BENCH_ACK)
+
+def run(comm, count, repeat):
+    results = {}
+    for name, fn in (("pickle", bench_pickle), ("buffer", bench_buffer)):
+        best = None
+        for _ in range(repeat):
+            comm.barrier()
+            started = time.perf_counter()
+            fn(comm, count)
+            comm.barrier()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = {'seconds': best, 'msgs_per_sec': count / best}
+    results['speedup'] = results['buffer']['msgs_per_sec'] / results['pickle']['msgs_per_sec']
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mensagens/s: pickle x buffer")
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="imprime o resultado em JSON")
+    args = parser.parse_args()
+    # Arredonda pra um múltiplo da janela de confirmação
+    count = max(WINDOW, args.count - args.count % WINDOW)
+
+    comm = MPITransport()
+    if comm.size != 2:
+        print("Erro: rode com exatamente 2 processos (mpiexec -n 2)")
+        raise SystemExit(1)
+    results = run(comm, count, args.repeat)
+    if comm.rank == 0:
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            for name in ("pickle", "buffer"):
+                r = results[name]
+                print(f"{name:>7}: {r['msgs_per_sec']:>12,.0f} msg/s ({r['seconds']:.3f}s pra {count} msgs)")
+            print(f"buffer é {results['speedup']:.2f}x o pickle")
@@ -0,0 +1,199 @@
+# ==========================================
+# CACHE DE DESENHO DO MAESTRO
+# ==========================================
+# O font.render é a parte mais cara de desenhar a tela, e quase todo texto
+# se repete (número do nó, "Matar 3", "Normal"...). Aqui fica guardada cada
+# superfície já desenhada pela chave que a descreve, com limite de tamanho:
+# passou do limite, sai a que foi usada há mais tempo (LRU).
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+
+class RenderCache:
+    def __init__(self, max_items=4096):
+        self.max_items = max_items
+        self.items = OrderedDict()
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+
+    # Devolve a superfície da chave; se não tiver, cria com build()
+    def get(self, key, build):
+        surf = self.items.get(key)
+        if surf is not None:
+            self.items.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = self.items[key] = build()
+        if len(self.items) > self.max_items: self.items.popitem(last=False)
+        return surf
+
+    # Texto renderizado, guardado por (fonte, texto, cor)
+    def text(self, font, string, color):
+        return self.get((font, string, color), lambda: font.render(string, True, color))
+
+
+# Junta os retângulos sujos do quadro. Muitos pedacinhos viram um só
+# (a união), porque atualizar centenas de retângulos separados sai mais caro.
+def merge_rects(rects, limit=32):
+    if len(rects) <= 1: return list(rects)
+    if len(rects) > limit: return [rects[0].unionall(rects[1:])]
+    merged = []
+    for rect in rects:
+        if any(m.contains(rect) for m in merged): continue
+        merged = [m for m in merged if not rect.contains(m)]
+        merged.append(rect)
+    return merged
+
+
+# ==========================================
+# LAYOUT DOS NÓS E GEOMETRIA DAS SETAS
+# ==========================================
+# Posições calculadas uma vez, em arrays do NumPy (linha i = rank i+1):
+#   - até SINGLE_RING nós: o anel de sempre (raio 180, bolinha de 30)
+#   - rings: anéis concêntricos, do de fora pro de dentro, com a bolinha
+#     encolhendo até caber todo mundo
+#   - grid: grade que ocupa o canvas inteiro
+# O tamanho da bolinha decide o nível de detalhe: número dentro só se
+# couber, rótulo escrito em cima só quando tem espaço (senão vira a cor).
+SINGLE_RING = 16
+# Setas num passo a partir das quais elas viram feixes (uma por grupo)
+ARROW_LIMIT = 256
+# Em quantas fatias (por ângulo em volta do centro) os nós são agrupados nos feixes
+SECTORS = 8
+
+
+class Layout:
+    def __init__(self, n, width, height, mode="auto", margin=75):
+        self.n = n
+        self.center = np.array([width / 2, height / 2])
+        # Raios dos anéis pra desenhar no fundo; None = liga os nós em ordem (anel original)
+        # e lista vazia = nada (grade)
+        self.rings = None
+        if mode == "grid":
+            self.rings = []
+            self.positions, self.node_radius = self._grid(n, width, height, margin)
+        elif n <= SINGLE_RING:
+            self.positions, self.node_radius = self._ring(n, 180), 30
+        else:
+            self.positions, self.node_radius = self._rings(n, min(width, height) / 2 - margin)
+        self.points = [tuple(p) for p in np.rint(self.positions).astype(int).tolist()]
+        # Nível de detalhe
+        self.show_numbers = self.node_radius >= 9
+        self.show_labels = self.node_radius >= 24
+        # Fatia de cada nó pros feixes de setas
+        d = self.positions - self.center
+        angle = np.arctan2(d[:, 1], d[:, 0]) + np.pi
+        self.sector = np.minimum((angle / (2 * np.pi) * SECTORS).astype(int), SECTORS - 1)
+
+    def _ring(self, n, radius):
+        angle = 2 * np.pi * np.arange(n) / max(n, 1) - np.pi / 2
+        return self.center + radius * np.column_stack((np.cos(angle), np.sin(angle)))
+
+    # Diminui o espaçamento até os anéis comportarem todo mundo
+    def _rings(self, n, outer):
+        spacing = 72.0
+        while True:
+            radii = np.arange(outer, spacing / 2, -spacing)
+            capacity = np.maximum((2 * np.pi * radii / spacing).astype(int), 1)
+            if capacity.sum() >= n or spacing < 4: break
+            spacing *= 0.9
+        counts = np.minimum(capacity, np.maximum(n - np.concatenate(([0], np.cumsum(capacity)[:-1])), 0))
+        counts = counts[counts > 0]
+        self.rings = radii[:len(counts)].tolist()
+        positions = [self._ring(c, r) for r, c in zip(self.rings, counts)]
+        return np.concatenate(positions)[:n], max(2, int(spacing * 0.4))
+
+    # A grade fica entre as legendas de cima e de baixo (no canto esquerdo)
+    def _grid(self, n, width, height, margin):
+        top, bottom = 2 * margin, 2 * margin
+        w, h = width - 2 * margin, height - top - bottom
+        cols = max(1, math.ceil(math.sqrt(n * w / h)))
+        rows = math.ceil(n / cols)
+        cell = min(w / cols, h / rows)
+        i = np.arange(n)
+        middle = np.array([width / 2, top + h / 2])
+        origin = middle - np.array([cols - 1, rows - 1]) * cell / 2
+        return origin + np.column_stack((i % cols, i // cols)) * cell, max(2, int(cell * 0.4))
+
+    def point(self, rank):
+        return self.points[rank - 1]
+
+    # Área ocupada pelo nó (e pelo rótulo em cima, se tiver largura)
+    def node_rect(self, rank, label_width=0):
+        import pygame
+        x, y = self.point(rank)
+        r = self.node_radius + 3
+        rect = pygame.Rect(x - r, y - r, 2 * r, 2 * r)
+        if label_width:
+            rect.union_ip(pygame.Rect(x - label_width // 2, y - r - 28, label_width, 28))
+        return rect
+
+
+# Linha encurtada (não entra nas bolinhas) e os pontos da ponta de cada seta,
+# tudo de uma vez. starts/ends são arrays (k, 2).
+def arrow_geometry(starts, ends, offset, head=15.0, spread=math.pi / 6):
+    d = ends - starts
+    dist = np.hypot(d[:, 0], d[:, 1])
+    unit = np.divide(d, dist[:, None], out=np.zeros_like(d), where=dist[:, None] > 0)
+    a = starts + unit * offset
+    b = ends - unit * offset
+    # Ponta da seta: triângulo com bico no fim da linha, abrindo `spread` pra cada lado
+    rotation = np.arctan2(a[:, 1] - b[:, 1], a[:, 0] - b[:, 0])
+    p2 = b + head * np.column_stack((np.cos(rotation + spread), np.sin(rotation + spread)))
+    p3 = b + head * np.column_stack((np.cos(rotation - spread), np.sin(rotation - spread)))
+    lo = np.minimum(np.minimum(a, b), np.minimum(p2, p3))
+    hi = np.maximum(np.maximum(a, b), np.maximum(p2, p3))
+    return a, b, p2, p3, lo, hi
+
+
+# Monta o que desenhar pras setas de um passo (src, dst e tipo em arrays).
+# Passou de ARROW_LIMIT, junta por (fatia de origem, fatia de destino, tipo)
+# numa seta só, do meio de um grupo pro meio do outro, mais grossa quanto
+# mais mensagens e com a contagem escrita no meio.
+def arrow_entries(layout, src, dst, types, colors, default_color, quiet_color, limit=ARROW_LIMIT):
+    import pygame
+    if not len(src): return []
+    pos = layout.positions
+    thin = layout.node_radius < 15
+    if len(src) <= limit:
+        starts, ends, counts = pos[src - 1], pos[dst - 1], None
+        offset = layout.node_radius + 5
+    else:
+        key = (layout.sector[src - 1] * SECTORS + layout.sector[dst - 1]) * 256 + (types & 255)
+        key, group, counts = np.unique(key, return_inverse=True, return_counts=True)
+        group = group.ravel()
+        starts = np.column_stack([np.bincount(group, pos[src - 1, k]) for k in (0, 1)]) / counts[:, None]
+        ends = np.column_stack([np.bincount(group, pos[dst - 1, k]) for k in (0, 1)]) / counts[:, None]
+        types = key % 256
+        offset = min(layout.node_radius + 5, 20)
+    a, b, p2, p3, lo, hi = arrow_geometry(starts, ends, offset, head=min(15.0, max(6.0, layout.node_radius)))
+    entries = []
+    for i in range(len(a)):
+        color = colors.get(int(types[i]), default_color)
+        if counts is None:
+            width = 1 if thin else (2 if color == quiet_color else 4)
+            count = None
+        else:
+            width = min(1 + int(counts[i]).bit_length() // 2, 6)
+            count = int(counts[i])
+        rect = pygame.Rect(int(lo[i, 0]) - width, int(lo[i, 1]) - width,
+                           int(hi[i, 0] - lo[i, 0]) + 2 * width + 2, int(hi[i, 1] - lo[i, 1]) + 2 * width + 2)
+        # Espaço pro número no meio do feixe
+        if count: rect.inflate_ip(40, 20)
+        entries.append({'start': tuple(a[i]), 'end': tuple(b[i]), 'head': [tuple(b[i]), tuple(p2[i]), tuple(p3[i])],
+                        'color': color, 'width': width, 'count': count, 'rect': rect})
+    return entries
+
+# Desenha uma entrada do arrow_entries (o número do feixe vai num texto do cache)
+def draw_entry(screen, entry, cache=None, font=None):
+    import pygame
+    pygame.draw.line(screen, entry['color'], entry['start'], entry['end'], entry['width'])
+    pygame.draw.polygon(screen, entry['color'], entry['head'])
+    if entry['count'] and font is not None:
+        text = cache.text(font, str(entry['count']), (40, 40, 40))
+        middle = ((entry['start'][0] + entry['end'][0]) / 2, (entry['start'][1] + entry['end'][1]) / 2)
+        screen.blit(text, text.get_rect(center=middle))
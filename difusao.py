@@ -0,0 +1,148 @@
+# ==========================================
+# DIFUSÃO (BROADCAST) DAS MENSAGENS DA ELEIÇÃO
+# ==========================================
+# Quando a estratégia quer mandar a mesma mensagem pra uma faixa inteira de
+# ranks (ELECTION pra todo mundo maior, COORD pra todo mundo) ela pede aqui.
+#   - DirectFanout: o jeito original, quem manda faz N envios seguidos.
+#   - TreeFanout: árvore binomial em cima da faixa. Quem manda só fala com
+#     log2(N) filhos e cada filho repassa pra sua sub-faixa no passo
+#     seguinte. A mensagem chega em todo mundo em O(log N) saltos.
+#
+# Na árvore um repetidor morto deixaria a sub-faixa dele sem receber nada.
+# Por isso todo filho que tem sub-faixa pra repassar confirma com
+# TAG_RELAY_ACK. Se a confirmação não vier em ack_timeout passos, o pai
+# repassa ele mesmo a sub-faixa do filho (de novo em árvore, então uma
+# corrente de mortos vai sendo pulada).
+from protocolo import TAG_RELAY_ACK, TAG_ELECTION
+
+# Divide a faixa [lo, hi) numa árvore binomial.
+# Devolve [(filho, sub_lo, sub_hi), ...]: cada filho é o primeiro rank de
+# uma metade e fica responsável pelo resto dela.
+def tree_children(lo, hi):
+    children = []
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        children.append((lo, lo + 1, mid))
+        lo = mid
+    return children
+
+
+class DirectFanout:
+    name = "direct"
+
+    def __init__(self, ack_timeout=3):
+        self.relayed = 0       # Mensagens que repassei pros outros
+        self.acks = 0          # Confirmações que mandei
+        self.redelegated = 0   # Sub-faixas que assumi porque o filho não respondeu
+
+    # Manda pra todo mundo de [lo, hi) menos eu. Devolve quantas mensagens foram.
+    def broadcast(self, w, tag, lo, hi, arrow):
+        count = 0
+        for t in range(lo, hi):
+            if t == w.rank: continue
+            w.draw(t, arrow)
+            if tag == TAG_ELECTION: w.isend_msg(t, tag)
+            else: w.send_msg(t, tag)
+            count += 1
+        return count
+
+    # Passos a mais que um broadcast pra `count` ranks leva pra chegar no
+    # último, comparado com mandar direto. A estratégia soma isso nos timeouts.
+    def delay(self, count):
+        return 0
+
+    # Sem árvore ninguém repassa nada
+    def relay(self, w, tag, fields, lo, hi, parent, arrow):
+        return 0
+
+    def on_ack(self, w, child):
+        pass
+
+    def tick(self, w):
+        return 0
+
+    def reset(self):
+        pass
+
+    def stats(self):
+        return {'fanout': self.name, 'relayed': self.relayed, 'acks': self.acks,
+                'redelegated': self.redelegated}
+
+
+class TreeFanout(DirectFanout):
+    name = "tree"
+
+    def __init__(self, ack_timeout=3):
+        super().__init__()
+        # Passos esperando o filho confirmar antes de assumir a sub-faixa dele
+        self.ack_timeout = ack_timeout
+        # Filhos que ainda não confirmaram:
+        #   filho -> (tag, campos, sub_lo, sub_hi, seta, passo do envio)
+        self.pending = {}
+
+    def broadcast(self, w, tag, lo, hi, arrow):
+        fields = (w.epoch, w.my_state, w.rank)
+        count = 0
+        # Eu posso estar no meio da faixa (COORD vai pra todo mundo):
+        # aí são duas árvores, uma de cada lado
+        if lo <= w.rank < hi:
+            count += self._spread(w, tag, fields, lo, w.rank, arrow)
+            count += self._spread(w, tag, fields, w.rank + 1, hi, arrow)
+        else:
+            count += self._spread(w, tag, fields, lo, hi, arrow)
+        return count
+
+    # Profundidade da árvore binomial: um salto por passo
+    def delay(self, count):
+        return max(0, count.bit_length() - 1)
+
+    def _spread(self, w, tag, fields, lo, hi, arrow):
+        count = 0
+        for child, sub_lo, sub_hi in tree_children(lo, hi):
+            w.draw(child, arrow)
+            w.relay_msg(child, tag, fields, sub_lo, sub_hi, nonblocking=(tag == TAG_ELECTION))
+            count += 1
+            if sub_lo < sub_hi:
+                self.pending[child] = (tag, fields, sub_lo, sub_hi, arrow, w.step_no)
+        return count
+
+    # Chegou uma mensagem com faixa pra repassar: confirmo pro pai e repasso
+    def relay(self, w, tag, fields, lo, hi, parent, arrow):
+        w.send_msg(parent, TAG_RELAY_ACK)
+        self.acks += 1
+        count = self._spread(w, tag, fields, lo, hi, arrow)
+        self.relayed += count
+        return count
+
+    def on_ack(self, w, child):
+        self.pending.pop(child, None)
+
+    # Filho que não confirmou a tempo: assumo a sub-faixa dele
+    def tick(self, w):
+        if not self.pending: return 0
+        expired = [c for c, p in self.pending.items() if w.step_no - p[5] >= self.ack_timeout]
+        count = 0
+        for child in expired:
+            tag, fields, sub_lo, sub_hi, arrow, _ = self.pending.pop(child)
+            self.redelegated += 1
+            n = self._spread(w, tag, fields, sub_lo, sub_hi, arrow)
+            self.relayed += n
+            count += n
+        return count
+
+    # Morri ou revivi: o que estava pendente não é mais problema meu
+    def reset(self):
+        self.pending.clear()
+
+
+# Difusões disponíveis pelo nome (usado no --fanout)
+FANOUTS = {
+    DirectFanout.name: DirectFanout,
+    TreeFanout.name: TreeFanout,
+}
+
+def make_fanout(name="direct", **kwargs):
+    cls = FANOUTS.get(name)
+    if cls is None:
+        raise ValueError(f"difusão desconhecida: {name!r} (opções: {', '.join(FANOUTS)})")
+    return cls(**kwargs)
@@ -0,0 +1,233 @@
+# ==========================================
+# ESTRATÉGIAS DE ELEIÇÃO
+# ==========================================
+# O Worker cuida da caixa de correio, da fila de ações e do heartbeat.
+# O que fazer com ELECTION/OK e como ganhar a eleição fica aqui, numa
+# estratégia plugável. Cada worker tem a sua instância (o estado da eleição
+# é por processo) e ela conta as próprias mensagens e quantos passos cada
+# eleição levou até ter lider, pra dar pra comparar as estratégias.
+#
+# Ganchos que o Worker chama:
+#   Fase A (caixa de correio): on_election, on_ok, on_coord
+#   Fase B (ação START_ELECTION): start
+#   Fase C (sem ação na fila): on_tick
+# Na fase A a estratégia não manda nada direto: ela marca no worker
+# (oks_to_send, trigger_election, reassert_to, claim) e o worker agenda
+# as ações, uma por passo, igual sempre foi.
+import time
+
+from protocolo import TAG_ELECTION, TAG_OK, TAG_COORD, ARROW_ELECTION, ARROW_COORD, LBL_ELECTION, LBL_LEADER, LBL_WAITING
+
+
+class BullyElection:
+    # Valentão clássico: manda ELECTION pra todo mundo maior, cada um que
+    # recebe responde OK e começa a própria eleição. Custa O(N²) mensagens.
+    name = "bully"
+
+    def __init__(self, patience=3, coord_timeout=12):
+        # Passos esperando OK antes de me declarar lider
+        self.patience = patience
+        # Passos esperando COORD depois de receber OK (se passar, tento de novo)
+        self.coord_timeout = coord_timeout
+        # Métricas
+        self.sent = {TAG_ELECTION: 0, TAG_OK: 0, TAG_COORD: 0}
+        self.started = 0          # Eleições que eu comecei
+        self.won = 0              # Eleições que eu ganhei
+        self.converge_steps = []  # Passos entre começar a eleição e conhecer o lider
+        self.converge_seconds = []  # O mesmo em tempo de relógio
+        self._started_at = None
+        self._started_time = None
+        self._leader_seen = -coord_timeout  # Passo em que conheci o lider atual
+
+    # Manda uma mensagem da eleição contando e desenhando a seta
+    def send(self, w, target, tag, arrow=None):
+        if arrow is not None: w.draw(target, arrow)
+        if tag == TAG_ELECTION: w.isend_msg(target, tag)
+        else: w.send_msg(target, tag)
+        self.sent[tag] += 1
+
+    # Manda pra faixa [lo, hi) inteira pela difusão do worker (ver difusao.py).
+    # Conto só o que eu mandei; o que os repetidores repassam fica na difusão.
+    def broadcast(self, w, lo, hi, tag, arrow):
+        sent = w.fanout.broadcast(w, tag, lo, hi, arrow)
+        self.sent[tag] += sent
+        return sent
+
+    # Prazo pro COORD chegar (o anúncio também pode vir pela árvore)
+    def _coord_wait(self, w):
+        return self.coord_timeout + w.fanout.delay(w.size - 1)
+
+    def _enter_election(self, w):
+        w.my_state = w.STATE_ELECTION
+        w.epoch += 1 # Eleição nova, época nova
+        w.update_status_gui(LBL_ELECTION)
+        self.started += 1
+        if self._started_at is None:
+            self._started_at = w.step_no
+            self._started_time = time.perf_counter()
+
+    def _converged(self, w):
+        if self._started_at is not None:
+            self.converge_steps.append(w.step_no - self._started_at)
+            self.converge_seconds.append(time.perf_counter() - self._started_time)
+            self._started_at = None
+
+    # --- FASE A ---
+    # Alguém menor pediu eleição
+    def on_election(self, w, origin, epoch):
+        # Guarda pra responder OK depois tudo junto
+        w.oks_to_send.append(origin)
+        if w.my_state == w.STATE_NORMAL or w.my_state == w.STATE_WAITING:
+            if w.rank != w.current_leader:
+                # Eleição de antes do anúncio do lider atual, ou que chegou
+                # logo depois dele (atrasada pela árvore): o lider também
+                # recebe esse ELECTION e reafirma, então só respondo OK.
+                # Se ele tiver morrido, quem pediu dá timeout e pede de novo.
+                if w.my_state == w.STATE_NORMAL and (epoch <= w.leader_epoch or
+                        w.step_no - self._leader_seen < self._coord_wait(w)): return
+                # Se eu to de boa e não sou lider, entro na briga tbm
+                w.trigger_election = True
+            else:
+                # Sou o lider e alguém achou que eu morri: reafirmo só pra ele
+                w.reassert_to.append(origin)
+
+    # Recebi OK (alguem maior ta vivo)
+    def on_ok(self, w, origin):
+        if w.my_state == w.STATE_ELECTION:
+            w.my_state = w.STATE_WAITING # Paro de tentar ser lider
+            # Se o COORD não vier nesse prazo, o maior também caiu
+            w.patience_timer = self._coord_wait(w)
+            w.update_status_gui(LBL_WAITING)
+
+    def on_coord(self, w, origin):
+        self._leader_seen = w.step_no
+        self._converged(w)
+
+    # --- FASE B ---
+    def start(self, w):
+        if w.my_state == w.STATE_ELECTION: return
+        self._enter_election(w)
+        # Em árvore o ELECTION demora mais pra chegar nos de cima
+        w.patience_timer = self.patience + w.fanout.delay(w.size - w.rank - 1)
+        # Manda eleição pra todo mundo maior que eu (direto ou em árvore)
+        sent = self.broadcast(w, w.rank + 1, w.size, TAG_ELECTION, ARROW_ELECTION)
+        # Se não tem ninguem maior, ganho na hora
+        if not sent: w.patience_timer = 0
+
+    # --- FASE C ---
+    def on_tick(self, w):
+        if w.my_state == w.STATE_ELECTION:
+            if w.patience_timer > 0:
+                w.patience_timer -= 1 # Espera...
+            else:
+                self.announce(w)
+        elif w.my_state == w.STATE_WAITING:
+            if w.patience_timer > 0:
+                w.patience_timer -= 1
+            else:
+                # Quem mandou OK sumiu antes de virar lider: recomeça
+                w.schedule(w.ACT_START_ELECTION)
+
+    # Ganhei! Sou o novo Lider. Sem alvos = aviso todo mundo.
+    # Com alvos é só reafirmação, e só vale se eu ainda for o lider
+    # (posso ter recebido COORD de alguém maior depois de agendar).
+    def announce(self, w, targets=None):
+        if targets is not None and w.current_leader != w.rank: return
+        w.current_leader = w.rank
+        w.my_state = w.STATE_NORMAL
+        w.update_status_gui(LBL_LEADER)
+        if targets is None:
+            # Mandato novo: a época passa de tudo que eu já vi, assim
+            # ninguém confunde meu COORD com um anúncio velho
+            w.epoch += 1
+            w.leader_epoch = w.epoch
+            self.won += 1
+            self._converged(w)
+            self.broadcast(w, 1, w.size, TAG_COORD, ARROW_COORD)
+            return
+        for t in targets:
+            self.send(w, t, TAG_COORD, ARROW_COORD)
+
+    def stats(self):
+        return {
+            'strategy': self.name,
+            'sent': {'ELECTION': self.sent[TAG_ELECTION], 'OK': self.sent[TAG_OK], 'COORD': self.sent[TAG_COORD]},
+            'messages': sum(self.sent.values()),
+            'started': self.started,
+            'won': self.won,
+            'converge_steps': list(self.converge_steps),
+            'converge_seconds': list(self.converge_seconds),
+        }
+
+
+class ModifiedBullyElection(BullyElection):
+    # Valentão modificado: quem começa a eleição chama só UM candidato por
+    # vez, do maior pro menor. O primeiro que responder OK é o maior vivo
+    # (todos acima dele já deram timeout), então ele mesmo se anuncia lider
+    # sem abrir outra eleição. Custa O(N) mensagens: k tentativas nos
+    # mortos + 1 OK + N-2 COORD.
+    name = "modified"
+
+    def __init__(self, patience=3, coord_timeout=12):
+        super().__init__(patience, coord_timeout)
+        # Candidato que estou esperando responder (None = não estou sondando)
+        self.candidate = None
+
+    def on_election(self, w, origin, epoch):
+        w.oks_to_send.append(origin)
+        if w.rank == w.current_leader:
+            # Já sou o lider: só confirmo pra quem perguntou
+            w.reassert_to.append(origin)
+        else:
+            # Me chamaram de cima pra baixo: ninguém acima de mim respondeu
+            w.claim = True
+
+    def on_ok(self, w, origin):
+        super().on_ok(w, origin)
+        self.candidate = None
+
+    def start(self, w):
+        if w.my_state == w.STATE_ELECTION: return
+        self._enter_election(w)
+        self.candidate = w.size
+        self._probe_next(w)
+
+    # Chama o próximo candidato abaixo do último que não respondeu
+    def _probe_next(self, w):
+        self.candidate -= 1
+        if self.candidate <= w.rank:
+            # Ninguém maior respondeu: ganho no próximo passo
+            self.candidate = None
+            w.patience_timer = 0
+            return
+        self.send(w, self.candidate, TAG_ELECTION, ARROW_ELECTION)
+        w.patience_timer = self.patience
+
+    def on_tick(self, w):
+        if w.my_state == w.STATE_ELECTION:
+            if w.patience_timer > 0:
+                w.patience_timer -= 1
+            elif self.candidate is not None:
+                # O candidato não respondeu a tempo, tenta o próximo
+                self._probe_next(w)
+            else:
+                self.announce(w)
+        else:
+            super().on_tick(w)
+
+    def announce(self, w, targets=None):
+        self.candidate = None
+        super().announce(w, targets)
+
+
+# Estratégias disponíveis pelo nome (usado no --election)
+ELECTIONS = {
+    BullyElection.name: BullyElection,
+    ModifiedBullyElection.name: ModifiedBullyElection,
+}
+
+def make_election(name="bully", **kwargs):
+    cls = ELECTIONS.get(name)
+    if cls is None:
+        raise ValueError(f"estratégia de eleição desconhecida: {name!r} (opções: {', '.join(ELECTIONS)})")
+    return cls(**kwargs)
@@ -0,0 +1,185 @@
+# ==========================================
+# MÉTRICAS DOS WORKERS
+# ==========================================
+# Cada Worker tem um Metrics que conta, sem custo quase nenhum:
+#   - mensagens mandadas e recebidas por tag
+#   - histograma da profundidade da caixa de correio e da fila de ações
+#     (medido uma vez por passo)
+#   - tempo de processamento de cada passo (total, máximo e histograma)
+# A latência da eleição (do começo até saber o lider, em passos e em
+# segundos) fica na própria estratégia (ver eleicao.py, stats()).
+#
+# No fim (ou quando o maestro pede com TAG_METRICS) cada worker manda
+# Worker.report() pro rank 0, que junta tudo com write_metrics em JSON ou
+# CSV. profiled() liga o cProfile num rank e salva o .prof no fim.
+# process_usage() mede quanto cada processo levou pra ficar pronto e quanta
+# memória ocupa (vai no relatório como 'startup').
+import contextlib
+import csv
+import json
+import os
+import platform
+import sys
+import time
+
+from protocolo import TAG_NAMES
+
+# Tags vão de 1 a 16: lista indexada pela tag é mais rápida que dict
+TAG_LIMIT = 32
+
+
+# Histograma em dict: valor -> quantas vezes apareceu
+def _count(hist, value):
+    hist[value] = hist.get(value, 0) + 1
+
+def _hist_max(hist):
+    return max(hist) if hist else 0
+
+def _hist_mean(hist):
+    total = sum(hist.values())
+    return sum(k * v for k, v in hist.items()) / total if total else 0.0
+
+
+class Metrics:
+    def __init__(self):
+        self.sent = [0] * TAG_LIMIT
+        self.received = [0] * TAG_LIMIT
+        # Profundidade -> quantos passos começaram com ela
+        self.mailbox_depth = {}
+        self.queue_depth = {}
+        # Tempo dos passos
+        self.steps = 0
+        self.step_ns = 0
+        self.step_max_ns = 0
+        # Histograma do tempo do passo em potências de 2 de µs:
+        # balde b = passos que levaram menos de 2^b µs
+        self.step_hist = {}
+
+    # Uma vez por passo: quanto tinha na caixa e quanto ficou na fila
+    def on_queues(self, mailbox, actions):
+        _count(self.mailbox_depth, mailbox)
+        _count(self.queue_depth, actions)
+
+    def on_step(self, ns):
+        self.steps += 1
+        self.step_ns += ns
+        if ns > self.step_max_ns: self.step_max_ns = ns
+        _count(self.step_hist, (ns // 1000).bit_length())
+
+    def stats(self):
+        named = lambda counts: {TAG_NAMES.get(t, str(t)): c for t, c in enumerate(counts) if c}
+        return {
+            'sent': named(self.sent),
+            'received': named(self.received),
+            'mailbox_depth': dict(sorted(self.mailbox_depth.items())),
+            'action_queue_depth': dict(sorted(self.queue_depth.items())),
+            'steps': self.steps,
+            'step_ms_total': self.step_ns / 1e6,
+            'step_ms_max': self.step_max_ns / 1e6,
+            'step_us_log2_hist': dict(sorted(self.step_hist.items())),
+        }
+
+
+# Liga o cProfile enquanto o bloco roda e salva em directory/rank<N>.prof.
+# Sem directory não faz nada (o cProfile nem é importado).
+@contextlib.contextmanager
+def profiled(directory, rank):
+    if not directory:
+        yield
+        return
+    import cProfile
+    os.makedirs(directory, exist_ok=True)
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(os.path.join(directory, f"rank{rank}.prof"))
+
+
+# Uma linha por rank pro CSV: os histogramas viram máximo e média
+def _flat_row(report):
+    row = {'rank': report['rank'], 'alive': report['alive']}
+    for tag in TAG_NAMES.values():
+        row[f'sent_{tag}'] = report['sent'].get(tag, 0)
+        row[f'recv_{tag}'] = report['received'].get(tag, 0)
+    row['mailbox_max'] = _hist_max(report['mailbox_depth'])
+    row['mailbox_mean'] = round(_hist_mean(report['mailbox_depth']), 3)
+    row['action_queue_max'] = _hist_max(report['action_queue_depth'])
+    row['action_queue_mean'] = round(_hist_mean(report['action_queue_depth']), 3)
+    startup = report.get('startup') or {}
+    row['startup_ms'] = round(startup['startup_ms'], 1) if startup.get('startup_ms') is not None else ""
+    row['rss_kb'] = startup.get('rss_kb', "")
+    row['steps'] = report['steps']
+    row['step_ms_total'] = round(report['step_ms_total'], 3)
+    row['step_ms_max'] = round(report['step_ms_max'], 3)
+    election = report['election']
+    row['elections_started'] = election['started']
+    row['elections_won'] = election['won']
+    steps, seconds = election['converge_steps'], election['converge_seconds']
+    row['election_steps_mean'] = round(sum(steps) / len(steps), 3) if steps else ""
+    row['election_ms_mean'] = round(sum(seconds) / len(seconds) * 1000, 3) if seconds else ""
+    return row
+
+# Salva os relatórios dos workers (e o resumo do maestro, se tiver).
+# A extensão escolhe o formato: .csv = uma linha por rank, senão JSON completo.
+def write_metrics(path, reports, maestro=None):
+    reports = sorted(reports, key=lambda r: r['rank'])
+    if path.endswith(".csv"):
+        rows = [_flat_row(r) for r in reports]
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ['rank'])
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, "w") as f:
+            json.dump({'maestro': maestro, 'workers': reports}, f, indent=2)
+
+
+# Quanto o processo levou pra ficar pronto e quanta memória ocupa:
+#   startup_ms - relógio desde que o processo nasceu (/proc; None fora do Linux)
+#   cpu_ms     - CPU gasta até aqui (interpretador + imports + montar tudo)
+#   rss_kb     - pico de memória residente
+def process_usage():
+    usage = {'pid': os.getpid(), 'host': platform.node(), 'startup_ms': _process_age_ms(),
+             'cpu_ms': time.process_time() * 1000, 'rss_kb': None}
+    try:
+        import resource
+        # ru_maxrss vem em KB no Linux e em bytes no macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        usage['rss_kb'] = rss // 1024 if sys.platform == "darwin" else rss
+    except ImportError:
+        pass
+    return usage
+
+def _process_age_ms():
+    try:
+        with open("/proc/self/stat") as f:
+            # Campo 22 (starttime, em ticks desde o boot); o nome do processo
+            # vem entre parênteses e pode ter espaço, por isso o rsplit
+            started = int(f.read().rsplit(")", 1)[1].split()[19]) / os.sysconf("SC_CLK_TCK")
+        with open("/proc/uptime") as f:
+            return (float(f.read().split()[0]) - started) * 1000
+    except (OSError, ValueError, IndexError):
+        return None
+
+# Resumo do custo de subir os workers, um ponto por processo (no --virtual
+# vários workers dividem o mesmo processo)
+def startup_summary(reports):
+    usages = {}
+    for r in reports:
+        u = r.get('startup')
+        if u: usages[(u['host'], u['pid'])] = u
+    if not usages: return None
+    wall = [u['startup_ms'] for u in usages.values() if u['startup_ms'] is not None]
+    rss = [u['rss_kb'] for u in usages.values() if u['rss_kb'] is not None]
+    cpu = [u['cpu_ms'] for u in usages.values()]
+    return {
+        'processes': len(usages),
+        'startup_ms_max': max(wall) if wall else None,
+        'startup_ms_mean': sum(wall) / len(wall) if wall else None,
+        'cpu_ms_mean': sum(cpu) / len(cpu),
+        'rss_kb_mean': sum(rss) / len(rss) if rss else None,
+        'rss_kb_max': max(rss) if rss else None,
+    }
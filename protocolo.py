@@ -0,0 +1,109 @@
+# ==========================================
+# PROTOCOLO
+# ==========================================
+# Constantes que o maestro, os workers e as estratégias de eleição
+# precisam concordar: tags, formato das mensagens e dos frames.
+from array import array
+
+# Tags
+# Define os códigos de mensagem para saber o que fazer quando receber algo
+TAG_KILL = 1      
+TAG_STATUS = 2     
+TAG_STEP = 3      
+TAG_ELECTION = 4  
+TAG_OK = 5        
+TAG_COORD = 6     
+TAG_PING = 7       
+TAG_PONG = 8       
+TAG_REVIVE = 11    # Nova tag pra reviver processo morto
+TAG_STEP_DONE = 12 # Worker avisa o maestro que terminou o passo
+TAG_RELAY_ACK = 13 # Repetidor confirma que pegou a mensagem pra repassar (ver difusao.py)
+TAG_WHO_IS_LEADER = 14 # Quem acabou de reviver pergunta quem é o lider
+TAG_LEADER_INFO = 15   # Resposta: o lider vai no argumento, a época no campo de época
+TAG_METRICS = 16       # Maestro pede as métricas; o worker responde com um dict (pickle, ver metricas.py)
+
+# Nome de cada tag (pras métricas)
+TAG_NAMES = {
+    TAG_KILL: "KILL", TAG_STATUS: "STATUS", TAG_STEP: "STEP", TAG_ELECTION: "ELECTION",
+    TAG_OK: "OK", TAG_COORD: "COORD", TAG_PING: "PING", TAG_PONG: "PONG",
+    TAG_REVIVE: "REVIVE", TAG_STEP_DONE: "STEP_DONE", TAG_RELAY_ACK: "RELAY_ACK",
+    TAG_WHO_IS_LEADER: "WHO_IS_LEADER", TAG_LEADER_INFO: "LEADER_INFO", TAG_METRICS: "METRICS",
+}
+
+# Formato das mensagens do protocolo (e das ordens do maestro)
+# Toda mensagem pros workers é um array fixo de int, mandado com Send/Recv
+# sem pickle. O tipo já vem na tag, então o corpo só leva o resto:
+#   [época da eleição, estado de quem mandou, origem, argumento, faixa]
+# A origem é quem criou a mensagem (pode ser diferente de quem entregou).
+# O argumento depende da tag (tipo de kill, número do passo...).
+# A faixa [início, fim) diz pra quais ranks quem recebe tem que repassar a
+# mensagem na difusão em árvore. Faixa vazia (0, 0) = não repassa nada.
+MSG_EPOCH = 0
+MSG_STATE = 1
+MSG_ORIGIN = 2
+MSG_ARG = 3
+MSG_SPAN_LO = 4
+MSG_SPAN_HI = 5
+MSG_SIZE = 6
+
+# Argumento do TAG_KILL
+KILL_DIE = 0
+KILL_EXIT = 1
+
+# Cria um buffer vazio no formato das mensagens
+def new_msg():
+    return array('i', [0]) * MSG_SIZE
+
+# Telemetria pro maestro
+# Tudo que um worker quer mostrar na tela durante um passo vai junto num
+# "frame" só (array de int, mandado com Send, sem pickle):
+#   [rótulo, lider, estado, msgs_enviadas, suspeito, qtd_setas, alvo1, tipo1, ...]
+# O frame do fim do passo vai com TAG_STEP_DONE (é a confirmação do passo);
+# mudanças fora de passo (início, morte, revive) vão com TAG_STATUS.
+FRAME_LABEL = 0
+FRAME_LEADER = 1
+FRAME_STATE = 2
+FRAME_SENT = 3     # Mensagens do protocolo que o worker mandou no passo
+FRAME_SUSPECT = 4  # Quem o vigia achou que morreu nesse passo (-1 = ninguém)
+FRAME_COUNT = 5
+FRAME_HEADER = 6
+FRAME_ITEMSIZE = array('i').itemsize
+
+# Quadro de estado (com --board, ver transporte.py)
+# Cada worker escreve a própria linha numa janela RMA do rank 0 (MPI.Win)
+# sempre que fecha um frame, e o maestro lê a tabela inteira de uma vez
+# com um Get só. Os contadores são acumulados desde o começo; o maestro
+# faz a diferença entre duas leituras.
+#   [versão, vivo, rótulo, lider, estado, época, enviadas, pings, suspeitas, último suspeito]
+BOARD_VERSION = 0   # Aumenta a cada publicação (mudou = tem novidade)
+BOARD_ALIVE = 1
+BOARD_LABEL = 2     # Último rótulo mostrado (LBL_*)
+BOARD_LEADER = 3
+BOARD_STATE = 4
+BOARD_EPOCH = 5
+BOARD_SENT = 6      # Mensagens do protocolo mandadas
+BOARD_PINGS = 7     # Pings do vigia
+BOARD_SUSPICIONS = 8
+BOARD_SUSPECT = 9   # Quem o vigia desconfiou por último (-1 = ninguém)
+BOARD_WIDTH = 10
+
+# Códigos dos rótulos que aparecem em cima da bolinha
+LBL_NONE = -1      # Rótulo não mudou nesse frame
+LBL_STARTING = 0
+LBL_NORMAL = 1
+LBL_LEADER = 2
+LBL_ELECTION = 3
+LBL_WAITING = 4
+LBL_CHECKING = 5
+LBL_DEAD = 6
+LBL_REVIVING = 7
+LABELS = ["Iniciando...", "Normal", "LÍDER", "Eleição", "Aguardando...", "Checando...", "MORTO", "Revivendo..."]
+
+# Códigos dos tipos de seta
+ARROW_ELECTION = 0
+ARROW_OK = 1
+ARROW_COORD = 2
+ARROW_PING = 3
+ARROW_PONG = 4
+ARROW_WHO = 5    # Pergunta quem é o lider (rejoin)
+ARROW_INFO = 6   # Resposta com o lider (rejoin)
@@ -0,0 +1,286 @@
+# ==========================================
+# RASTRO (TRACE) BINÁRIO E REPLAY
+# ==========================================
+# Tudo que o maestro vê (setas, rótulos, lider de cada um, mortes e
+# revives) vai sendo gravado num arquivo binário de registros fixos. Dá
+# pra rever depois sem MPI nenhum:
+#     python valentao.py --sim 16 --headless --scenario "kill:leader@5" --trace run.vltr
+#     python rastro.py run.vltr
+#
+# Formato: cabeçalho + registros de 16 bytes (little-endian):
+#   cabeçalho: 'VLTR', versão, unidade (passos ou ms), tamanho do cluster,
+#              intervalo entre keyframes
+#   registro:  [passo, origem, alvo, tipo, valor]  (int32 x3, int16 x2)
+# Os registros estão em ordem de passo, então achar um passo é uma busca
+# binária direto no mmap (não carrega o arquivo). A cada `keyframe_every`
+# passos vai um KEY por rank com o estado completo; pra mostrar um passo
+# qualquer basta partir do último keyframe antes dele.
+import mmap
+import struct
+
+from protocolo import (FRAME_LABEL, FRAME_LEADER, FRAME_STATE, FRAME_COUNT, FRAME_HEADER,
+                       LBL_NONE, LBL_STARTING, LBL_DEAD)
+
+HEADER = struct.Struct('<4sHHii')
+RECORD = struct.Struct('<iiihh')
+MAGIC = b'VLTR'
+VERSION = 1
+
+# Unidade do "passo" gravado
+UNIT_STEPS = 0
+UNIT_MS = 1    # Modo --async: o passo é o ms desde o começo
+
+# Tipos de registro
+REC_STEP = 0    # Começo de um passo (marca)
+REC_KEY = 1     # Keyframe: origem = rank, alvo = lider, valor = rótulo
+REC_LABEL = 2   # Rótulo mudou: valor = rótulo
+REC_LEADER = 3  # Lider mudou: alvo = lider, valor = estado
+REC_ARROW = 4   # Seta: alvo, valor = tipo da seta
+REC_KILL = 5    # Maestro matou o alvo
+REC_REVIVE = 6  # Maestro reviveu o alvo
+
+
+class TraceWriter:
+    def __init__(self, path, size, unit=UNIT_STEPS, keyframe_every=256, flush_bytes=1 << 16):
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, unit, size, keyframe_every))
+        self.size = size
+        self.keyframe_every = keyframe_every
+        self.flush_bytes = flush_bytes
+        self.buf = bytearray()
+        self.records = 0
+        # Estado de cada rank, pros keyframes e pra só gravar o lider quando muda
+        self.labels = [LBL_STARTING] * size
+        self.leaders = [size - 1] * size
+        self.current = -1
+        self.next_key = 0
+        self.step(0)
+
+    def _add(self, step, source, target, kind, value=0):
+        self.buf += RECORD.pack(step, source, target, kind, value)
+        self.records += 1
+        if len(self.buf) >= self.flush_bytes: self.flush()
+
+    # Começou um passo novo. No primeiro passo de cada bloco vai o keyframe.
+    def step(self, step):
+        if step <= self.current: return
+        self.current = step
+        self._add(step, 0, 0, REC_STEP)
+        if step >= self.next_key:
+            self.next_key = (step // self.keyframe_every + 1) * self.keyframe_every
+            for r in range(1, self.size):
+                self._add(step, r, self.leaders[r], REC_KEY, self.labels[r])
+
+    # Um frame de telemetria do worker `source` (ver FRAME_*)
+    def frame(self, source, frame):
+        step = self.current
+        label = frame[FRAME_LABEL]
+        if label != LBL_NONE and label != self.labels[source]:
+            self.labels[source] = label
+            self._add(step, source, 0, REC_LABEL, label)
+        leader = frame[FRAME_LEADER]
+        if leader != self.leaders[source]:
+            self.leaders[source] = leader
+            self._add(step, source, leader, REC_LEADER, frame[FRAME_STATE])
+        for k in range(frame[FRAME_COUNT]):
+            self._add(step, source, frame[FRAME_HEADER + 2*k], REC_ARROW, frame[FRAME_HEADER + 2*k + 1])
+
+    # Ordem do maestro (REC_KILL / REC_REVIVE)
+    def control(self, kind, target):
+        self._add(self.current, 0, target, kind)
+
+    def flush(self):
+        self.file.write(self.buf)
+        self.buf.clear()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class Trace:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.unit, self.size, self.keyframe_every = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: não é um rastro do valentão (ou é de outra versão)")
+        self.count = (len(self.map) - HEADER.size) // RECORD.size
+        self.last_step = self.record(self.count - 1)[0] if self.count else 0
+
+    def record(self, i):
+        return RECORD.unpack_from(self.map, HEADER.size + i * RECORD.size)
+
+    # Índice do primeiro registro com passo >= step (busca binária no mmap)
+    def find(self, step):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if RECORD.unpack_from(self.map, HEADER.size + mid * RECORD.size)[0] < step: lo = mid + 1
+            else: hi = mid
+        return lo
+
+    # Onde começa o último keyframe até `step`
+    def _keyframe(self, step):
+        block = (step // self.keyframe_every) * self.keyframe_every
+        while block >= 0:
+            i = self.find(block)
+            if i + 1 < self.count:
+                s, _, _, kind, _ = self.record(i + 1)
+                if s <= step and kind == REC_KEY: return i
+            block -= self.keyframe_every
+        return 0
+
+    # Estado da tela no passo `step`: (rótulos, lideres, vivos, setas, ordens).
+    # Setas e ordens são só as daquele passo, igual a tela mostrava.
+    def state_at(self, step):
+        size = self.size
+        labels = [LBL_STARTING] * size
+        leaders = [size - 1] * size
+        arrows = []
+        orders = []
+        end = self.find(step + 1)
+        for i in range(self._keyframe(step), end):
+            s, source, target, kind, value = self.record(i)
+            if kind == REC_KEY or kind == REC_LEADER:
+                leaders[source] = target
+                if kind == REC_KEY: labels[source] = value
+            elif kind == REC_LABEL:
+                labels[source] = value
+            elif s == step:
+                if kind == REC_ARROW: arrows.append((source, target, value))
+                elif kind == REC_KILL or kind == REC_REVIVE: orders.append((kind, target))
+        alive = [label != LBL_DEAD for label in labels]
+        return labels, leaders, alive, arrows, orders
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+# ==========================================
+# VISUALIZADOR
+# ==========================================
+# Mesma tela do maestro, mas lendo do rastro. Teclas:
+#   ←/→ um passo, ↓/↑ dez, PgDn/PgUp cem, Home/End começo/fim,
+#   espaço toca/pausa. Clicar na linha do tempo pula pro passo.
+def replay(path):
+    import pygame
+    from protocolo import LABELS, ARROW_OK, ARROW_COORD, ARROW_PING, ARROW_PONG, ARROW_WHO, ARROW_INFO
+    import numpy as np
+    from desenho import RenderCache, Layout, arrow_entries, draw_entry
+    from valentao import WHITE, BLACK, RED, GREEN, GRAY_ARROW, LABEL_TINTS
+
+    trace = Trace(path)
+    size = trace.size
+    unit = "ms" if trace.unit == UNIT_MS else "passo"
+    pygame.init()
+    clock = pygame.time.Clock()
+    WIDTH, HEIGHT = 900, 700
+    SIDEBAR_WIDTH = 250
+    CANVAS_WIDTH = WIDTH - SIDEBAR_WIDTH
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption(f"Algoritmo do Valentão - Replay ({path})")
+    font_node = pygame.font.SysFont('Arial', 20, bold=True)
+    font_state = pygame.font.SysFont('Arial', 14, bold=True)
+    font_ui = pygame.font.SysFont('Arial', 16)
+    font_title = pygame.font.SysFont('Arial', 22, bold=True)
+    GRAY_PANEL = (50, 50, 60)
+    COLORS = {ARROW_OK: (0, 191, 255), ARROW_COORD: (255, 215, 0)}
+    for quiet in (ARROW_PING, ARROW_PONG, ARROW_WHO, ARROW_INFO): COLORS[quiet] = GRAY_ARROW
+    COLOR_ELECTION = (255, 140, 0)
+
+    # Mesmo layout do maestro
+    layout = Layout(size - 1, CANVAS_WIDTH, HEIGHT)
+    font_small = pygame.font.SysFont('Arial', 11, bold=True)
+    cache = RenderCache()
+    timeline = pygame.Rect(CANVAS_WIDTH + 15, HEIGHT - 60, SIDEBAR_WIDTH - 30, 16)
+
+    step = 0
+    shown = None
+    playing = False
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                jumps = {pygame.K_RIGHT: 1, pygame.K_LEFT: -1, pygame.K_UP: 10, pygame.K_DOWN: -10,
+                         pygame.K_PAGEUP: 100, pygame.K_PAGEDOWN: -100}
+                if event.key in jumps: step += jumps[event.key]
+                elif event.key == pygame.K_HOME: step = 0
+                elif event.key == pygame.K_END: step = trace.last_step
+                elif event.key == pygame.K_SPACE: playing = not playing
+            elif event.type == pygame.MOUSEBUTTONDOWN and timeline.collidepoint(event.pos):
+                step = round((event.pos[0] - timeline.x) / timeline.width * trace.last_step)
+        if playing: step += 1
+        step = max(0, min(step, trace.last_step))
+        if step == trace.last_step: playing = False
+
+        # Só relê o rastro quando o passo muda
+        if step != shown:
+            labels, leaders, alive, arrows, orders = trace.state_at(step)
+            shown = step
+
+        screen.fill(WHITE)
+        pygame.draw.rect(screen, GRAY_PANEL, (CANVAS_WIDTH, 0, SIDEBAR_WIDTH, HEIGHT))
+        screen.blit(font_title.render("Replay", True, WHITE), (CANVAS_WIDTH + 20, 30))
+        lines = [f"{unit} {step} / {trace.last_step}", f"{trace.count} registros",
+                 f"setas: {len(arrows)}"]
+        lines += [("Matou " if kind == REC_KILL else "Reviveu ") + str(target) for kind, target in orders]
+        lines += ["", "←/→ ±1  ↓/↑ ±10", "PgDn/PgUp ±100", "Home/End, espaço toca"]
+        for i, text in enumerate(lines):
+            screen.blit(font_ui.render(text, True, WHITE), (CANVAS_WIDTH + 20, 80 + i * 24))
+        # Linha do tempo com a posição atual
+        pygame.draw.rect(screen, (90, 90, 100), timeline, border_radius=4)
+        if trace.last_step:
+            x = timeline.x + int(step / trace.last_step * timeline.width)
+            pygame.draw.rect(screen, WHITE, (x - 2, timeline.y - 4, 4, timeline.height + 8))
+
+        if layout.rings is None and size > 2:
+            pygame.draw.lines(screen, BLACK, True, layout.points, 2)
+        for ring in layout.rings or ():
+            pygame.draw.circle(screen, (225, 225, 225), tuple(map(int, layout.center)), int(ring), 1)
+
+        if arrows:
+            src, dst, types = np.array(arrows, dtype=np.intc).T
+            for entry in arrow_entries(layout, src, dst, types, COLORS, COLOR_ELECTION, GRAY_ARROW):
+                draw_entry(screen, entry, cache, font_small)
+
+        r = layout.node_radius
+        for p_rank in range(1, size):
+            pos = layout.point(p_rank)
+            label = LABELS[labels[p_rank]]
+            fill = GREEN if alive[p_rank] else RED
+            if not layout.show_labels: fill = LABEL_TINTS.get(label, fill)
+            pygame.draw.circle(screen, fill, pos, r)
+            if r >= 6: pygame.draw.circle(screen, BLACK, pos, r, 2 if r >= 15 else 1)
+            if layout.show_numbers:
+                text = cache.text(font_node if r >= 22 else font_small, str(p_rank), BLACK if alive[p_rank] else WHITE)
+                screen.blit(text, text.get_rect(center=pos))
+            if layout.show_labels:
+                lbl_surf = cache.text(font_state, label, (50, 50, 150))
+                screen.blit(lbl_surf, lbl_surf.get_rect(center=(pos[0], pos[1] - 45)))
+
+        pygame.display.flip()
+        clock.tick(30)
+    pygame.quit()
+    trace.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Revê um rastro gravado com --trace (sem MPI)")
+    parser.add_argument("trace", help="arquivo .vltr")
+    parser.add_argument("--at", type=int, help="só imprime o estado nesse passo, sem abrir a tela")
+    args = parser.parse_args()
+    if args.at is None:
+        replay(args.trace)
+    else:
+        trace = Trace(args.trace)
+        from protocolo import LABELS
+        labels, leaders, alive, arrows, orders = trace.state_at(args.at)
+        for r in range(1, trace.size):
+            print(f"{r:>5} {'vivo' if alive[r] else 'morto':<5} lider={leaders[r]:<5} {LABELS[labels[r]]}")
+        orders = [("matou " if kind == REC_KILL else "reviveu ") + str(target) for kind, target in orders]
+        print(f"{len(arrows)} setas" + (", " + ", ".join(orders) if orders else ""))
@@ -0,0 +1,225 @@
+# ==========================================
+# MODELO DE REDE (LATÊNCIA, PERDA E PARTIÇÃO)
+# ==========================================
+# Sem isso a rede simulada entrega tudo na hora e nunca perde nada: o único
+# defeito possível é o kill. O NetworkModel fica entre quem manda e quem
+# recebe (ver SimNetwork.post) e decide, mensagem por mensagem:
+#   - latência: quantos passos ela demora, sorteada de uma distribuição
+#     (uma padrão e outras por enlace, ex: dois datacenters com WAN no meio)
+#   - perda: some com probabilidade `drop`
+#   - partição: entre os passos [início, fim) um grupo de nós não fala com
+#     o resto (na hora do envio e na da entrega)
+# Só as mensagens entre workers passam pelo modelo. O maestro (nó 0) não
+# está na WAN: passo, kill, revive e frames continuam instantâneos.
+#
+# O tempo é o passo do maestro: o modelo lê o número do passo no TAG_STEP
+# que passa pela rede. Latência 1 é a rede de sempre (mandou no passo k,
+# o outro lê no k+1) e nem entra na fila. Com latência d a mensagem espera
+# numa heap ordenada pelo passo de entrega, então ter centenas de milhares
+# em voo custa O(log n) cada. Tudo sai de um random.Random(seed): a mesma
+# seed repete a mesma rodada.
+#
+# Formatos (linha de comando):
+#   latência   "3" (fixa), "2-6" (uniforme), "exp:4" (média 4, cauda longa),
+#              "normal:5:1.5" (média 5, desvio 1.5); nunca menos que 1
+#   partição   "1-8@20-60" (nós 1..8 isolados do resto do passo 20 ao 59),
+#              "1-4+9-12@20" (dois blocos do mesmo lado, sem fim)
+#   enlace     "1-8/9-16=exp:6" (latência entre os dois grupos, nos dois sentidos)
+import heapq
+import math
+import random
+import struct
+
+from protocolo import TAG_STEP, MSG_ARG
+
+# Um int32 do formato MSG_*, pra ler o número do passo do TAG_STEP
+_INT = struct.Struct('i')
+
+
+# --- Distribuições de latência (em passos, sempre >= 1) ---
+class Fixed:
+    name = "fixed"
+
+    def __init__(self, steps=1):
+        self.steps = max(1, int(steps))
+
+    def __call__(self, rng):
+        return self.steps
+
+
+class Uniform:
+    name = "uniform"
+
+    def __init__(self, lo=1, hi=1):
+        self.lo = max(1, int(lo))
+        self.hi = max(self.lo, int(hi))
+
+    def __call__(self, rng):
+        return rng.randint(self.lo, self.hi)
+
+
+# 1 + exponencial arredondada: quase tudo rápido e de vez em quando uma bem atrasada
+class Exponential:
+    name = "exp"
+
+    def __init__(self, mean=2):
+        self.extra = max(0.0, float(mean) - 1)
+
+    def __call__(self, rng):
+        return 1 + round(rng.expovariate(1 / self.extra)) if self.extra else 1
+
+
+class Normal:
+    name = "normal"
+
+    def __init__(self, mean=1, sigma=0):
+        self.mu = float(mean)
+        self.sigma = float(sigma)
+
+    def __call__(self, rng):
+        return max(1, round(rng.gauss(self.mu, self.sigma)))
+
+
+LATENCIES = {
+    Fixed.name: Fixed,
+    Uniform.name: Uniform,
+    Exponential.name: Exponential,
+    Normal.name: Normal,
+}
+
+def make_latency(name="fixed", *args):
+    cls = LATENCIES.get(name)
+    if cls is None:
+        raise ValueError(f"latência desconhecida: {name!r} (opções: {', '.join(LATENCIES)})")
+    return cls(*args)
+
+# "3", "2-6" ou "nome:arg:arg"
+def parse_latency(text):
+    text = str(text).strip()
+    if ":" in text:
+        name, *args = text.split(":")
+        return make_latency(name, *(float(a) for a in args))
+    if "-" in text:
+        lo, hi = text.split("-")
+        return Uniform(int(lo), int(hi))
+    return Fixed(int(text))
+
+
+# "1-8+12" -> {1..8, 12}
+def parse_ranks(text):
+    ranks = set()
+    for part in text.split("+"):
+        lo, _, hi = part.partition("-")
+        ranks.update(range(int(lo), int(hi or lo) + 1))
+    return frozenset(ranks)
+
+# "1-8@20-60" -> (ranks, início, fim); sem fim = até o final
+def parse_partition(text):
+    ranks, _, window = text.partition("@")
+    start, _, end = window.partition("-")
+    return parse_ranks(ranks), int(start or 0), int(end) if end else math.inf
+
+# "1-8/9-16=exp:6" -> (grupo a, grupo b, latência)
+def parse_link(text):
+    sides, _, latency = text.partition("=")
+    a, _, b = sides.partition("/")
+    return parse_ranks(a), parse_ranks(b), parse_latency(latency)
+
+
+class NetworkModel:
+    def __init__(self, latency=1, drop=0.0, partitions=(), links=(), seed=0):
+        self.latency = latency if callable(latency) else parse_latency(latency)
+        self.drop = drop
+        self.partitions = [parse_partition(p) if isinstance(p, str) else p for p in partitions]
+        self.links = [parse_link(l) if isinstance(l, str) else l for l in links]
+        self.rng = random.Random(seed)
+        # Passo atual (o último TAG_STEP que passou)
+        self.clock = 0
+        # Em voo: (passo de entrega, ordem de envio, origem, destino, tag, msg)
+        self.heap = []
+        self.seq = 0
+        # Distribuição de cada enlace, achada uma vez (os enlaces são poucos)
+        self._link_of = {}
+        # Métricas
+        self.modeled = 0     # Mensagens entre workers que passaram pelo modelo
+        self.delayed = 0     # Quantas foram pra heap (latência > 1)
+        self.dropped = 0     # Perdidas pelo sorteio
+        self.cut = 0         # Barradas por partição
+        self.sampled = 0     # Quantas tiveram latência sorteada
+        self.latency_total = 0
+        self.max_in_flight = 0
+
+    # Latência do enlace origem -> destino (a primeira regra que bate, senão a padrão)
+    def link_latency(self, source, dest):
+        if not self.links: return self.latency
+        latency = self._link_of.get((source, dest))
+        if latency is None:
+            latency = self.latency
+            for a, b, link in self.links:
+                if (source in a and dest in b) or (source in b and dest in a):
+                    latency = link
+                    break
+            self._link_of[(source, dest)] = latency
+        return latency
+
+    # Origem e destino estão em lados diferentes de alguma partição ativa?
+    def cut_off(self, source, dest, step):
+        for ranks, start, end in self.partitions:
+            if start <= step < end and (source in ranks) != (dest in ranks):
+                return True
+        return False
+
+    # Chamado pela rede a cada envio. Devolve True se a mensagem ficou com
+    # o modelo (atrasada ou perdida); False = segue pela rede normal.
+    def hold(self, network, source, dest, tag, msg):
+        if source == 0 or dest == 0: return False
+        self.modeled += 1
+        if self.partitions and self.cut_off(source, dest, self.clock):
+            self.cut += 1
+            return True
+        if self.drop and self.rng.random() < self.drop:
+            self.dropped += 1
+            return True
+        delay = self.link_latency(source, dest)(self.rng)
+        self.sampled += 1
+        self.latency_total += delay
+        if delay <= 1: return False
+        # Sai da heap no passo clock + delay - 1, atrás dos TAG_STEP dele:
+        # quem recebe lê no passo clock + delay
+        self.seq += 1
+        heapq.heappush(self.heap, (self.clock + delay - 1, self.seq, source, dest, tag, msg))
+        self.delayed += 1
+        if len(self.heap) > self.max_in_flight: self.max_in_flight = len(self.heap)
+        return True
+
+    # Chamado pela rede a cada entrega. O primeiro TAG_STEP de um passo novo
+    # anda o relógio e solta na rede tudo que venceu.
+    def on_deliver(self, network, tag, msg):
+        if tag != TAG_STEP: return
+        step = _INT.unpack_from(msg, MSG_ARG * _INT.size)[0]
+        if step <= self.clock: return
+        self.clock = step
+        heap = self.heap
+        while heap and heap[0][0] <= step:
+            _, _, source, dest, m_tag, m_msg = heapq.heappop(heap)
+            if self.partitions and self.cut_off(source, dest, step):
+                self.cut += 1
+                continue
+            network.route(source, dest, m_tag, m_msg)
+
+    def stats(self):
+        return {
+            'modeled': self.modeled,
+            'delayed': self.delayed,
+            'dropped': self.dropped,
+            'cut': self.cut,
+            'in_flight': len(self.heap),
+            'max_in_flight': self.max_in_flight,
+            'latency_mean': self.latency_total / self.sampled if self.sampled else 0.0,
+        }
+
+    def summary(self):
+        s = self.stats()
+        return (f"{s['modeled']} mensagens entre workers, {s['delayed']} atrasadas "
+                f"(latência média {s['latency_mean']:.2f} passos, pico de {s['max_in_flight']} em voo), "
+                f"{s['dropped']} perdidas, {s['cut']} barradas por partição")
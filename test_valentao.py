@@ -0,0 +1,154 @@
+# ==========================================
+# TESTES DO PROTOCOLO NO SIMULADOR
+# ==========================================
+# Prendem as corridas que o modo headless achou no mpiexec (eleição sem
+# COORD, lider que não reafirma, COORD velho, confirmação de passo fora de
+# hora). Tudo na rede simulada, então é determinístico e roda sem MPI:
+#     python -m pytest -q
+from array import array
+
+import pytest
+
+from protocolo import MSG_ARG, FRAME_LABEL, LBL_NONE, LBL_LEADER
+from valentao import (build_sim_cluster, run_headless, Worker, TAG_STEP, TAG_STEP_DONE, TAG_STATUS,
+                      TAG_ELECTION, TAG_OK, TAG_COORD)
+
+ELECTIONS = ("bully", "modified")
+FANOUTS = ("direct", "tree")
+WORKERS = 16
+
+# Mata quem vai ganhar a eleição enquanto ela ainda está andando
+KILL_DURING_ELECTION = (
+    "kill:leader@5,kill:leader@7",
+    "kill:leader@5,kill:leader@6,kill:leader@8",
+    "kill:leader@5,revive:16@7,kill:leader@9",
+)
+# Folga em cima do pior caso medido: 34 passos (bully em árvore, com o
+# revive do 16 abrindo eleição no meio). Sem as correções a eleição
+# ficava presa esperando COORD e não convergia nunca.
+MAX_CONVERGE_STEPS = 40
+
+
+@pytest.mark.parametrize("election", ELECTIONS)
+@pytest.mark.parametrize("fanout", FANOUTS)
+@pytest.mark.parametrize("scenario", KILL_DURING_ELECTION)
+def test_kill_during_election_converges(election, fanout, scenario):
+    network, _ = build_sim_cluster(WORKERS + 1, election=election, fanout=fanout)
+    result = run_headless(network.endpoint(0), scenario, max_steps=300, verbose=False)
+    assert result['converged']
+    last = result['events'][-1]
+    assert last['converged_steps'] is not None
+    assert last['converged_steps'] <= MAX_CONVERGE_STEPS
+
+
+# Espia a rede: o maestro só pode mandar o passo k+1 pra quem já confirmou
+# o k, e cada TAG_STEP_DONE tem que ser a resposta do passo que o worker
+# acabou de dar. Uma confirmação velha contada como nova quebra as duas.
+@pytest.mark.parametrize("election", ELECTIONS)
+def test_maestro_never_counts_stale_step_done(election):
+    network, workers = build_sim_cluster(WORKERS + 1, election=election)
+    outstanding = {r: None for r in workers}
+    acks = []
+    post = network.post
+
+    def watched(source, dest, tag, msg):
+        if source == 0 and tag == TAG_STEP:
+            assert outstanding[dest] is None, f"passo mandado pro {dest} sem confirmar o anterior"
+            outstanding[dest] = array('i', msg)[MSG_ARG]
+        elif dest == 0 and tag == TAG_STEP_DONE:
+            step = outstanding[source]
+            assert step is not None, f"confirmação do {source} sem passo pendente"
+            assert workers[source].step_no == step
+            outstanding[source] = None
+            acks.append(step)
+        post(source, dest, tag, msg)
+
+    network.post = watched
+    scenario = "kill:leader@5,kill:3@6,revive:3@7,kill:leader@8,revive:16@9,revive:15@9,kill:1@12"
+    result = run_headless(network.endpoint(0), scenario, max_steps=300, verbose=False)
+    assert result['converged']
+    assert all(step is None for step in outstanding.values())
+    assert acks
+
+
+def _cluster(election, size=9):
+    network, workers = build_sim_cluster(size, election=election)
+    network.pending.clear()
+    return network, workers
+
+def _sent(network, source, dest, tag):
+    return any(p[:3] == (source, dest, tag) for p in network.pending)
+
+
+@pytest.mark.parametrize("election", ELECTIONS)
+def test_late_coord_from_lower_rank_is_ignored(election):
+    _, workers = _cluster(election)
+    w = workers[5]
+    w.leader_epoch = 3
+    w.mailbox.append((TAG_COORD, 2, 1, 0))
+    w.step()
+    assert w.current_leader == 8
+    assert w.my_state == Worker.STATE_NORMAL
+
+
+@pytest.mark.parametrize("election", ELECTIONS)
+def test_newer_coord_from_lower_rank_starts_election(election):
+    _, workers = _cluster(election)
+    w = workers[5]
+    w.mailbox.append((TAG_COORD, 2, 4, 0))
+    w.step()
+    # Aceita o anúncio novo, mas eu to vivo e sou maior: brigo
+    assert w.current_leader == 2
+    assert w.my_state == Worker.STATE_ELECTION
+
+
+@pytest.mark.parametrize("election", ELECTIONS)
+def test_leader_reasserts_on_election(election):
+    network, workers = _cluster(election)
+    leader = workers[8]
+    leader.mailbox.append((TAG_ELECTION, 3, leader.epoch + 1, 0))
+    for _ in range(2):
+        leader.step()
+    assert _sent(network, 8, 3, TAG_OK)
+    assert _sent(network, 8, 3, TAG_COORD)
+    assert leader.current_leader == 8
+
+
+@pytest.mark.parametrize("election", ELECTIONS)
+def test_waiting_for_coord_times_out_and_retries(election):
+    _, workers = _cluster(election)
+    w = workers[3]
+    w.schedule(w.ACT_START_ELECTION)
+    w.step()
+    assert w.election.started == 1
+    # Alguém maior respondeu OK e morreu antes de mandar COORD
+    w.mailbox.append((TAG_OK, 6, w.epoch, 0))
+    w.step()
+    assert w.my_state == Worker.STATE_WAITING
+    for _ in range(w.election.coord_timeout + 2):
+        w.step()
+        if w.election.started > 1: break
+    assert w.election.started == 2
+
+
+# Lider que cai e volta antes de alguém perceber: quem ele pergunta ainda
+# diz que o lider é ele. Tem que voltar como LÍDER (e reanunciar), não Normal.
+@pytest.mark.parametrize("detector, opts", [("single", {'period': 20}), ("rotating", {})])
+def test_revived_leader_nobody_missed_takes_back_leadership(detector, opts):
+    network, workers = build_sim_cluster(9, detector=detector, detector_opts=opts)
+    labels = []
+    post = network.post
+
+    def watched(source, dest, tag, msg):
+        if source == 7 and dest == 0 and tag in (TAG_STATUS, TAG_STEP_DONE):
+            label = array('i', msg)[FRAME_LABEL]
+            if label != LBL_NONE: labels.append(label)
+        post(source, dest, tag, msg)
+
+    network.post = watched
+    result = run_headless(network.endpoint(0), "kill:8@5,kill:7@60,revive:7@61", max_steps=300, verbose=False)
+    assert result['converged']
+    w = workers[7]
+    assert w.current_leader == 7 and w.my_state == Worker.STATE_NORMAL
+    assert labels[-1] == LBL_LEADER
+    assert all(other.current_leader == 7 for r, other in workers.items() if r != 8)
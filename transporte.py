@@ -0,0 +1,536 @@
+# ==========================================
+# CAMADA DE TRANSPORTE
+# ==========================================
+# O maestro e os workers não falam mais direto com o MPI.COMM_WORLD.
+# Eles recebem um objeto "transporte" que sabe mandar e receber mensagens.
+# Existem dois backends:
+#   - MPITransport: o código original com mpi4py (um processo por rank).
+#   - SimNetwork/SimTransport: tudo num processo só, cada rank é um objeto
+#     e as mensagens passam por filas em memória. É determinístico, então
+#     dá pra rodar milhares de nós num core só e repetir o mesmo resultado.
+import math
+import struct
+from array import array
+from collections import deque
+
+# Curingas pra recv (o backend MPI traduz pros valores do MPI)
+ANY_SOURCE = -1
+ANY_TAG = -1
+
+
+# ==========================================
+# BACKEND MPI
+# ==========================================
+class MPITransport:
+    def __init__(self, comm=None):
+        # Importa o mpi4py só aqui, assim o backend simulado roda sem MPI
+        from mpi4py import MPI
+        self.MPI = MPI
+        self.comm = comm if comm is not None else MPI.COMM_WORLD
+        self.rank = self.comm.Get_rank()
+        self.size = self.comm.Get_size()
+        # Status reusado nos recebimentos bloqueantes: criar um por mensagem
+        # custa mais que o próprio Recv de uma mensagem tão pequena
+        self.status = MPI.Status()
+
+    # Traduz nossos curingas pros do MPI
+    def _source(self, source):
+        return self.MPI.ANY_SOURCE if source == ANY_SOURCE else source
+
+    def _tag(self, tag):
+        return self.MPI.ANY_TAG if tag == ANY_TAG else tag
+
+    def send(self, msg, dest, tag):
+        self.comm.send(msg, dest=dest, tag=tag)
+
+    def isend(self, msg, dest, tag):
+        return self.comm.isend(msg, dest=dest, tag=tag)
+
+    # Versões com buffer (sem pickle): array/NumPy vai direto pro MPI
+    def Send(self, buf, dest, tag):
+        self.comm.Send(buf, dest=dest, tag=tag)
+
+    # O buffer tem que continuar vivo até o request terminar
+    def Isend(self, buf, dest, tag):
+        return MPIRequest(self.comm.Isend(buf, dest=dest, tag=tag))
+
+    # Recebimento sem travar (request e status novos a cada chamada)
+    def Irecv(self, buf, source=ANY_SOURCE, tag=ANY_TAG):
+        req = self.comm.Irecv(buf, source=self._source(source), tag=self._tag(tag))
+        return MPIRequest(req, self.MPI.Status())
+
+    # Testa vários requests de uma vez. Devolve os índices dos que terminaram.
+    def testsome(self, requests):
+        done = self.MPI.Request.Testsome([r.req for r in requests])
+        return done or []
+
+    def waitall(self, requests):
+        self.MPI.Request.Waitall([r.req for r in requests])
+
+    # Preenche buf com a mensagem. Devolve (quem mandou, tag).
+    # É o caminho do loop bloqueante: Irecv(...).wait() faz a mesma coisa
+    # criando request e status novos a cada mensagem.
+    def Recv(self, buf, source=ANY_SOURCE, tag=ANY_TAG):
+        status = self.status
+        self.comm.Recv(buf, source=self._source(source), tag=self._tag(tag), status=status)
+        return status.Get_source(), status.Get_tag()
+
+    # Trava até ter mensagem e devolve (quem mandou, tag, tamanho em bytes)
+    # sem consumir, pra saber o tamanho do buffer antes do Recv
+    def probe(self, source=ANY_SOURCE, tag=ANY_TAG):
+        status = self.status
+        self.comm.Probe(source=self._source(source), tag=self._tag(tag), status=status)
+        return status.Get_source(), status.Get_tag(), status.Get_count(self.MPI.BYTE)
+
+    # Trava até chegar mensagem. Devolve (msg, quem mandou, tag)
+    def recv(self, source=ANY_SOURCE, tag=ANY_TAG):
+        status = self.status
+        msg = self.comm.recv(source=self._source(source), tag=self._tag(tag), status=status)
+        return msg, status.Get_source(), status.Get_tag()
+
+    # Só espia se tem alguma coisa chegando, sem travar
+    def iprobe(self, source=ANY_SOURCE, tag=ANY_TAG):
+        return self.comm.Iprobe(source=self._source(source), tag=self._tag(tag))
+
+    def barrier(self):
+        self.comm.Barrier()
+
+    # Coletivo: todo rank tem que chamar, na mesma ordem
+    def state_board(self, width):
+        return MPIStateBoard(self, width)
+
+
+# Embrulha o MPI.Request pra ter a mesma cara do request simulado:
+#   test() -> (terminou?, (origem, tag) ou None)
+#   wait() -> (origem, tag) ou None
+# Origem e tag só fazem sentido em recebimento.
+class MPIRequest:
+    def __init__(self, req, status=None):
+        self.req = req
+        self.status = status
+
+    def _result(self):
+        if self.status is None: return None
+        return self.status.Get_source(), self.status.Get_tag()
+
+    def test(self):
+        if self.status is None:
+            done = self.req.Test()
+        else:
+            done = self.req.Test(self.status)
+        return done, (self._result() if done else None)
+
+    def wait(self):
+        if self.status is None:
+            self.req.Wait()
+        else:
+            self.req.Wait(self.status)
+        return self._result()
+
+
+# ==========================================
+# QUADRO DE ESTADO (JANELA RMA)
+# ==========================================
+# Tabela de size linhas x width ints que mora no rank 0. Cada worker
+# escreve só a própria linha com Put (lock compartilhado: linhas diferentes
+# não brigam) e o rank 0 tira uma cópia da tabela inteira com um Get só,
+# com lock exclusivo (Get junto com Put na mesma linha é indefinido no MPI:
+# dava pra ler a versão nova com o rótulo velho e nunca mais reler).
+# Ninguém manda mensagem pro maestro pra isso, e ler custa O(N) não
+# importa quanta coisa esteja acontecendo na rede.
+# Com nós virtuais a tabela tem uma linha por nó (rows), não por processo.
+class MPIStateBoard:
+    def __init__(self, transport, width, rows=None):
+        MPI = self.MPI = transport.MPI
+        self.rank = transport.rank
+        self.width = width
+        rows = rows or transport.size
+        itemsize = MPI.INT.Get_size()
+        # Só o rank 0 expõe memória; os outros entram na janela com zero bytes
+        self.table = array('i', [0]) * (rows * width) if self.rank == 0 else None
+        self.win = MPI.Win.Create(self.table, itemsize, comm=transport.comm)
+        self.snap = array('i', [0]) * (rows * width)
+
+    # Escreve a minha linha (ou a linha `index`, row tem width ints)
+    def publish(self, row, index=None):
+        index = self.rank if index is None else index
+        self.win.Lock(0, self.MPI.LOCK_SHARED)
+        self.win.Put(row, 0, target=(index * self.width, self.width, self.MPI.INT))
+        self.win.Unlock(0)
+
+    # Cópia da tabela inteira (linha r começa em r * width)
+    def snapshot(self):
+        self.win.Lock(0, self.MPI.LOCK_EXCLUSIVE)
+        self.win.Get(self.snap, 0)
+        self.win.Unlock(0)
+        return self.snap
+
+    # Coletivo, igual a criação
+    def free(self):
+        self.win.Free()
+
+
+# ==========================================
+# POOL DE ENVIOS NÃO BLOQUEANTES
+# ==========================================
+# Guarda os Isend em andamento junto com o buffer de cada um (o buffer não
+# pode sumir antes do envio terminar). No fim do passo o worker chama
+# progress() e o pool testa tudo de uma vez com Testsome. Se passar do
+# limite, espera todo mundo (Waitall) antes de aceitar mais: assim a memória
+# fica limitada mesmo em execuções longas com muita eleição.
+class RequestPool:
+    def __init__(self, comm, limit=1024):
+        self.comm = comm
+        self.limit = limit
+        self.requests = []
+        self.buffers = []
+        # Métricas
+        self.high_water = 0   # Maior número de envios pendentes ao mesmo tempo
+        self.completed = 0    # Total de envios já finalizados
+        self.stalls = 0       # Quantas vezes o limite forçou um Waitall
+
+    @property
+    def in_flight(self):
+        return len(self.requests)
+
+    def isend(self, buf, dest, tag):
+        if len(self.requests) >= self.limit:
+            self.stalls += 1
+            self.waitall()
+        self.requests.append(self.comm.Isend(buf, dest, tag))
+        self.buffers.append(buf)
+        if len(self.requests) > self.high_water:
+            self.high_water = len(self.requests)
+
+    # Solta o que já terminou, sem travar
+    def progress(self):
+        if not self.requests: return 0
+        done = self.comm.testsome(self.requests)
+        if not done: return 0
+        if len(done) == len(self.requests):
+            self.requests = []
+            self.buffers = []
+        else:
+            finished = set(done)
+            self.requests = [r for i, r in enumerate(self.requests) if i not in finished]
+            self.buffers = [b for i, b in enumerate(self.buffers) if i not in finished]
+        self.completed += len(done)
+        return len(done)
+
+    # Trava até todos os envios terminarem
+    def waitall(self):
+        if not self.requests: return
+        self.comm.waitall(self.requests)
+        self.completed += len(self.requests)
+        self.requests = []
+        self.buffers = []
+
+    def stats(self):
+        return {'in_flight': self.in_flight, 'high_water': self.high_water,
+                'completed': self.completed, 'stalls': self.stalls}
+
+
+# ==========================================
+# BACKEND SIMULADO (UM PROCESSO SÓ)
+# ==========================================
+# A rede guarda uma fila global FIFO com todas as mensagens em trânsito.
+# Cada rank pode ter um "handler" (o worker) que é chamado na hora que a
+# mensagem é entregue. Rank sem handler (o maestro) guarda as mensagens
+# numa caixa de entrada e lê com recv/iprobe, igual no MPI.
+class SimNetwork:
+    def __init__(self, size):
+        self.size = size
+        # Mensagens em trânsito: (origem, destino, tag, msg)
+        self.pending = deque()
+        # Quem processa as mensagens de cada rank
+        self.handlers = {}
+        # Caixa de entrada dos ranks sem handler
+        self.inboxes = [deque() for _ in range(size)]
+        self.endpoints = [SimTransport(self, r) for r in range(size)]
+        # Total de mensagens entregues (útil pra benchmark)
+        self.delivered = 0
+        # Tabela do quadro de estado, criada no primeiro state_board()
+        self.board = None
+        # Latência, perda e partição entre os workers (ver rede.py); None = rede perfeita
+        self.model = None
+
+    def endpoint(self, rank):
+        return self.endpoints[rank]
+
+    # Liga um rank a uma função handler(msg, tag, source).
+    # Se o handler devolver False o rank é desligado (saiu do programa).
+    def attach(self, rank, handler):
+        self.handlers[rank] = handler
+
+    def post(self, source, dest, tag, msg):
+        if not 0 <= dest < self.size:
+            raise ValueError(f"rank de destino inválido: {dest}")
+        # O modelo pode segurar a mensagem (atraso) ou sumir com ela
+        if self.model is not None and self.model.hold(self, source, dest, tag, msg): return
+        self.route(source, dest, tag, msg)
+
+    # Põe a mensagem no caminho até o destino (aqui, a fila de entrega)
+    def route(self, source, dest, tag, msg):
+        self.pending.append((source, dest, tag, msg))
+
+    # Entrega UMA mensagem. Devolve False se não tinha nada pra entregar.
+    def pump_one(self):
+        if not self.pending:
+            return False
+        source, dest, tag, msg = self.pending.popleft()
+        self.delivered += 1
+        if self.model is not None: self.model.on_deliver(self, tag, msg)
+        handler = self.handlers.get(dest)
+        if handler is None:
+            self.inboxes[dest].append((msg, source, tag))
+        elif handler(msg, tag, source) is False:
+            del self.handlers[dest]
+        return True
+
+    # Entrega tudo até a rede ficar parada
+    def run_until_idle(self):
+        while self.pump_one():
+            pass
+
+
+class SimRequest:
+    # No simulador o envio é instantâneo, então o request já nasce completo
+    def test(self):
+        return True, None
+
+    def wait(self):
+        return None
+
+
+# Recebimento pendente: só termina quando tiver mensagem na caixa de entrada
+class SimRecvRequest:
+    def __init__(self, transport, buf, source, tag):
+        self.transport = transport
+        self.buf = buf
+        self.source = source
+        self.tag = tag
+
+    def test(self):
+        if self.transport._take(self.source, self.tag, remove=False) is None:
+            return False, None
+        return True, self.wait()
+
+    def wait(self):
+        return self.transport.Recv(self.buf, self.source, self.tag)
+
+
+class SimTransport:
+    def __init__(self, network, rank):
+        self.network = network
+        self.rank = rank
+        self.size = network.size
+
+    def send(self, msg, dest, tag):
+        self.network.post(self.rank, dest, tag, msg)
+
+    def isend(self, msg, dest, tag):
+        self.network.post(self.rank, dest, tag, msg)
+        return SimRequest()
+
+    # Com buffer a gente copia os bytes, igual o MPI faria
+    def Send(self, buf, dest, tag):
+        self.network.post(self.rank, dest, tag, bytes(memoryview(buf)))
+
+    def Isend(self, buf, dest, tag):
+        self.Send(buf, dest, tag)
+        return SimRequest()
+
+    def Irecv(self, buf, source=ANY_SOURCE, tag=ANY_TAG):
+        return SimRecvRequest(self, buf, source, tag)
+
+    # Envio simulado já nasce completo
+    def testsome(self, requests):
+        return list(range(len(requests)))
+
+    def waitall(self, requests):
+        pass
+
+    def Recv(self, buf, source=ANY_SOURCE, tag=ANY_TAG):
+        data, m_source, m_tag = self.recv(source, tag)
+        memoryview(buf).cast('B')[:len(data)] = data
+        return m_source, m_tag
+
+    def probe(self, source=ANY_SOURCE, tag=ANY_TAG):
+        while True:
+            found = self._take(source, tag, remove=False)
+            if found is not None:
+                data, m_source, m_tag = found
+                return m_source, m_tag, len(data) if isinstance(data, bytes) else 0
+            if not self.network.pump_one():
+                raise RuntimeError(f"[Sim] Deadlock: rank {self.rank} esperando mensagem que nunca vai chegar")
+
+    # Procura na caixa de entrada a primeira mensagem que bate com o filtro
+    def _take(self, source, tag, remove):
+        inbox = self.network.inboxes[self.rank]
+        for i, (msg, m_source, m_tag) in enumerate(inbox):
+            if source != ANY_SOURCE and m_source != source: continue
+            if tag != ANY_TAG and m_tag != tag: continue
+            if remove: del inbox[i]
+            return msg, m_source, m_tag
+        return None
+
+    # "Travar" aqui significa fazer a rede andar até a mensagem chegar.
+    # Se a rede parar e nada chegar, ninguém mais vai mandar: é deadlock.
+    def recv(self, source=ANY_SOURCE, tag=ANY_TAG):
+        while True:
+            found = self._take(source, tag, remove=True)
+            if found is not None:
+                return found
+            if not self.network.pump_one():
+                raise RuntimeError(f"[Sim] Deadlock: rank {self.rank} esperando mensagem que nunca vai chegar")
+
+    def iprobe(self, source=ANY_SOURCE, tag=ANY_TAG):
+        self.network.run_until_idle()
+        return self._take(source, tag, remove=False) is not None
+
+    # Tá tudo no mesmo processo, não tem ninguém pra esperar
+    def barrier(self):
+        pass
+
+    # A tabela é uma só na rede; cada rank ganha a própria "vista" dela
+    def state_board(self, width):
+        if self.network.board is None:
+            self.network.board = array('i', [0]) * (self.size * width)
+        return SimStateBoard(self.network.board, self.rank, width)
+
+
+# Mesma cara do MPIStateBoard, só que escrevendo direto na tabela
+class SimStateBoard:
+    def __init__(self, table, rank, width):
+        self.table = table
+        self.rank = rank
+        self.width = width
+
+    def publish(self, row):
+        start = self.rank * self.width
+        self.table[start:start + self.width] = row
+
+    def snapshot(self):
+        return self.table[:]
+
+    def free(self):
+        pass
+
+
+# ==========================================
+# BACKEND VIRTUAL (VÁRIOS NÓS POR PROCESSO MPI)
+# ==========================================
+# Cada processo MPI hospeda um bloco de nós virtuais e roda todos no mesmo
+# loop. É a rede simulada (handlers, filas, caixas de entrada) com uma
+# diferença: mensagem pra nó de outro processo vai pelo MPI. Entre nós do
+# mesmo processo é só a fila local, sem MPI nenhum.
+# Os nós são numerados de 0 a size-1 e divididos em blocos contíguos: o
+# nó 0 (maestro) mora no processo 0 e os workers 1..size-1 são repartidos
+# entre os processos 1..P-1 (ver block_range).
+# No MPI a mensagem vai com um envelope [destino, origem] na frente dos
+# bytes. Mensagem com pickle (send/recv minúsculo) vai com a tag somada a
+# OBJECT_TAG, pra quem recebe saber como ler.
+OBJECT_TAG = 1 << 12
+_ENVELOPE = struct.Struct('ii')
+
+# Nós [lo, hi) que o processo `host` hospeda, com `hosts` processos e `size` nós
+def block_range(host, hosts, size):
+    if host == 0: return 0, 1
+    per = max(1, math.ceil((size - 1) / max(1, hosts - 1)))
+    lo = min(size, 1 + (host - 1) * per)
+    return lo, min(size, lo + per)
+
+
+class VirtualNetwork(SimNetwork):
+    def __init__(self, mpi, size):
+        self.mpi = mpi
+        self.size = size
+        self.lo, self.hi = block_range(mpi.rank, mpi.size, size)
+        self.per = max(1, math.ceil((size - 1) / max(1, mpi.size - 1)))
+        # Mesmas filas da rede simulada, só que só pros nós daqui
+        self.pending = deque()
+        self.handlers = {}
+        self.inboxes = {r: deque() for r in range(self.lo, self.hi)}
+        self.endpoints = {r: VirtualTransport(self, r) for r in range(self.lo, self.hi)}
+        self.delivered = 0
+        self.board = None
+        # Mensagens que precisaram do MPI (o resto ficou na fila local)
+        self.remote = 0
+        # Cada processo tem o próprio modelo de rede: quem decide é o lado que manda
+        self.model = None
+
+    # Processo MPI onde mora o nó
+    def owner(self, node):
+        return 0 if node == 0 else 1 + (node - 1) // self.per
+
+    def route(self, source, dest, tag, msg):
+        if self.lo <= dest < self.hi:
+            self.pending.append((source, dest, tag, msg))
+            return
+        self.remote += 1
+        if isinstance(msg, bytes):
+            self.mpi.Send(_ENVELOPE.pack(dest, source) + msg, self.owner(dest), tag)
+        else:
+            self.mpi.send((dest, source, msg), self.owner(dest), tag + OBJECT_TAG)
+
+    # Traz pra fila local o que chegou pelo MPI. block=True trava até
+    # chegar pelo menos uma; senão pega só o que já está esperando.
+    def receive(self, block=False):
+        while block or self.mpi.iprobe():
+            m_source, m_tag, nbytes = self.mpi.probe()
+            if m_tag >= OBJECT_TAG:
+                (dest, source, msg), _, _ = self.mpi.recv(m_source, m_tag)
+                m_tag -= OBJECT_TAG
+            else:
+                data = bytearray(nbytes)
+                self.mpi.Recv(data, m_source, m_tag)
+                dest, source = _ENVELOPE.unpack_from(data)
+                msg = bytes(data[_ENVELOPE.size:])
+            self.pending.append((source, dest, m_tag, msg))
+            block = False
+
+    # Sem nada na fila local, espera o MPI em vez de acusar deadlock:
+    # a mensagem pode estar vindo de outro processo
+    def pump_one(self):
+        if not self.pending: self.receive(block=True)
+        return super().pump_one()
+
+    # Entrega tudo que tem, inclusive o que chegar pelo MPI nesse meio tempo
+    def run_until_idle(self):
+        self.receive()
+        while self.pending:
+            while self.pending: super().pump_one()
+            self.receive()
+
+    # Coletivo nos processos MPI: uma janela só, com uma linha por nó
+    def state_board(self, width):
+        if self.board is None:
+            self.board = MPIStateBoard(self.mpi, width, rows=self.size)
+        return self.board
+
+
+# O transporte de cada nó virtual: igual ao simulado, menos a barreira,
+# que aqui é de verdade (entre os processos MPI)
+class VirtualTransport(SimTransport):
+    def barrier(self):
+        self.network.mpi.barrier()
+
+    def state_board(self, width):
+        return VirtualBoard(self.network.state_board(width), self.rank)
+
+
+# Vista do quadro de estado presa à linha de um nó virtual
+class VirtualBoard:
+    def __init__(self, board, node):
+        self.board = board
+        self.node = node
+
+    def publish(self, row):
+        self.board.publish(row, self.node)
+
+    def snapshot(self):
+        return self.board.snapshot()
+
+    # A janela é do processo, quem libera é quem criou (ver VirtualNetwork)
+    def free(self):
+        pass
@@ -1,29 +1,30 @@
-from mpi4py import MPI
-import pygame
 import math
 import sys
 import random 
+import argparse
+import time
+import itertools
+from array import array
+from collections import deque
 
-# Configurações do MPI
-# Pega o comunicador global (todos os processos)
-comm = MPI.COMM_WORLD
-# Pega o ID deste processo específico (0, 1, 2...)
-rank = comm.Get_rank()
-# Pega o total de processos rodando
-size = comm.Get_size()
-
-# Tags
-# Define os códigos de mensagem para saber o que fazer quando receber algo
-TAG_KILL = 1      
-TAG_STATUS = 2     
-TAG_STEP = 3      
-TAG_ELECTION = 4  
-TAG_OK = 5        
-TAG_COORD = 6     
-TAG_PING = 7       
-TAG_PONG = 8       
-TAG_STATE_UI = 10
-TAG_REVIVE = 11    # Nova tag pra reviver processo morto
+from transporte import MPITransport, SimNetwork, VirtualNetwork, VirtualBoard, RequestPool
+from protocolo import *
+from eleicao import make_election, ELECTIONS
+from difusao import make_fanout, FANOUTS
+from vigia import make_detector, DETECTORS
+from metricas import Metrics, profiled, write_metrics, process_usage, startup_summary
+from rede import NetworkModel
+from rastro import TraceWriter, UNIT_STEPS, UNIT_MS, REC_KILL, REC_REVIVE
+
+# Buffer do maestro pras ordens (STEP, KILL, REVIVE). Send só volta quando
+# o buffer pode ser reusado, então um só basta.
+_control_buf = new_msg()
+
+# Manda uma ordem do maestro pra um worker
+def send_control(comm, dest, tag, arg=0):
+    _control_buf[MSG_ORIGIN] = comm.rank
+    _control_buf[MSG_ARG] = arg
+    comm.Send(_control_buf, dest=dest, tag=tag)
 
 # Cores
 # Define as cores RGB pra usar no desenho
@@ -35,27 +36,38 @@ BLUE = (50, 50, 200)
 REVIVE_CYAN = (0, 150, 150)
 GRAY_ARROW = (200, 200, 200) 
 GOLD = (255, 215, 0)
+# Cor da bolinha por rótulo quando ela é pequena demais pra ter o rótulo escrito
+LABEL_TINTS = {"LÍDER": GOLD, "Eleição": (255, 140, 0), "Aguardando...": (120, 170, 230),
+               "Checando...": (150, 220, 150), "MORTO": RED, "Revivendo...": REVIVE_CYAN}
+# Jeitos de arrumar os nós na tela (ver desenho.Layout)
+LAYOUTS = ("auto", "rings", "grid")
+# Quanto tempo as setas ficam na tela no --async (não tem clique de passo pra limpar)
+ASYNC_ARROW_MS = 300
+
+# Recebe o próximo frame de telemetria de qualquer worker.
+# Espia antes pra saber o tamanho e já recebe num array do tamanho certo.
+def recv_frame(comm):
+    source, tag, nbytes = comm.probe()
+    frame = array('i', [0]) * (nbytes // FRAME_ITEMSIZE)
+    comm.Recv(frame, source=source, tag=tag)
+    return source, tag, frame
+
+# Frame (sem setas) feito a partir de uma linha do quadro de estado, pra
+# quem só sabe ler frame (placar, rastro)
+def board_frame(row, label=LBL_NONE, sent=0, suspect=-1):
+    return array('i', (label, int(row[BOARD_LEADER]), int(row[BOARD_STATE]), sent, suspect, 0))
+
+# "350 ms (CPU 300 ms), RSS 30.1 MB"
+def _startup_text(usage):
+    wall = "?" if usage['startup_ms'] is None else f"{usage['startup_ms']:.0f} ms"
+    rss = "?" if usage['rss_kb'] is None else f"{usage['rss_kb'] / 1024:.1f} MB"
+    return f"{wall} (CPU {usage['cpu_ms']:.0f} ms), RSS {rss}"
 
-# Função auxiliar pra desenhar a setinha na tela
-# Calcula o angulo entre dois pontos e desenha um triângulo na ponta da linha
-def draw_arrow(screen, color, start, end, thickness=2):
-    # Desenha a linha principal
-    pygame.draw.line(screen, color, start, end, thickness)
-    # Calcula a rotação da linha em radianos
-    rotation = math.atan2(start[1] - end[1], start[0] - end[0])
-    # Tamanho da ponta da seta
-    arrow_len = 15
-    # Angulo de abertura da ponta
-    angle = math.pi / 6
-    # Define o ponto final da linha como o bico da seta
-    p1 = end
-    # Calcula os outros dois pontos do triângulo da seta usando seno e cosseno
-    p2 = (end[0] + arrow_len * math.cos(rotation + angle),
-          end[1] + arrow_len * math.sin(rotation + angle))
-    p3 = (end[0] + arrow_len * math.cos(rotation - angle),
-          end[1] + arrow_len * math.sin(rotation - angle))
-    # Desenha o triângulo preenchido
-    pygame.draw.polygon(screen, color, [p1, p2, p3])
+# Pede as métricas pra todos os workers (vivos ou mortos) e espera cada um
+# responder. Devolve a lista de relatórios (ver Worker.report).
+def collect_metrics(comm):
+    for i in range(1, comm.size): send_control(comm, i, TAG_METRICS)
+    return [comm.recv(source=i, tag=TAG_METRICS)[0] for i in range(1, comm.size)]
 
 # ==========================================
 # LÓGICA DO MESTRE (INTERFACE GRÁFICA)
@@ -63,8 +75,19 @@ def draw_arrow(screen, color, start, end, thickness=2):
 # Essa função roda só no processo 0.
 # Ela desenha a tela, os botões e gerencia o clique do mouse.
 # Não participa da eleição, só desenha o que os outros mandam.
-def run_maestro():
+# Recebe o transporte (MPI ou simulado) por onde conversa com os workers.
+def run_maestro(comm, metrics_path=None, trace_path=None, layout_mode="auto", state_board=None, async_mode=False):
+    # Libera os workers antes de carregar a tela: eles não dependem dela pra
+    # começar, e os frames que mandarem ficam esperando na rede
+    startup = process_usage()
+    comm.barrier()
+    # A tela (pygame, NumPy e desenho.py) só é carregada aqui: quem não
+    # desenha nem importa
+    import pygame
+    import numpy as np
+    from desenho import RenderCache, Layout, merge_rects, arrow_entries, draw_entry
     print("[Maestro] Interface Iniciada.")
+    size = comm.size
     # Inicia o pygame
     pygame.init()
     # Cria um relógio pra controlar o FPS
@@ -85,12 +108,18 @@ def run_maestro():
     font_ui = pygame.font.SysFont('Arial', 16)
     font_legend = pygame.font.SysFont('Arial', 14, bold=True)
     font_title = pygame.font.SysFont('Arial', 22, bold=True)
+    font_small = pygame.font.SysFont('Arial', 11, bold=True)
+    # Textos e bolinhas já desenhados (ver desenho.py)
+    cache = RenderCache()
 
     # Dicionário pra guardar se cada processo tá vivo ou morto
     process_states = {i: True for i in range(1, size)}
     # Dicionário pro texto que aparece em cima da bolinha
     process_labels = {i: "Iniciando..." for i in range(1, size)}
-    # Lista pra guardar as setas que tem que desenhar nesse frame
+    # Setas que chegaram nesse passo: (origem, array de pares (alvo, tipo))
+    step_arrows = []
+    arrows_changed = False
+    # O que desenhar pra elas (setas soltas ou feixes, ver desenho.arrow_entries)
     active_arrows = []
     
     # Configura cores e variáveis de layout
@@ -100,431 +129,1500 @@ def run_maestro():
     COLOR_ELECTION = (255, 140, 0)   
     COLOR_OK = (0, 191, 255)         
     COLOR_COORD = (255, 215, 0)      
+    ARROW_COLORS = {ARROW_OK: COLOR_OK, ARROW_COORD: COLOR_COORD, ARROW_PING: GRAY_ARROW,
+                    ARROW_PONG: GRAY_ARROW, ARROW_WHO: GRAY_ARROW, ARROW_INFO: GRAY_ARROW}
 
-    # Calcula onde cada bolinha vai ficar no circulo
-    radius = 180
-    center = (CANVAS_WIDTH // 2, HEIGHT // 2)
-    node_positions = {}
+    # Calcula onde cada bolinha vai ficar (anel, anéis concêntricos ou grade)
     num_workers = size - 1
-    for i in range(num_workers):
-        # Matemática de circulo pra distribuir os pontos
-        angle = (2 * math.pi * i / num_workers) - (math.pi / 2)
-        x = center[0] + int(radius * math.cos(angle))
-        y = center[1] + int(radius * math.sin(angle))
-        node_positions[i + 1] = (x, y)
+    layout = Layout(num_workers, CANVAS_WIDTH, HEIGHT, layout_mode)
+
+    # Área que cada nó ocupa na tela (bolinha + rótulo em cima), pra saber
+    # o que redesenhar quando só ele muda
+    label_width = max(font_state.size(text)[0] for text in LABELS) + 16 if layout.show_labels else 0
+    node_rects = {r: layout.node_rect(r, label_width) for r in range(1, size)}
 
     # Cria o retângulo do botão de próximo passo
     btn_step_rect = pygame.Rect(WIDTH - SIDEBAR_WIDTH + 15, HEIGHT - 80, 220, 50)
-    # Cria a lista de botões de matar/reviver na lateral
+    # Cria a lista de botões de matar/reviver na lateral. Até 11 workers é um
+    # botão grande por rank; mais que isso, botões pequenos só com o número,
+    # divididos em páginas (setas embaixo ou a rodinha do mouse)
+    compact = num_workers > 11
+    COLS, ROWS = (4, 14) if compact else (1, 11)
+    per_page = COLS * ROWS
+    pages = max(1, math.ceil(num_workers / per_page))
+    page = 0
     kill_buttons = []
     start_y = 100
     for i in range(1, size):
-        rect = pygame.Rect(WIDTH - SIDEBAR_WIDTH + 25, start_y + (i-1)*50, 200, 40)
-        kill_buttons.append({'rank': i, 'rect': rect})
+        slot = (i - 1) % per_page
+        if compact:
+            rect = pygame.Rect(CANVAS_WIDTH + 15 + (slot % COLS) * 55, 90 + (slot // COLS) * 34, 50, 28)
+        else:
+            rect = pygame.Rect(WIDTH - SIDEBAR_WIDTH + 25, start_y + (i-1)*50, 200, 40)
+        kill_buttons.append({'rank': i, 'rect': rect, 'page': (i - 1) // per_page})
+    btn_prev = pygame.Rect(CANVAS_WIDTH + 15, HEIGHT - 125, 40, 30)
+    btn_next = pygame.Rect(WIDTH - 55, HEIGHT - 125, 40, 30)
+    page_rect = pygame.Rect(btn_prev.right, btn_prev.y, btn_next.x - btn_prev.right, 30)
+    # Linha de resumo (lider e quantos vivos) embaixo do título
+    info_rect = pygame.Rect(CANVAS_WIDTH + 20, 60, SIDEBAR_WIDTH - 40, 22)
+
+    # Tudo que nunca muda vai pronto numa superfície só: fundo, barra
+    # lateral, título, botão de passo, legenda e o anel
+    background = pygame.Surface((WIDTH, HEIGHT))
+    background.fill(WHITE)
+    # Desenha a barra lateral cinza
+    pygame.draw.rect(background, GRAY_PANEL, (CANVAS_WIDTH, 0, SIDEBAR_WIDTH, HEIGHT))
+    # Escreve titulo na barra
+    background.blit(font_title.render("Painel de Controle", True, WHITE), (CANVAS_WIDTH + 20, 30))
+    # Desenha botão de proximo passo
+    pygame.draw.rect(background, BLUE, btn_step_rect, border_radius=8)
+    step_text = font_node.render("PRÓXIMO PASSO >", True, WHITE)
+    background.blit(step_text, step_text.get_rect(center=btn_step_rect.center))
+    # Setas de página
+    if pages > 1:
+        for rect, text in ((btn_prev, "<"), (btn_next, ">")):
+            pygame.draw.rect(background, (90, 90, 100), rect, border_radius=6)
+            arrow_text = font_node.render(text, True, WHITE)
+            background.blit(arrow_text, arrow_text.get_rect(center=rect.center))
+    # Desenha a legenda de cores
+    legend_x = 20
+    legend_y = HEIGHT - 110
+    # Fundo da legenda
+    pygame.draw.rect(background, (245, 245, 245), (legend_x - 10, legend_y - 10, 180, 100), border_radius=5)
+    pygame.draw.rect(background, (200, 200, 200), (legend_x - 10, legend_y - 10, 180, 100), 1, border_radius=5)
+    # Itens da legenda
+    items = [("Eleição", COLOR_ELECTION), ("Resposta OK", COLOR_OK), ("Novo Líder", COLOR_COORD), ("Ping Check", GRAY_ARROW)]
+    for i, (text, color) in enumerate(items):
+        ly = legend_y + i * 22
+        pygame.draw.rect(background, color, (legend_x, ly, 15, 15))
+        background.blit(font_legend.render(text, True, (50, 50, 50)), (legend_x + 25, ly))
+    # Sem rótulo escrito em cima, o estado vira a cor da bolinha: legenda disso no canto de cima
+    if not layout.show_labels:
+        tints = [("Líder", LABEL_TINTS["LÍDER"]), ("Eleição", LABEL_TINTS["Eleição"]),
+                 ("Aguardando", LABEL_TINTS["Aguardando..."]), ("Morto", RED)]
+        pygame.draw.rect(background, (245, 245, 245), (10, 10, 130, 96), border_radius=5)
+        pygame.draw.rect(background, (200, 200, 200), (10, 10, 130, 96), 1, border_radius=5)
+        for i, (text, color) in enumerate(tints):
+            pygame.draw.circle(background, color, (27, 27 + i * 22), 7)
+            background.blit(font_legend.render(text, True, (50, 50, 50)), (42, 19 + i * 22))
+    # Desenha as linhas conectando o anel (ou os anéis, de leve)
+    if layout.rings is None:
+        if num_workers > 1: pygame.draw.lines(background, BLACK, True, layout.points, 2)
+    else:
+        for ring in layout.rings:
+            pygame.draw.circle(background, (225, 225, 225), tuple(map(int, layout.center)), int(ring), 1)
+
+    # Bolinha do processo (cor, borda e número), pronta com fundo transparente.
+    # Pequena demais, fica só a cor (e todas da mesma cor são a mesma superfície).
+    def build_node(text, fill, text_color):
+        r = layout.node_radius
+        surf = pygame.Surface((2 * r + 2, 2 * r + 2), pygame.SRCALPHA)
+        pygame.draw.circle(surf, fill, (r + 1, r + 1), r)
+        if r >= 6: pygame.draw.circle(surf, BLACK, (r + 1, r + 1), r, 2 if r >= 15 else 1)
+        if text:
+            text_surf = (font_node if r >= 22 else font_small).render(text, True, text_color)
+            surf.blit(text_surf, text_surf.get_rect(center=(r + 1, r + 1)))
+        return surf
+
+    # Rótulo em cima da bolinha, com o fundo branco arredondado
+    def build_label(label, text_color):
+        lbl_surf = cache.text(font_state, label, text_color)
+        bg_rect = lbl_surf.get_rect().inflate(14, 6)
+        surf = pygame.Surface(bg_rect.size, pygame.SRCALPHA)
+        pygame.draw.rect(surf, (255, 255, 255, 230), surf.get_rect(), border_radius=5)
+        pygame.draw.rect(surf, (200, 200, 200), surf.get_rect(), 1, border_radius=5)
+        surf.blit(lbl_surf, (7, 3))
+        return surf
+
+    def draw_node(p_rank):
+        pos = layout.point(p_rank)
+        alive = process_states[p_rank]
+        label = process_labels.get(p_rank, "")
+        fill = GREEN if alive else RED
+        if not layout.show_labels: fill = LABEL_TINTS.get(label, fill)
+        text = str(p_rank) if layout.show_numbers else ""
+        text_color = BLACK if alive else WHITE
+        node = cache.get(('node', text, fill, text_color), lambda: build_node(text, fill, text_color))
+        screen.blit(node, node.get_rect(center=pos))
+
+    def draw_label(p_rank):
+        pos = layout.point(p_rank)
+        # Texto de estado em cima da bolinha
+        label = process_labels.get(p_rank, "")
+        text_color = (50, 50, 150)
+        if label == "LÍDER": text_color = (180, 140, 0) # Dourado se for lider
+        elif label == "MORTO": text_color = RED
+        badge = cache.get(('label', label, text_color), lambda: build_label(label, text_color))
+        screen.blit(badge, badge.get_rect(center=(pos[0], pos[1]-45)))
+
+    def draw_button(btn):
+        p_rank = btn['rank']
+        # Troca cor e texto se ta vivo ou morto
+        if process_states[p_rank]:
+            color = BTN_KILL_COLOR
+            txt_str = f"Matar {p_rank}"
+        else:
+            color = REVIVE_CYAN
+            txt_str = f"Reviver {p_rank}"
+        if compact: txt_str = str(p_rank)
+        # Desenha o retangulo e o texto do botão
+        pygame.draw.rect(screen, color, btn['rect'], border_radius=8 if not compact else 5)
+        text = cache.text(font_ui, txt_str, WHITE)
+        screen.blit(text, text.get_rect(center=btn['rect'].center))
+
+    def draw_info():
+        leaders = [r for r, label in process_labels.items() if label == "LÍDER" and process_states[r]]
+        alive = sum(process_states.values())
+        text = f"Líder: {max(leaders) if leaders else '-'}   Vivos: {alive}/{num_workers}"
+        screen.blit(cache.text(font_ui, text, WHITE), info_rect)
+        if pages > 1:
+            text = cache.text(font_ui, f"página {page + 1}/{pages}", WHITE)
+            screen.blit(text, text.get_rect(center=page_rect.center))
+
+    # Redesenha só o pedaço `area` da tela, na mesma ordem de sempre:
+    # fundo, botões, setas, bolinhas e rótulos por cima
+    def redraw(area):
+        screen.set_clip(area)
+        screen.blit(background, area, area)
+        for btn in kill_buttons:
+            if btn['page'] == page and btn['rect'].colliderect(area): draw_button(btn)
+        if area.colliderect(info_rect) or area.colliderect(page_rect): draw_info()
+        for arrow in active_arrows:
+            if arrow['rect'].colliderect(area): draw_entry(screen, arrow, cache, font_small)
+        hit = [p_rank for p_rank, rect in node_rects.items() if rect.colliderect(area)]
+        for p_rank in hit: draw_node(p_rank)
+        if layout.show_labels:
+            for p_rank in hit: draw_label(p_rank)
+        screen.set_clip(None)
+
+    # Troca a página de botões da barra lateral
+    def flip_page(delta):
+        nonlocal page
+        new_page = max(0, min(pages - 1, page + delta))
+        if new_page != page:
+            page = new_page
+            dirty.append(pygame.Rect(CANVAS_WIDTH, 85, SIDEBAR_WIDTH, HEIGHT - 85 - 90))
+
+    # Troca o rótulo de um nó (e vivo/morto, se for o caso). Devolve se mudou.
+    def show_label(source, label):
+        if label == LBL_NONE or process_labels[source] == LABELS[label]: return False
+        process_labels[source] = LABELS[label]
+        dirty.append(node_rects[source])
+        dirty.append(info_rect)
+        alive = process_states[source]
+        if label == LBL_DEAD:
+            # Marca como morto no visual
+            process_states[source] = False
+        elif label == LBL_REVIVING: 
+            # Marca como vivo no visual
+            process_states[source] = True
+        btn = kill_buttons[source - 1]
+        if process_states[source] != alive and btn['page'] == page: dirty.append(btn['rect'])
+        return True
 
     running = True
-    comm.Barrier()
+    # Quantos passos já foram dados (vai junto no TAG_STEP)
+    step_count = 0
+    # Versão de cada linha do quadro de estado na última leitura (--board)
+    board_seen = np.zeros(size, dtype=np.intc)
+    # Grava tudo que aparece na tela pra rever depois (ver rastro.py).
+    # No --async ninguém clica pra andar: o "passo" do rastro é o ms de relógio
+    # e as setas somem sozinhas a cada ASYNC_ARROW_MS (senão só acumulam).
+    trace = TraceWriter(trace_path, size, UNIT_MS if async_mode else UNIT_STEPS) if trace_path else None
+    started = time.monotonic()
+    now_ms = 0
+    arrows_since = 0
+    # Pedaços da tela que mudaram desde o último quadro (começa com a tela toda)
+    dirty = [screen.get_rect()]
     # Loop principal da interface
     while running:
+        if async_mode:
+            now = int((time.monotonic() - started) * 1000)
+            if now > now_ms:
+                now_ms = now
+                if trace: trace.step(now_ms)
+            if step_arrows and now_ms - arrows_since >= ASYNC_ARROW_MS:
+                step_arrows.clear()
+                arrows_changed = True
         # Verifica se tem mensagem chegando sem travar a tela
-        while comm.Iprobe(source=MPI.ANY_SOURCE, tag=MPI.ANY_TAG):
-            status = MPI.Status()
-            # Espia a mensagem pra saber quem mandou e qual a tag
-            comm.Probe(source=MPI.ANY_SOURCE, tag=MPI.ANY_TAG, status=status)
-            tag = status.Get_tag()
-            source = status.Get_source()
-
-            # Se for aviso de status (morreu, reviveu, desenha seta)
-            if tag == TAG_STATUS:
-                msg = comm.recv(source=source, tag=TAG_STATUS)
-                if msg == "DIED":
-                    # Marca como morto no visual
-                    process_states[source] = False
-                    process_labels[source] = "MORTO"
-                elif msg == "REVIVED": 
-                    # Marca como vivo no visual
-                    process_states[source] = True
-                    process_labels[source] = "Revivendo..."
-                # Se for pedido pra desenhar seta
-                elif isinstance(msg, tuple) and msg[0] == "DRAW":
-                    _, target, m_type = msg
-                    # Pega posições de origem e destino
-                    start_pos = node_positions[source]
-                    end_pos = node_positions[target]
-                    # Calcula vetor pra encurtar a linha e não entrar na bolinha
-                    dx = end_pos[0] - start_pos[0]
-                    dy = end_pos[1] - start_pos[1]
-                    dist = math.hypot(dx, dy)
-                    offset = 35 # Distancia pra parar antes do centro
-                    if dist > 0:
-                        new_end = (end_pos[0] - (dx/dist)*offset, end_pos[1] - (dy/dist)*offset)
-                        new_start = (start_pos[0] + (dx/dist)*offset, start_pos[1] + (dy/dist)*offset)
-                    else:
-                        new_end, new_start = end_pos, start_pos
-
-                    # Guarda a seta pra desenhar depois
-                    active_arrows.append({'start': new_start, 'end': new_end, 'type': m_type})
-
-            # Se for atualização de texto de estado (Lider, Eleição...)
-            elif tag == TAG_STATE_UI:
-                msg = comm.recv(source=source, tag=TAG_STATE_UI)
-                process_labels[source] = msg
-            # Se for qualquer outra coisa, só consome pra limpar o buffer
-            else:
-                comm.recv(source=source, tag=tag)
+        # Cada worker manda no máximo um frame por passo
+        while comm.iprobe():
+            source, tag, frame = recv_frame(comm)
+            if trace: trace.frame(source, frame)
 
-        # Preenche fundo branco
-        screen.fill(WHITE)
-        # Desenha a barra lateral cinza
-        pygame.draw.rect(screen, GRAY_PANEL, (CANVAS_WIDTH, 0, SIDEBAR_WIDTH, HEIGHT))
-        # Escreve titulo na barra
-        title_surf = font_title.render("Painel de Controle", True, WHITE)
-        screen.blit(title_surf, (CANVAS_WIDTH + 20, 30))
+            show_label(source, frame[FRAME_LABEL])
 
-        # Desenha os botões de matar/reviver
-        for btn in kill_buttons:
-            p_rank = btn['rank']
-            is_alive = process_states[p_rank]
-            
-            # Troca cor e texto se ta vivo ou morto
-            if is_alive:
-                color = BTN_KILL_COLOR
-                txt_str = f"Matar {p_rank}"
-            else:
-                color = REVIVE_CYAN
-                txt_str = f"Reviver {p_rank}"
-
-            # Desenha o retangulo e o texto do botão
-            pygame.draw.rect(screen, color, btn['rect'], border_radius=8)
-            text = font_ui.render(txt_str, True, WHITE)
-            text_rect = text.get_rect(center=btn['rect'].center)
-            screen.blit(text, text_rect)
-
-        # Desenha botão de proximo passo
-        pygame.draw.rect(screen, BLUE, btn_step_rect, border_radius=8)
-        step_text = font_node.render("PRÓXIMO PASSO >", True, WHITE)
-        text_rect = step_text.get_rect(center=btn_step_rect.center)
-        screen.blit(step_text, text_rect)
-
-        # Desenha a legenda de cores
-        legend_x = 20
-        legend_y = HEIGHT - 110
-        # Fundo da legenda
-        pygame.draw.rect(screen, (245, 245, 245), (legend_x - 10, legend_y - 10, 180, 100), border_radius=5)
-        pygame.draw.rect(screen, (200, 200, 200), (legend_x - 10, legend_y - 10, 180, 100), 1, border_radius=5)
-        # Itens da legenda
-        items = [("Eleição", COLOR_ELECTION), ("Resposta OK", COLOR_OK), ("Novo Líder", COLOR_COORD), ("Ping Check", GRAY_ARROW)]
-        for i, (text, color) in enumerate(items):
-            ly = legend_y + i * 22
-            pygame.draw.rect(screen, color, (legend_x, ly, 15, 15))
-            txt_surf = font_legend.render(text, True, (50, 50, 50))
-            screen.blit(txt_surf, (legend_x + 25, ly))
-
-        # Desenha as linhas pretas conectando o anel
-        point_list = list(node_positions.values())
-        if len(point_list) > 1:
-            pygame.draw.lines(screen, BLACK, True, point_list, 2)
-
-        # Desenha as setas ativas
-        for arrow in active_arrows:
-            color = COLOR_ELECTION
-            if arrow['type'] == "OK": color = COLOR_OK
-            if arrow['type'] == "COORD": color = COLOR_COORD
-            if arrow['type'] == "PING" or arrow['type'] == "PONG": color = GRAY_ARROW
-            draw_arrow(screen, color, arrow['start'], arrow['end'], thickness=2 if color == GRAY_ARROW else 4)
-
-        # Desenha as bolinhas dos processos
-        for p_rank, pos in node_positions.items():
-            color = GREEN if process_states[p_rank] else RED
-            # Circulo colorido e borda preta
-            pygame.draw.circle(screen, color, pos, 30)
-            pygame.draw.circle(screen, BLACK, pos, 30, 2)
-            # Numero do ID dentro da bolinha
-            text = font_node.render(str(p_rank), True, BLACK if process_states[p_rank] else WHITE)
-            text_rect = text.get_rect(center=pos)
-            screen.blit(text, text_rect)
-            
-            # Texto de estado em cima da bolinha
-            label = process_labels.get(p_rank, "")
-            text_color = (50, 50, 150)
-            if label == "LÍDER": text_color = (180, 140, 0) # Dourado se for lider
-            elif label == "MORTO": text_color = RED
-
-            # Renderiza o texto e poe fundo branco semi-transparente
-            lbl_surf = font_state.render(label, True, text_color)
-            lbl_rect = lbl_surf.get_rect(center=(pos[0], pos[1]-45))
-            bg_rect = lbl_rect.inflate(14, 6)
-            pygame.draw.rect(screen, (255, 255, 255, 230), bg_rect, border_radius=5)
-            pygame.draw.rect(screen, (200, 200, 200), bg_rect, 1, border_radius=5)
-            screen.blit(lbl_surf, lbl_rect)
+            # Setas que o worker mandou nesse passo, como pares (alvo, tipo)
+            count = frame[FRAME_COUNT]
+            if count:
+                if not step_arrows: arrows_since = now_ms
+                step_arrows.append((source, np.frombuffer(frame, dtype=np.intc, count=2 * count,
+                                                          offset=FRAME_HEADER * FRAME_ITEMSIZE).reshape(-1, 2)))
+                arrows_changed = True
+
+        # Com o quadro de estado, rótulo e vivo/morto vêm da tabela: um Get
+        # por quadro, em vez de uma mensagem por mudança
+        if state_board is not None:
+            rows = np.frombuffer(state_board.snapshot(), dtype=np.intc).reshape(size, BOARD_WIDTH)
+            for source in np.nonzero(rows[:, BOARD_VERSION] != board_seen)[0].tolist():
+                label = int(rows[source, BOARD_LABEL])
+                if show_label(source, label) and trace: trace.frame(source, board_frame(rows[source], label))
+            board_seen = rows[:, BOARD_VERSION].copy()
 
         # Processa eventos do Pygame (cliques e fechar janela)
         for event in pygame.event.get():
             # Se clicar no X, fecha tudo
             if event.type == pygame.QUIT:
                 running = False
+                # Antes de fechar junta as métricas, se pediram
+                if metrics_path:
+                    reports = collect_metrics(comm)
+                    write_metrics(metrics_path, reports, {'startup': {'maestro': startup,
+                                                                      'workers': startup_summary(reports)}})
                 # Manda todos os processos saírem
-                for i in range(1, size): comm.send("EXIT", dest=i, tag=TAG_KILL)
+                for i in range(1, size): send_control(comm, i, TAG_KILL, KILL_EXIT)
+
+            # A janela voltou a aparecer (estava coberta/minimizada): desenha tudo
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                dirty.append(screen.get_rect())
+
+            # Rodinha em cima da barra lateral troca de página
+            if event.type == pygame.MOUSEWHEEL and pygame.mouse.get_pos()[0] >= CANVAS_WIDTH:
+                flip_page(-event.y)
             
             # Se clicou com mouse
             if event.type == pygame.MOUSEBUTTONDOWN:
                 mx, my = pygame.mouse.get_pos()
                 # Se clicou no botão Step
                 if btn_step_rect.collidepoint(mx, my):
-                    active_arrows.clear() # Limpa setas antigas
+                    # Limpa setas antigas
+                    step_arrows.clear()
+                    arrows_changed = True
+                    # No --async os workers andam sozinhos: o botão só limpa as setas
+                    if async_mode: continue
+                    step_count += 1
+                    if trace: trace.step(step_count)
                     # Manda sinal de passo pra todo mundo que ta vivo
                     for i in range(1, size):
-                        if process_states[i]: comm.send("STEP", dest=i, tag=TAG_STEP)
+                        if process_states[i]: send_control(comm, i, TAG_STEP, step_count)
+                if pages > 1 and btn_prev.collidepoint(mx, my): flip_page(-1)
+                if pages > 1 and btn_next.collidepoint(mx, my): flip_page(1)
                 
-                # Se clicou num botão lateral
+                # Se clicou num botão lateral (da página que tá aparecendo)
                 for btn in kill_buttons:
-                    if btn['rect'].collidepoint(mx, my):
+                    if btn['page'] == page and btn['rect'].collidepoint(mx, my):
                         p_rank = btn['rank']
                         # Se ta vivo manda morrer, se ta morto manda reviver
                         if process_states[p_rank]: 
-                            comm.send("DIE", dest=p_rank, tag=TAG_KILL)
+                            send_control(comm, p_rank, TAG_KILL, KILL_DIE)
+                            if trace: trace.control(REC_KILL, p_rank)
                         else:
-                            comm.send("REVIVE", dest=p_rank, tag=TAG_REVIVE)
+                            send_control(comm, p_rank, TAG_REVIVE)
+                            if trace: trace.control(REC_REVIVE, p_rank)
+
+        # Setas mudaram: apaga as antigas e calcula as novas de uma vez
+        if arrows_changed:
+            dirty.extend(arrow['rect'] for arrow in active_arrows)
+            if step_arrows:
+                src = np.concatenate([np.full(len(pairs), s, dtype=np.intc) for s, pairs in step_arrows])
+                pairs = np.concatenate([pairs for s, pairs in step_arrows])
+                active_arrows = arrow_entries(layout, src, pairs[:, 0], pairs[:, 1], ARROW_COLORS,
+                                              COLOR_ELECTION, GRAY_ARROW)
+            else:
+                active_arrows = []
+            dirty.extend(arrow['rect'] for arrow in active_arrows)
+            arrows_changed = False
         
-        # Atualiza a tela
-        pygame.display.flip()
+        # Atualiza só o que mudou. Quadro sem mudança não desenha nada.
+        if dirty and running:
+            areas = [r.clip(screen.get_rect()) for r in merge_rects(dirty)]
+            for area in areas: redraw(area)
+            pygame.display.update(areas)
+            dirty = []
         # Segura em 60 FPS
         clock.tick(60)
     pygame.quit()
+    if trace: trace.close()
+
+# ==========================================
+# MAESTRO SEM TELA (HEADLESS)
+# ==========================================
+# Mesmo papel do maestro, mas sem pygame e sem janela.
+# Em vez de esperar clique, dá o próximo passo assim que todos os
+# workers vivos confirmarem (TAG_STEP_DONE) que terminaram o anterior.
+# Serve pra rodar no CI e medir passos/segundo e tempo de convergência.
+
+# Lê um roteiro tipo "kill:leader@5,revive:3@40".
+# Devolve lista de (passo, ação, alvo) ordenada pelo passo.
+# O alvo pode ser um rank ou "leader" (resolvido na hora do evento).
+# Com size, rank fora de 1..size-1 é erro (senão o evento some calado).
+def parse_scenario(text, size=None):
+    events = []
+    if not text: return events
+    for item in text.split(","):
+        item = item.strip()
+        if not item: continue
+        try:
+            what, when = item.split("@")
+            action, target = what.split(":")
+            step = int(when)
+        except ValueError:
+            raise ValueError(f"evento inválido no roteiro: {item!r} (use acao:alvo@passo)")
+        action = action.strip().lower()
+        if action not in ("kill", "revive"):
+            raise ValueError(f"ação desconhecida no roteiro: {action!r}")
+        target = target.strip().lower()
+        if target != "leader":
+            target = int(target)
+            if size is not None and not 1 <= target < size:
+                raise ValueError(f"alvo fora do cluster no roteiro: {item!r} (workers são 1..{size - 1})")
+        events.append((step, action, target))
+    events.sort(key=lambda e: e[0])
+    return events
+
+# Confere se todo mundo vivo concorda no mesmo lider, se ele é o maior
+# vivo (é o que o valentão garante) e se ninguém ta no meio de eleição.
+def is_converged(process_states, reports):
+    alive = [r for r, ok in process_states.items() if ok]
+    if not alive: return True
+    expected = max(alive)
+    for r in alive:
+        leader, state = reports.get(r, (-1, Worker.STATE_ELECTION))
+        if leader != expected or state != Worker.STATE_NORMAL:
+            return False
+    return True
+
+# Placar do maestro sem tela: quem ta vivo, o que cada um reportou e as
+# métricas de cada evento do roteiro. O mesmo placar serve pro modo passo a
+# passo (o tempo é o número do passo) e pro assíncrono (ms desde o começo).
+class Scoreboard:
+    def __init__(self, comm, unit="steps", trace_path=None):
+        self.comm = comm
+        self.size = size = comm.size
+        self.unit = unit  # Sufixo das métricas de tempo: 'steps' ou 'ms'
+        # Rastro binário do que aconteceu (ver rastro.py)
+        self.trace = None
+        if trace_path:
+            self.trace = TraceWriter(trace_path, size, UNIT_STEPS if unit == "steps" else UNIT_MS)
+        # Igual ao maestro com tela: quem ta vivo e o que cada um reportou
+        self.process_states = {i: True for i in range(1, size)}
+        # Ultimo (lider, estado) que cada worker mandou
+        self.reports = {i: (size - 1, Worker.STATE_NORMAL) for i in range(1, size)}
+        # Historico de convergencia: um registro por evento do roteiro
+        self.convergence = []
+        self.pending = None   # Evento esperando o sistema convergir
+        self.messages = 0     # Mensagens do protocolo entre workers (somadas dos frames)
+        self.max_sent = 0     # Mais mensagens que um worker mandou num frame só
+        # Vigia: quantos pings, quantas suspeitas e quantas foram alarme falso
+        self.heartbeats = 0
+        self.suspicions = 0
+        self.false_suspicions = 0
+        self.undetected = {}  # Lider morto ainda não percebido -> registro do evento
+        self.frames = 0       # Frames que chegaram por mensagem no rank 0
+        # Última leitura do quadro de estado (--board), pra fazer a diferença
+        self.board_seen = None
+        # Tempo até ficar pronto e memória do maestro (ver metricas.process_usage)
+        self.startup = None
+
+    # Executa um evento do roteiro. Devolve False se não tinha o que fazer
+    # (matar quem já morreu, nenhum lider vivo...); rank que não existe é erro.
+    def fire(self, action, target, now):
+        process_states = self.process_states
+        if target == "leader":
+            alive = [r for r, ok in process_states.items() if ok]
+            if not alive: return False
+            target = max(alive)
+        elif not 1 <= target < self.size:
+            raise ValueError(f"alvo fora do cluster: {action}:{target} (workers são 1..{self.size - 1})")
+        if action == "kill" and process_states[target]:
+            # O lider é o maior vivo (se o sistema já tiver convergido)
+            was_leader = target == max(r for r, ok in process_states.items() if ok)
+            send_control(self.comm, target, TAG_KILL, KILL_DIE)
+            process_states[target] = False
+        elif action == "revive" and not process_states[target]:
+            send_control(self.comm, target, TAG_REVIVE)
+            process_states[target] = True
+            self.reports[target] = (-1, Worker.STATE_ELECTION)
+        else:
+            return False
+        if self.trace: self.trace.control(REC_KILL if action == "kill" else REC_REVIVE, target)
+        name = f"{action}:{target}"
+        if self.pending is not None and self.pending['at'] == now:
+            # Vários eventos na mesma hora (ex: tempestade de revive) viram um só
+            self.pending['event'] += "," + name
+        else:
+            # Se ainda tinha evento sem convergir, ele fica marcado como não convergido
+            if self.pending is not None: self.convergence.append(self.pending)
+            self.pending = {'event': name, 'at': now, 'time': time.perf_counter(),
+                            'messages_at': self.messages, 'messages': None,
+                            'converged': None, 'converged_seconds': None, 'detected': None}
+        # Matou o lider: fica esperando algum vigia perceber
+        if action == "kill" and was_leader: self.undetected[target] = self.pending
+        return True
+
+    # Soma o que veio num frame. report=True atualiza o (lider, estado) do worker.
+    # Frame que chegou por mensagem conta os pings pelas setas; o que veio
+    # do quadro de estado já traz a conta pronta em `pings`.
+    def account(self, source, frame, now, report, pings=None):
+        if self.trace: self.trace.frame(source, frame)
+        sent = frame[FRAME_SENT]
+        self.messages += sent
+        if sent > self.max_sent: self.max_sent = sent
+        if pings is None:
+            self.frames += 1
+            for k in range(frame[FRAME_COUNT]):
+                if frame[FRAME_HEADER + 2*k + 1] == ARROW_PING: self.heartbeats += 1
+        else:
+            self.heartbeats += pings
+        suspect = frame[FRAME_SUSPECT]
+        if suspect >= 1:
+            self.suspicions += 1
+            if suspect in self.undetected:
+                event = self.undetected.pop(suspect)
+                event['detected'] = now - event['at']
+            elif self.process_states.get(suspect): self.false_suspicions += 1
+        if report:
+            self.reports[source] = (frame[FRAME_LEADER], frame[FRAME_STATE])
+
+    # Lê o quadro de estado inteiro (um Get só). Quem publicou desde a
+    # última leitura vira um frame com a diferença dos contadores. Se o vigia
+    # desconfiou de mais de um entre duas leituras, só o último aparece.
+    def account_board(self, table, now):
+        # NumPy só pra quem usa o quadro (o import de novo é de graça)
+        import numpy as np
+        rows = np.frombuffer(table, dtype=np.intc).reshape(self.size, BOARD_WIDTH)
+        seen = self.board_seen
+        if seen is None: seen = np.zeros_like(rows)
+        for source in np.nonzero(rows[:, BOARD_VERSION] != seen[:, BOARD_VERSION])[0].tolist():
+            row, old = rows[source], seen[source]
+            label = int(row[BOARD_LABEL]) if row[BOARD_LABEL] != old[BOARD_LABEL] else LBL_NONE
+            suspect = int(row[BOARD_SUSPECT]) if row[BOARD_SUSPICIONS] != old[BOARD_SUSPICIONS] else -1
+            frame = board_frame(row, label, int(row[BOARD_SENT] - old[BOARD_SENT]), suspect)
+            self.account(source, frame, now, report=True, pings=int(row[BOARD_PINGS] - old[BOARD_PINGS]))
+        self.board_seen = rows.copy()
+
+    # O relógio andou (passo ou ms): marca no rastro
+    def tick(self, now):
+        if self.trace: self.trace.step(int(now))
+
+    # Confere a convergência; se convergiu, fecha o evento pendente
+    def check(self, now):
+        if not is_converged(self.process_states, self.reports): return False
+        pending = self.pending
+        if pending is not None:
+            pending['converged'] = now - pending['at']
+            pending['converged_seconds'] = time.perf_counter() - pending['time']
+            pending['messages'] = self.messages - pending['messages_at']
+            self.convergence.append(pending)
+            self.pending = None
+        return True
+
+    # Fecha todos os workers e monta o resultado.
+    # Com metrics=True junta antes as métricas de cada worker em 'ranks'.
+    def finish(self, metrics=False):
+        if self.pending is not None: self.convergence.append(self.pending)
+        ranks = collect_metrics(self.comm) if metrics else None
+        for i in range(1, self.size): send_control(self.comm, i, TAG_KILL, KILL_EXIT)
+        if self.trace: self.trace.close()
+        unit = self.unit
+        events = []
+        for e in self.convergence:
+            events.append({'event': e['event'], ('step' if unit == "steps" else 'at_ms'): e['at'],
+                           'messages_at': e['messages_at'], 'messages': e['messages'], f'converged_{unit}': e['converged'],
+                           'converged_seconds': e['converged_seconds'], f'detected_{unit}': e['detected']})
+        return {
+            'workers': self.size - 1,
+            'converged': self.pending is None and is_converged(self.process_states, self.reports),
+            'messages': self.messages,
+            'frames': self.frames,
+            'max_sent_per_step': self.max_sent,
+            'heartbeats': self.heartbeats,
+            'suspicions': self.suspicions,
+            'false_suspicions': self.false_suspicions,
+            'events': events,
+            'ranks': ranks,
+            'startup': {'maestro': self.startup, 'workers': startup_summary(ranks) if ranks else None},
+        }
+
+    def print_events(self, result):
+        unit = self.unit
+        for e in result['events']:
+            at = f"no passo {e['step']}" if unit == "steps" else f"aos {e['at_ms']:.0f} ms"
+            took = e[f'converged_{unit}']
+            if took is None:
+                print(f"[Headless]   {e['event']} {at}: NÃO convergiu")
+            else:
+                # No passo a passo mostra também quanto isso deu de relógio
+                took = (f"{took} passos ({e['converged_seconds'] * 1000:.2f} ms)" if unit == "steps"
+                        else f"{took:.1f} ms")
+                print(f"[Headless]   {e['event']} {at}: convergiu em {took}, {e['messages']} mensagens")
+            detected = e[f'detected_{unit}']
+            if detected is not None:
+                detected = f"{detected} passos" if unit == "steps" else f"{detected:.1f} ms"
+                print(f"[Headless]     vigia percebeu a queda em {detected}")
+        rate = (f"{result['heartbeats_per_step']:.2f}/passo" if unit == "steps"
+                else f"{result['heartbeats_per_sec']:.1f}/s")
+        print(f"[Headless] Vigia: {result['heartbeats']} pings ({rate}), {result['suspicions']} suspeitas, "
+              f"{result['false_suspicions']} alarmes falsos")
+        startup = result['startup']
+        if startup['maestro']:
+            print(f"[Headless] Início: maestro pronto em {_startup_text(startup['maestro'])}")
+        if startup['workers']:
+            w = startup['workers']
+            wall = ("?" if w['startup_ms_max'] is None
+                    else f"até {w['startup_ms_max']:.0f} ms (média {w['startup_ms_mean']:.0f} ms)")
+            rss = "?" if w['rss_kb_mean'] is None else f"{w['rss_kb_mean'] / 1024:.1f} MB (máx {w['rss_kb_max'] / 1024:.1f} MB)"
+            print(f"[Headless]   workers ({w['processes']} processos): pronto em {wall}, RSS médio {rss}")
+
+
+def run_headless(comm, scenario=None, max_steps=1000, settle_steps=0, verbose=True, metrics=False,
+                 trace_path=None):
+    size = comm.size
+    events = parse_scenario(scenario, size) if isinstance(scenario, str) else list(scenario or [])
+    board = Scoreboard(comm, "steps", trace_path)
+    process_states = board.process_states
+    stable = 0       # Passos seguidos convergido depois do ultimo evento
+
+    board.startup = process_usage()
+    comm.barrier()
+    started = time.perf_counter()
+    step = 0
+    while step < max_steps:
+        step += 1
+        board.tick(step)
+
+        # Dispara os eventos do roteiro marcados pra este passo
+        while events and events[0][0] <= step:
+            _, action, target = events.pop(0)
+            if board.fire(action, target, step): stable = 0
+
+        # Manda o passo pra todo mundo vivo e espera todas as confirmações
+        waiting = set()
+        for i in range(1, size):
+            if process_states[i]:
+                send_control(comm, i, TAG_STEP, step)
+                waiting.add(i)
+        while waiting:
+            source, tag, frame = recv_frame(comm)
+            # Frames fora de passo (morreu, reviveu) não tem tela pra mostrar
+            board.account(source, frame, step, report=(tag == TAG_STEP_DONE))
+            if tag == TAG_STEP_DONE: waiting.discard(source)
+
+        if board.check(step):
+            stable += 1
+            # Acabou o roteiro e o sistema ta calmo: pode parar
+            if not events and stable > settle_steps: break
+        else:
+            stable = 0
+
+    elapsed = time.perf_counter() - started
+    result = board.finish(metrics)
+    result.update({
+        'steps': step,
+        'seconds': elapsed,
+        'steps_per_sec': step / elapsed if elapsed > 0 else float('inf'),
+        'heartbeats_per_step': board.heartbeats / step if step else 0.0,
+    })
+    if verbose:
+        print(f"[Headless] {result['steps']} passos em {elapsed:.3f}s ({result['steps_per_sec']:.1f} passos/s), "
+              f"{result['messages']} mensagens")
+        board.print_events(result)
+    return result
+
+# ==========================================
+# MAESTRO ASSÍNCRONO (RELÓGIO DE PAREDE)
+# ==========================================
+# Sem TAG_STEP: cada worker anda no próprio relógio (ver run_worker_async) e
+# só manda frame quando alguma coisa muda. O maestro só dispara o roteiro
+# na hora marcada (em ms desde o começo) e fica lendo os frames sem travar,
+# medindo em ms quanto tempo o sistema levou pra concordar no lider.
+def run_headless_async(comm, scenario=None, max_ms=10000, settle_ms=200, verbose=True, metrics=False,
+                       trace_path=None, state_board=None):
+    events = parse_scenario(scenario, comm.size) if isinstance(scenario, str) else list(scenario or [])
+    board = Scoreboard(comm, "ms", trace_path)
+    stable_since = None  # Desde quando ta convergido depois do ultimo evento
+
+    board.startup = process_usage()
+    comm.barrier()
+    started = time.monotonic()
+    while True:
+        now = (time.monotonic() - started) * 1000
+        if now > max_ms: break
+        board.tick(now)
+
+        # Dispara os eventos do roteiro que já deram a hora
+        while events and events[0][0] <= now:
+            _, action, target = events.pop(0)
+            if board.fire(action, target, now): stable_since = None
+
+        # Lê tudo que chegou, sem travar
+        while comm.iprobe():
+            source, tag, frame = recv_frame(comm)
+            board.account(source, frame, now, report=True)
+        # Com o quadro de estado os workers não mandam frame: lê a tabela
+        if state_board is not None: board.account_board(state_board.snapshot(), now)
+
+        if board.check(now):
+            if stable_since is None: stable_since = now
+            # Acabou o roteiro e o sistema ta calmo: pode parar
+            if not events and now - stable_since >= settle_ms: break
+        else:
+            stable_since = None
+        time.sleep(0.0005)
+
+    elapsed = time.monotonic() - started
+    result = board.finish(metrics)
+    result.update({'seconds': elapsed, 'heartbeats_per_sec': board.heartbeats / elapsed if elapsed else 0.0})
+    if verbose:
+        print(f"[Headless] {elapsed * 1000:.0f} ms de relógio, {result['messages']} mensagens, "
+              f"{result['frames']} frames lidos pelo maestro")
+        board.print_events(result)
+    return result
 
 # ==========================================
 # LÓGICA DO TRABALHADOR
 # ==========================================
-# Essa função roda nos processos 1 a N.
+# Roda nos processos 1 a N (ou vira objeto dentro do simulador).
 # É aqui que a mágica do algoritmo acontece.
-def run_worker():
-    alive = True
-    # Assume que o maior ID é o lider no começo
-    current_leader = size - 1 
-    
+# O Worker não sabe se ta rodando em MPI ou no simulador: ele só recebe
+# uma mensagem por vez em handle() e manda as dele pelo transporte.
+
+# Tags que vão pra caixa de correio e as que seguram o vigia (agito na rede)
+MAILBOX_TAGS = frozenset((TAG_ELECTION, TAG_OK, TAG_PING, TAG_PONG, TAG_COORD, TAG_WHO_IS_LEADER, TAG_LEADER_INFO))
+ACTIVITY_TAGS = frozenset((TAG_ELECTION, TAG_OK, TAG_COORD))
+
+class Worker:
+    # Com milhares de workers no mesmo processo (--sim, --virtual) cada
+    # atributo num slot em vez de dict economiza memória e acesso
+    __slots__ = ('comm', 'rank', 'size', 'election', 'fanout', 'detector',
+                 'rejoin', 'rejoin_peers', 'rejoin_timeout', 'rejoin_timer', 'rejoin_asked',
+                 'rejoins', 'rejoin_elections', 'step_no', 'alive', 'current_leader', 'leader_epoch',
+                 'my_state', 'patience_timer', 'action_queue', 'planned', 'batches', 'mailbox', 'relays',
+                 'epoch', 'out', 'sends', 'metrics', 'frame_label', 'frame_arrows', 'frame_sent',
+                 'frame_suspect', 'last_report', 'board', 'board_row', 'startup',
+                 'oks_to_send', 'trigger_election', 'reassert_to', 'claim')
+
     # Constantes pra máquina de estado
     STATE_NORMAL = 0
     STATE_ELECTION = 1    
     STATE_WAITING = 2     
-    
-    # Estado inicial
-    my_state = STATE_NORMAL
-    patience_timer = 0
-    # Fila de ações pra executar (envia msg, inicia eleição...)
-    action_queue = []
-    # Caixa de entrada pra guardar mensagens que chegam fora de hora
-    mailbox = []
-
-    # Configuração do Vigia (Processo 1)
-    check_counter = 1
-    waiting_pong = False
-    ping_wait_timer = 0 
-    heartbeat_cooldown = 0 
-
-    # Funçãozinha pra facilitar mandar texto pra interface
-    def update_status_gui(text):
-        comm.send(text, dest=0, tag=TAG_STATE_UI)
+
+    # Ações da fila (índice na tabela ACTIONS, lá embaixo)
+    ACT_SEND_OK_BATCH = 0
+    ACT_SEND_PONG = 1
+    ACT_SEND_LEADER_INFO = 2
+    ACT_ASK_LEADER = 3
+    ACT_START_ELECTION = 4
+    ACT_ANNOUNCE = 5
+    ACT_COUNT = 6
+    # Só respostas pra quem perguntou: não seguram o relógio da eleição
+    REPLY_ACTIONS = frozenset((ACT_SEND_OK_BATCH, ACT_SEND_PONG, ACT_SEND_LEADER_INFO))
+
+    def __init__(self, comm, election=None, fanout=None, detector=None,
+                 rejoin="ask", rejoin_peers=3, rejoin_timeout=4, board=None):
+        self.comm = comm
+        self.rank = comm.rank
+        self.size = comm.size
+        # Estratégia de eleição (ver eleicao.py). Pode vir o nome ou o objeto.
+        if election is None or isinstance(election, str):
+            election = make_election(election or "bully")
+        self.election = election
+        # Como os broadcasts da eleição se espalham (ver difusao.py)
+        if fanout is None or isinstance(fanout, str):
+            fanout = make_fanout(fanout or "direct")
+        self.fanout = fanout
+        # Quem vigia o lider e quando desconfiar (ver vigia.py)
+        if detector is None or isinstance(detector, str):
+            detector = make_detector(detector or "single")
+        self.detector = detector
+        # Como voltar depois de reviver: "ask" pergunta quem é o lider (pra
+        # rejoin_peers nós de uma vez) e só briga se for maior que ele ou se
+        # ninguém responder; "election" é o jeito original, eleição na hora.
+        self.rejoin = rejoin
+        self.rejoin_peers = rejoin_peers
+        self.rejoin_timeout = rejoin_timeout
+        self.rejoin_timer = 0      # Passos que ainda espero o LEADER_INFO (0 = não to esperando)
+        self.rejoin_asked = []     # Pra quem perguntei nessa volta
+        # Métricas do rejoin
+        self.rejoins = 0           # Vezes que perguntei em vez de abrir eleição
+        self.rejoin_elections = 0  # Vezes que perguntei e mesmo assim precisei de eleição
+        # Número do passo atual (vem no argumento do TAG_STEP)
+        self.step_no = 0
+
+        self.alive = True
+        # Assume que o maior ID é o lider no começo
+        self.current_leader = self.size - 1 
+        # Época em que eu aceitei o lider atual (pra ignorar COORD velho)
+        self.leader_epoch = 0
+
+        # Estado inicial
+        self.my_state = self.STATE_NORMAL
+        self.patience_timer = 0
+        # Fila de ações pra executar (envia msg, inicia eleição...): pares
+        # (ACT_*, argumento). Deque porque sai sempre do começo.
+        self.action_queue = deque()
+        # Índices da fila pra não precisar varrer ela: quantas ações sem
+        # argumento de cada tipo estão esperando, e pros lotes, a lista de
+        # alvos que está na fila junto com um set dela (ver _queue_batch)
+        self.planned = [0] * self.ACT_COUNT
+        self.batches = {}
+        # Caixa de entrada pra guardar mensagens que chegam fora de hora
+        self.mailbox = deque()
+        # Mensagens que eu tenho que repassar na difusão em árvore:
+        # (tag, (época, estado, origem), sub_lo, sub_hi, quem me entregou)
+        self.relays = []
+
+        # Época da eleição: aumenta a cada eleição que eu começo ou fico sabendo
+        self.epoch = 0
+        # Buffer de saída reusado nos envios bloqueantes (ver MSG_*)
+        self.out = new_msg()
+        # Envios não bloqueantes ainda em andamento (ELECTION, PING)
+        self.sends = RequestPool(comm)
+        # Contadores por tag, filas e tempo dos passos (ver metricas.py)
+        self.metrics = Metrics()
+
+        # Frame de telemetria do passo atual (ver FRAME_*)
+        self.frame_label = LBL_NONE
+        self.frame_arrows = array('i')
+        self.frame_sent = 0
+        self.frame_suspect = -1
+        # Último (lider, estado) que o maestro ficou sabendo
+        self.last_report = None
+        # Quadro de estado no rank 0 (--board, ver transporte.py). Com ele a
+        # minha linha é atualizada a cada frame e o TAG_STATUS nem é mandado.
+        self.board = board
+        self.board_row = array('i', [0]) * BOARD_WIDTH
+        self.board_row[BOARD_SUSPECT] = -1
+        # Custo de subir o processo (ver metricas.process_usage); no --sim fica None
+        self.startup = None
+
+        # Anotações da fase A pra estratégia de eleição (zeradas a cada passo)
+        self.oks_to_send = []
+        self.trigger_election = False
+        self.reassert_to = []
+        self.claim = False
+
+    # Funçãozinha pra facilitar mudar o texto da interface.
+    # Só guarda no frame, quem vale é o último do passo.
+    def update_status_gui(self, label):
+        self.frame_label = label
+
+    # Guarda uma seta pra interface desenhar
+    def draw(self, target, arrow_type):
+        self.frame_arrows.append(target)
+        self.frame_arrows.append(arrow_type)
+
+    # Preenche o buffer de saída com meus dados no formato MSG_*
+    def _fill(self, buf, arg):
+        buf[MSG_EPOCH] = self.epoch
+        buf[MSG_STATE] = self.my_state
+        buf[MSG_ORIGIN] = self.rank
+        buf[MSG_ARG] = arg
+        buf[MSG_SPAN_LO] = 0
+        buf[MSG_SPAN_HI] = 0
+        return buf
+
+    # Manda uma mensagem do protocolo (bloqueante, reusa o buffer)
+    def send_msg(self, dest, tag, arg=0):
+        self.comm.Send(self._fill(self.out, arg), dest=dest, tag=tag)
+        self.frame_sent += 1
+        self.metrics.sent[tag] += 1
+
+    # Versão não bloqueante: cada envio precisa do próprio buffer,
+    # que fica guardado no pool até o envio terminar
+    def isend_msg(self, dest, tag, arg=0):
+        self.sends.isend(self._fill(new_msg(), arg), dest, tag)
+        self.frame_sent += 1
+        self.metrics.sent[tag] += 1
+
+    # Repassa a mensagem de outro (época, estado e origem dele) pedindo pra
+    # quem recebe repassar pra faixa [lo, hi). Usado pela difusão em árvore.
+    def relay_msg(self, dest, tag, fields, lo, hi, nonblocking=False):
+        buf = new_msg() if nonblocking else self.out
+        buf[MSG_EPOCH], buf[MSG_STATE], buf[MSG_ORIGIN] = fields
+        buf[MSG_ARG] = 0
+        buf[MSG_SPAN_LO] = lo
+        buf[MSG_SPAN_HI] = hi
+        if nonblocking: self.sends.isend(buf, dest, tag)
+        else: self.comm.Send(buf, dest=dest, tag=tag)
+        self.frame_sent += 1
+        self.metrics.sent[tag] += 1
+
+    # Manda tudo que juntou pro maestro numa mensagem só e zera o frame.
+    # Com o quadro de estado só a confirmação do passo vira mensagem (ela
+    # leva as setas pra tela); o resto o maestro lê da tabela.
+    def flush_frame(self, tag):
+        if self.board is not None: self.publish()
+        if self.board is None or tag != TAG_STATUS:
+            frame = array('i', (self.frame_label, self.current_leader, self.my_state,
+                                self.frame_sent, self.frame_suspect, len(self.frame_arrows) // 2))
+            frame.extend(self.frame_arrows)
+            self.comm.Send(frame, dest=0, tag=tag)
+            self.metrics.sent[tag] += 1
+        self.last_report = (self.current_leader, self.my_state)
+        self.frame_label = LBL_NONE
+        self.frame_sent = 0
+        self.frame_suspect = -1
+        del self.frame_arrows[:]
+
+    # Escreve a minha linha no quadro de estado com o que juntou no frame
+    # (ver BOARD_*). Os contadores só somam; o maestro faz a diferença.
+    def publish(self):
+        row = self.board_row
+        row[BOARD_VERSION] += 1
+        row[BOARD_ALIVE] = self.alive
+        if self.frame_label != LBL_NONE: row[BOARD_LABEL] = self.frame_label
+        row[BOARD_LEADER] = self.current_leader
+        row[BOARD_STATE] = self.my_state
+        row[BOARD_EPOCH] = self.epoch
+        row[BOARD_SENT] += self.frame_sent
+        row[BOARD_PINGS] += self.frame_arrows[1::2].count(ARROW_PING)
+        if self.frame_suspect != -1:
+            row[BOARD_SUSPICIONS] += 1
+            row[BOARD_SUSPECT] = self.frame_suspect
+        self.board.publish(row)
 
     # Já avisa a interface quem sou eu no começo
-    if rank == current_leader: update_status_gui("LÍDER")
-    else: update_status_gui("Normal")
-    comm.Barrier()
-    # Loop principal do processo
-    while True:
-        status = MPI.Status()
-        # TRAVA AQUI: Espera chegar qualquer mensagem pra continuar
-        msg = comm.recv(source=MPI.ANY_SOURCE, tag=MPI.ANY_TAG, status=status)
-        tag = status.Get_tag()
-        source = status.Get_source()
+    def start(self):
+        if self.rank == self.current_leader: self.update_status_gui(LBL_LEADER)
+        else: self.update_status_gui(LBL_NORMAL)
+        self.flush_frame(TAG_STATUS)
+
+    # Processa UMA mensagem que chegou.
+    # Devolve False quando é hora de fechar o programa.
+    def handle(self, msg, tag, source):
+        comm = self.comm
+        rank = self.rank
+        size = self.size
+        self.metrics.received[tag] += 1
+
+        # O maestro quer as métricas (vale até morto, é só telemetria)
+        if tag == TAG_METRICS:
+            comm.send(self.report(), dest=0, tag=TAG_METRICS)
+            return True
 
         # 1. ORDEM DE MORTE
         # Se mandaram morrer, desliga a flag e avisa interface
         if tag == TAG_KILL:
-            if msg == "EXIT": break # Fecha o programa
-            if msg == "DIE":
-                alive = False
-                comm.send("DIED", dest=0, tag=TAG_STATUS)
+            if msg[MSG_ARG] == KILL_EXIT:
+                # Termina os envios pendentes antes de fechar o programa
+                self.sends.waitall()
+                return False
+            if msg[MSG_ARG] == KILL_DIE:
+                self.alive = False
+                self.update_status_gui(LBL_DEAD)
+                self.flush_frame(TAG_STATUS)
         
         # 2. ORDEM DE REVIVER
         # Única coisa que processa se estiver morto
         if tag == TAG_REVIVE:
-            alive = True
+            self.alive = True
             # Reseta tudo pra estado inicial
-            my_state = STATE_NORMAL
-            action_queue = []
-            mailbox = []
-            waiting_pong = False
+            self.my_state = self.STATE_NORMAL
+            self._clear_actions()
+            self.mailbox.clear()
+            self.relays = []
+            self.fanout.reset()
+            self.detector.reset()
             
-            # Truque: não sei quem é lider, então vou forçar eleição
-            current_leader = -1 
+            # Não sei quem é lider (mas lembro quem era antes de morrer)
+            last_leader = self.current_leader
+            self.current_leader = -1 
             
             # Avisa que voltou
-            comm.send("REVIVED", dest=0, tag=TAG_STATUS)
-            # Agenda eleição na hora
-            action_queue.append(("START_ELECTION", None))
+            self.update_status_gui(LBL_REVIVING)
+            self.flush_frame(TAG_STATUS)
+            # Sou o maior de todos: vou ganhar de qualquer jeito, nem pergunto
+            if self.rejoin == "ask" and rank < size - 1:
+                self.schedule(self.ACT_ASK_LEADER, self._rejoin_targets(last_leader))
+            else:
+                # Jeito original: agenda eleição na hora
+                self.schedule(self.ACT_START_ELECTION)
 
         # Se ta morto, ignora o resto e volta pro topo esperar msg
-        if not alive: continue
+        if not self.alive: return True
 
         # Guarda mensagens de jogo na caixa de correio pra ler depois
-        if tag in [TAG_ELECTION, TAG_OK, TAG_PING, TAG_PONG, TAG_COORD]:
-            mailbox.append((tag, source))
+        if tag in MAILBOX_TAGS:
+            self.mailbox.append((tag, msg[MSG_ORIGIN], msg[MSG_EPOCH], msg[MSG_ARG]))
+            # Veio com faixa: sou repetidor da difusão em árvore
+            if msg[MSG_SPAN_HI] > msg[MSG_SPAN_LO]:
+                self.relays.append((tag, (msg[MSG_EPOCH], msg[MSG_STATE], msg[MSG_ORIGIN]),
+                                    msg[MSG_SPAN_LO], msg[MSG_SPAN_HI], source))
+            # Fico sabendo de eleições mais novas pela época de quem mandou
+            if msg[MSG_EPOCH] > self.epoch: self.epoch = msg[MSG_EPOCH]
             # Se tem agito na rede, para de fiscalizar o lider por um tempo
-            if tag in [TAG_ELECTION, TAG_OK, TAG_COORD]:
-                heartbeat_cooldown = 10 
-                waiting_pong = False
+            if tag in ACTIVITY_TAGS:
+                self.detector.on_activity(self)
+
+        # Um filho da árvore confirmou que pegou a mensagem pra repassar
+        if tag == TAG_RELAY_ACK:
+            self.fanout.on_ack(self, source)
 
         # Se chegou a ordem de dar um passo
         if tag == TAG_STEP:
-            received_pong = False
-            
-            oks_to_send = []
-            trigger_election = False
+            self.step_no = msg[MSG_ARG]
+            self._timed_step()
+            # Confirma pro maestro que o passo acabou, junto com tudo que aconteceu nele
+            self.flush_frame(TAG_STEP_DONE)
+        return True
+
+    # Modo assíncrono: o passo vem do relógio do próprio worker, não do
+    # maestro. Ninguém espera confirmação, então só manda frame se tiver
+    # alguma coisa pra contar (seta, mensagem, suspeita ou mudou de lider/estado).
+    def tick(self, step_no):
+        if not self.alive: return
+        self.step_no = step_no
+        self._timed_step()
+        if (self.frame_label != LBL_NONE or self.frame_sent or self.frame_arrows or self.frame_suspect != -1
+                or self.last_report != (self.current_leader, self.my_state)):
+            self.flush_frame(TAG_STATUS)
+
+    # Um passo cronometrado. No fim solta de uma vez os envios não
+    # bloqueantes que já terminaram.
+    def _timed_step(self):
+        started = time.perf_counter_ns()
+        self.step()
+        self.sends.progress()
+        self.metrics.on_step(time.perf_counter_ns() - started)
+
+    # Tudo que esse worker mediu, num dict só (vai pro maestro com TAG_METRICS)
+    def report(self):
+        report = {'rank': self.rank, 'alive': self.alive, 'leader': self.current_leader}
+        report.update(self.metrics.stats())
+        report.update({
+            'election': self.election.stats(),
+            'fanout': self.fanout.stats(),
+            'detector': self.detector.stats(),
+            'sends': self.sends.stats(),
+            'rejoins': self.rejoins,
+            'rejoin_elections': self.rejoin_elections,
+            'startup': self.startup,
+        })
+        return report
+
+    # Agenda uma ação (ACT_*) no fim da fila
+    def schedule(self, action, arg=None):
+        self.action_queue.append((action, arg))
+        if arg is None: self.planned[action] += 1
+
+    # Mesma coisa, mas só se não tiver uma igual (sem argumento) esperando
+    def schedule_once(self, action):
+        if not self.planned[action]: self.schedule(action)
+
+    # Esvazia a fila e os índices dela
+    def _clear_actions(self):
+        self.action_queue.clear()
+        self.planned = [0] * self.ACT_COUNT
+        self.batches.clear()
+
+    # Agenda uma ação com lista de alvos. Se já tem uma igual esperando na
+    # fila, junta os alvos nela em vez de criar outra (com a difusão em árvore
+    # os ELECTION chegam espalhados em vários passos e a fila só crescia).
+    # O set do lote diz na hora quem já está nele.
+    def _queue_batch(self, action, targets):
+        batch = self.batches.get(action)
+        if batch is not None:
+            queued, seen = batch
+            for t in targets:
+                if t not in seen:
+                    seen.add(t)
+                    queued.append(t)
+            return
+        self.batches[action] = (targets, set(targets))
+        self.action_queue.append((action, targets))
+
+    # Tira a próxima ação da fila, mantendo os índices em dia
+    def _next_action(self):
+        action, arg = self.action_queue.popleft()
+        if arg is None:
+            self.planned[action] -= 1
+        else:
+            batch = self.batches.get(action)
+            if batch is not None and batch[0] is arg: del self.batches[action]
+        return action, arg
+
+    # Um passo da simulação: lê a caixa, executa uma ação ou cuida dos timers
+    def step(self):
+        rank = self.rank
+        mailbox = self.mailbox
+
+        oks_to_send = self.oks_to_send = []
+        self.trigger_election = False
+        reassert_to = self.reassert_to = []
+        self.claim = False
+        mailbox_depth = len(mailbox)
+        
+        # --- FASE A: LER CAIXA DE CORREIO ---
+        # Processa tudo que chegou desde o ultimo passo
+        while mailbox:
+            m_tag, m_source, m_epoch, m_arg = mailbox.popleft()
             
-            # --- FASE A: LER CAIXA DE CORREIO ---
-            # Processa tudo que chegou desde o ultimo passo
-            while mailbox:
-                m_tag, m_source = mailbox.pop(0)
-                
-                # Se alguém virou lider
-                if m_tag == TAG_COORD:
-                    current_leader = m_source
-                    my_state = STATE_NORMAL
-                    patience_timer = 0
-                    waiting_pong = False
-                    action_queue.clear() # Limpa pendencias, paz reinou
-                    
-                    if rank == current_leader: update_status_gui("LÍDER")
-                    else: update_status_gui("Normal")
-                    heartbeat_cooldown = 1 # Da um tempinho pro novo lider respirar
-                
-                # Se recebi OK (alguem maior ta vivo)
-                elif m_tag == TAG_OK:
-                    if my_state == STATE_ELECTION:
-                        my_state = STATE_WAITING # Paro de tentar ser lider
-                        patience_timer = 0
-                        update_status_gui("Aguardando...")
+            # Se alguém virou lider
+            if m_tag == TAG_COORD:
+                # COORD de alguém menor que o meu lider só vale se for de uma
+                # época mais nova. Senão é um anúncio velho que chegou atrasado.
+                if m_source < self.current_leader and m_epoch <= self.leader_epoch:
+                    continue
+                self.current_leader = m_source
+                self.leader_epoch = max(self.epoch, m_epoch)
+                self.my_state = self.STATE_NORMAL
+                self.patience_timer = 0
+                self.rejoin_timer = 0
+                self._clear_actions() # Limpa pendencias, paz reinou
+                # ELECTION que li antes desse COORD no mesmo passo não pede mais
+                # eleição: o lider também recebeu e reafirma pra quem pediu
+                self.trigger_election = False
                 
-                # Se alguém pediu eleição
-                elif m_tag == TAG_ELECTION:
-                    # Guarda pra responder OK depois tudo junto
-                    oks_to_send.append(m_source)
-                    # Se eu to de boa e não sou lider, entro na briga tbm
-                    if (my_state == STATE_NORMAL or my_state == STATE_WAITING):
-                         if rank != current_leader:
-                             trigger_election = True
-                
-                # Se recebi Ping (só acontece se eu for lider e tiver vivo)
-                elif m_tag == TAG_PING:
-                    if alive: action_queue.append( ("SEND_PONG", m_source) )
-                
-                # Se recebi Pong (resposta do lider)
-                elif m_tag == TAG_PONG:
-                    received_pong = True
-
-            # --- PREPARAR AÇÕES ---
-            # Se tenho OKs pra mandar, agendo envio em lote
-            if oks_to_send:
-                action_queue.append( ("SEND_OK_BATCH", oks_to_send) )
+                if rank == self.current_leader: self.update_status_gui(LBL_LEADER)
+                else: self.update_status_gui(LBL_NORMAL)
+                self.detector.on_new_leader(self)
+                self.election.on_coord(self, m_source)
+                # Alguém menor que eu se achou lider: eu to vivo, então brigo
+                if m_source < rank: self.trigger_election = True
             
-            # Se preciso iniciar eleição, agendo (sem duplicar)
-            if trigger_election:
-                 already_planned = False
-                 for a in action_queue: 
-                     if a[0] == "START_ELECTION": already_planned = True
-                 if not already_planned:
-                     action_queue.append( ("START_ELECTION", None) )
-
-            # --- FASE B: EXECUTAR AÇÃO ---
-            # Executa UMA ação da fila por vez pro visual ficar passo-a-passo
-            if action_queue:
-                action_tuple = action_queue.pop(0)
-                action_type = action_tuple[0]
-                
-                # Manda OK pra todo mundo da lista
-                if action_type == "SEND_OK_BATCH":
-                    targets = action_tuple[1]
-                    for t in targets:
-                        comm.send(("DRAW", t, "OK"), dest=0, tag=TAG_STATUS)
-                        comm.send("OK", dest=t, tag=TAG_OK)
-                
-                # Manda Pong de volta
-                elif action_type == "SEND_PONG":
-                    target = action_tuple[1]
-                    comm.send(("DRAW", target, "PONG"), dest=0, tag=TAG_STATUS)
-                    comm.send("PONG", dest=target, tag=TAG_PONG)
-
-                # Começa minha eleição
-                elif action_type == "START_ELECTION":
-                    if my_state != STATE_ELECTION:
-                        my_state = STATE_ELECTION
-                        patience_timer = 3 # Espero 1 rodada
-                        update_status_gui("Eleição") 
-                        
-                        # Manda eleição pra todo mundo maior que eu
-                        sent_to_anyone = False
-                        for t in range(rank + 1, size):
-                            comm.send(("DRAW", t, "ELECTION"), dest=0, tag=TAG_STATUS)
-                            comm.isend("ELECTION", dest=t, tag=TAG_ELECTION)
-                            sent_to_anyone = True
-                        
-                        # Se não tem ninguem maior, ganho na hora
-                        if not sent_to_anyone: patience_timer = 0 
+            # Se recebi OK (alguem maior ta vivo)
+            elif m_tag == TAG_OK:
+                self.election.on_ok(self, m_source)
             
-            # --- FASE C: LÓGICA DE ESTADO ---
-            else:
-                # 1. Lógica de Timeout da Eleição
-                if my_state == STATE_ELECTION:
-                    if patience_timer > 0:
-                        patience_timer -= 1 # Espera...
-                    else:
-                        # Ganhei! Sou o novo Lider
-                        current_leader = rank
-                        update_status_gui("LÍDER")
-                        # Aviso todo mundo
-                        for t in range(1, size):
-                            if t != rank:
-                                comm.send(("DRAW", t, "COORD"), dest=0, tag=TAG_STATUS)
-                                comm.send("COORD", dest=t, tag=TAG_COORD)
-                        my_state = STATE_NORMAL
-
-                # 2. Heartbeat (Só o Processo 1 faz isso)
-                if rank == 1 and my_state == STATE_NORMAL and current_leader != rank and current_leader != -1:
-                    # Se tiver em cooldown, espera
-                    if heartbeat_cooldown > 0:
-                        heartbeat_cooldown -= 1
-                    else:
-                        # Se estava esperando resposta...
-                        if waiting_pong:
-                            if received_pong:
-                                # Recebeu! Tudo certo.
-                                waiting_pong = False
-                                update_status_gui("Normal")
-                                check_counter = 1
-                            else:
-                                # Não recebeu. Espera mais um pouco pela latencia?
-                                if ping_wait_timer > 0:
-                                    ping_wait_timer -= 1
-                                else:
-                                    # Desistiu. Lider morreu. Inicia eleição.
-                                    waiting_pong = False
-                                    action_queue.append(("START_ELECTION", None))
-                        else:
-                            # Hora de checar?
-                            if check_counter > 0:
-                                check_counter -= 1
-                            else:
-                                # Manda o Ping
-                                update_status_gui("Checando...")
-                                comm.send(("DRAW", current_leader, "PING"), dest=0, tag=TAG_STATUS)
-                                comm.isend("PING", dest=current_leader, tag=TAG_PING)
-                                waiting_pong = True
-                                ping_wait_timer = 1
+            # Se alguém pediu eleição, a estratégia decide o que responder
+            elif m_tag == TAG_ELECTION:
+                self.election.on_election(self, m_source, m_epoch)
+            
+            # Se recebi Ping (só acontece se eu for lider e tiver vivo)
+            elif m_tag == TAG_PING:
+                if self.alive: self.schedule(self.ACT_SEND_PONG, m_source)
+            
+            # Se recebi Pong (resposta do lider)
+            elif m_tag == TAG_PONG:
+                self.detector.on_pong(self, m_source)
+
+            # Alguém que reviveu quer saber quem é o lider
+            elif m_tag == TAG_WHO_IS_LEADER:
+                self._queue_batch(self.ACT_SEND_LEADER_INFO, [m_source])
+
+            # Resposta da minha pergunta (só vale a primeira)
+            elif m_tag == TAG_LEADER_INFO:
+                if self.rejoin_timer and self.current_leader == -1:
+                    self._rejoin_with(m_arg, m_epoch)
+
+        # Difusão em árvore: repasso o que recebi com faixa e cubro os filhos
+        # que não confirmaram (não conta como a ação do passo)
+        for r_tag, r_fields, r_lo, r_hi, r_parent in self.relays:
+            self.fanout.relay(self, r_tag, r_fields, r_lo, r_hi, r_parent, RELAY_ARROWS[r_tag])
+        del self.relays[:]
+        self.fanout.tick(self)
+
+        # --- PREPARAR AÇÕES ---
+        # Se tenho OKs pra mandar, agendo envio em lote
+        if oks_to_send:
+            self._queue_batch(self.ACT_SEND_OK_BATCH, oks_to_send)
+        
+        # Se sou lider e alguém duvidou, reafirmo com COORD só pra ele
+        if reassert_to:
+            self._queue_batch(self.ACT_ANNOUNCE, reassert_to)
+
+        # Se a estratégia mandou eu me declarar lider, agendo (sem duplicar)
+        if self.claim:
+            self.schedule_once(self.ACT_ANNOUNCE)
+
+        # Se preciso iniciar eleição, agendo (sem duplicar)
+        if self.trigger_election:
+            self.schedule_once(self.ACT_START_ELECTION)
+
+        self.metrics.on_queues(mailbox_depth, len(self.action_queue))
+
+        # --- FASE B: EXECUTAR AÇÃO ---
+        # Executa UMA ação da fila por vez pro visual ficar passo-a-passo
+        action = None
+        if self.action_queue:
+            action, arg = self._next_action()
+            self.ACTIONS[action](self, arg)
+        
+        # --- FASE C: LÓGICA DE ESTADO ---
+        # 1. Timeouts da eleição (esperando OK ou esperando COORD).
+        # Só responder (OK/PONG/LEADER_INFO) não segura o relógio: senão quem
+        # recebe ELECTION ou WHO_IS_LEADER todo passo (o maior vivo, numa
+        # tempestade) nunca se anuncia.
+        if action is None or action in self.REPLY_ACTIONS:
+            self.election.on_tick(self)
+
+        # 2. Vigia do lider (ver vigia.py), só quando não teve ação nenhuma
+        if action is None:
+            self.detector.on_tick(self)
+
+        # 3. Esperando resposta do rejoin: se ninguém responder, eleição.
+        if self.rejoin_timer and action != self.ACT_ASK_LEADER:
+            self.rejoin_timer -= 1
+            if not self.rejoin_timer:
+                self.rejoin_elections += 1
+                self.schedule(self.ACT_START_ELECTION)
+
+    # --- AÇÕES (uma por passo, ver fase B) ---
+    # Manda OK pra todo mundo da lista
+    def _send_ok_batch(self, targets):
+        for t in targets:
+            self.election.send(self, t, TAG_OK, ARROW_OK)
+
+    # Manda Pong de volta
+    def _send_pong(self, target):
+        self.draw(target, ARROW_PONG)
+        self.send_msg(target, TAG_PONG)
+
+    # Respondo quem é o lider, se eu souber (se estou no meio de
+    # uma eleição fico quieto: quem perguntou dá timeout e entra nela)
+    def _send_leader_info(self, targets):
+        if self.my_state == self.STATE_NORMAL and self.current_leader != -1:
+            for t in targets:
+                self.draw(t, ARROW_INFO)
+                self.send_msg(t, TAG_LEADER_INFO, self.current_leader)
+
+    # Acabei de reviver: pergunto quem é o lider pra todos os escolhidos
+    # de uma vez (ver _rejoin_targets). Vale a primeira resposta.
+    def _ask_leader(self, targets):
+        self.rejoins += 1
+        self.rejoin_asked = targets
+        self.rejoin_timer = self.rejoin_timeout
+        for t in targets:
+            self.draw(t, ARROW_WHO)
+            self.send_msg(t, TAG_WHO_IS_LEADER)
+
+    # Começa minha eleição (do jeito da estratégia)
+    def _start_election(self, _):
+        self.election.start(self)
+
+    # Me anuncio lider (pra todo mundo ou só pra quem duvidou)
+    def _announce(self, targets):
+        self.election.announce(self, targets)
+
+    # Tabela de despacho: ACT_* -> função
+    ACTIONS = (_send_ok_batch, _send_pong, _send_leader_info, _ask_leader, _start_election, _announce)
+
+    # Pra quem perguntar no rejoin (até rejoin_peers): primeiro o lider que
+    # eu conhecia antes de morrer, depois os vizinhos logo abaixo de mim.
+    # Do maior pro menor não serve: quem morre e fica morto é justamente o
+    # lider de cada vez, então os ranks do topo são os mais prováveis de
+    # estar mortos. Qualquer vivo fora de eleição sabe quem é o lider.
+    def _rejoin_targets(self, last_leader):
+        targets = [last_leader] if 1 <= last_leader < self.size and last_leader != self.rank else []
+        for r in itertools.chain(range(self.rank - 1, 0, -1), range(self.rank + 1, self.size)):
+            if len(targets) >= self.rejoin_peers: break
+            if r != last_leader: targets.append(r)
+        return targets
+
+    # Alguém me contou quem é o lider depois que eu revivi
+    def _rejoin_with(self, leader, epoch):
+        self.rejoin_timer = 0
+        if leader == self.rank:
+            # Ninguém percebeu que eu caí: o lugar continua meu, mas anuncio
+            # de novo (mandato novo) pra quem já estava desconfiando
+            self.schedule_once(self.ACT_ANNOUNCE)
+            return
+        if leader < self.rank:
+            # Sou maior que o lider: pelo valentão o lugar é meu
+            self.rejoin_elections += 1
+            self.schedule(self.ACT_START_ELECTION)
+            return
+        # Lider maior que eu: só aceito, sem eleição nenhuma
+        self.current_leader = leader
+        self.leader_epoch = max(self.epoch, epoch)
+        self.my_state = self.STATE_NORMAL
+        self.update_status_gui(LBL_NORMAL)
+        self.detector.on_new_leader(self)
+        self.election.on_coord(self, leader)
+
+# Jeitos de voltar depois de reviver (ver Worker.rejoin)
+REJOINS = ("ask", "election")
+
+# Seta de cada tipo de mensagem que pode ser repassada na árvore
+RELAY_ARROWS = {TAG_ELECTION: ARROW_ELECTION, TAG_COORD: ARROW_COORD}
+
+# Loop do worker no MPI: trava esperando mensagem e repassa pro Worker
+def run_worker(comm, election="bully", fanout="direct", detector="single", detector_opts=None,
+               election_opts=None, rejoin="ask", board=None):
+    worker = Worker(comm, make_election(election, **(election_opts or {})), fanout,
+                    make_detector(detector, **(detector_opts or {})), rejoin, board=board)
+    worker.start()
+    # Pronto: quanto custou chegar até aqui (vai no relatório das métricas)
+    worker.startup = process_usage()
+    comm.barrier()
+    # Buffer de entrada reusado em todas as mensagens (formato MSG_*)
+    buf = new_msg()
+    # Loop principal do processo
+    while True:
+        # TRAVA AQUI: Espera chegar qualquer mensagem pra continuar
+        source, tag = comm.Recv(buf)
+        if not worker.handle(buf, tag, source): break
+
+# Loop do worker no modo assíncrono (só MPI): ninguém manda TAG_STEP.
+# O worker fica lendo a rede sem travar e dá um passo a cada tick_ms de
+# relógio (time.monotonic). Os timeouts continuam contados em passos, mas
+# agora cada passo tem duração fixa, então dá pra configurar tudo em ms
+# (ver ms_to_ticks). Se o processo atrasar, os passos perdidos são pulados
+# em vez de rodar vários seguidos pra compensar.
+def run_worker_async(comm, election="bully", fanout="direct", detector="single", detector_opts=None,
+                     election_opts=None, rejoin="ask", tick_ms=5.0, board=None):
+    worker = Worker(comm, make_election(election, **(election_opts or {})), fanout,
+                    make_detector(detector, **(detector_opts or {})), rejoin, board=board)
+    worker.start()
+    # Pronto: quanto custou chegar até aqui (vai no relatório das métricas)
+    worker.startup = process_usage()
+    comm.barrier()
+    started = time.monotonic()
+    period = tick_ms / 1000.0
+    step_no = 0
+    buf = new_msg()
+    req = comm.Irecv(buf)
+    while True:
+        # Lê tudo que já chegou, sem travar
+        done, status = req.test()
+        while done:
+            source, tag = status
+            # Quem manda o passo é o relógio: TAG_STEP (botão da tela) é ignorado
+            if tag != TAG_STEP and not worker.handle(buf, tag, source): return
+            req = comm.Irecv(buf)
+            done, status = req.test()
+
+        # Deu a hora do próximo passo?
+        now = time.monotonic() - started
+        due = int(now / period)
+        if due > step_no:
+            step_no = due
+            worker.tick(step_no)
+        else:
+            # Dorme um pouquinho pra não fritar a CPU, sem passar da hora do passo
+            time.sleep(min(0.0005, (step_no + 1) * period - now))
+
+# Converte um tempo em ms pra passos do modo assíncrono (no mínimo 1)
+def ms_to_ticks(ms, tick_ms):
+    return max(1, math.ceil(ms / tick_ms))
+
+# Na rede simulada a mensagem chega como bytes: vira uma "view" de int
+# (sem copiar) antes de ir pro Worker, igual ao buffer do Recv no MPI.
+# No modo assíncrono quem manda o passo é o relógio: TAG_STEP é ignorado.
+def _sim_handler(worker, ignore_step=False):
+    def handler(data, tag, source):
+        if ignore_step and tag == TAG_STEP: return True
+        return worker.handle(memoryview(data).cast('i'), tag, source)
+    return handler
+
+# Loop de um processo MPI que hospeda um bloco de nós virtuais (--virtual).
+# Cada nó do bloco vira um Worker ligado na rede virtual; mensagem entre
+# eles fica na fila local e só a que vai pra fora passa pelo MPI.
+# No modo passo a passo trava no MPI só quando a fila local esvazia; no
+# assíncrono dá um passo em todos os workers a cada tick_ms.
+def run_host(network, election="bully", fanout="direct", detector="single", detector_opts=None,
+             election_opts=None, rejoin="ask", board=None, async_mode=False, tick_ms=5.0):
+    workers = {}
+    for r in range(network.lo, network.hi):
+        worker = Worker(network.endpoint(r), make_election(election, **(election_opts or {})), fanout,
+                        make_detector(detector, **(detector_opts or {})), rejoin,
+                        board=VirtualBoard(board, r) if board is not None else None)
+        workers[r] = worker
+        network.attach(r, _sim_handler(worker, ignore_step=async_mode))
+    for worker in workers.values():
+        worker.start()
+    startup = process_usage()
+    for worker in workers.values(): worker.startup = startup
+    network.mpi.barrier()
+    if not async_mode:
+        while network.handlers: network.pump_one()
+        return
+    started = time.monotonic()
+    period = tick_ms / 1000.0
+    step_no = 0
+    while network.handlers:
+        network.run_until_idle()
+        now = time.monotonic() - started
+        due = int(now / period)
+        if due > step_no:
+            step_no = due
+            # Só quem ainda não saiu (KILL_EXIT tira o handler)
+            for r in list(network.handlers): workers[r].tick(step_no)
+        else:
+            time.sleep(min(0.0005, (step_no + 1) * period - now))
+
+# Monta um cluster inteiro dentro deste processo.
+# Os ranks 1..N-1 viram objetos Worker ligados na rede simulada
+# e o rank 0 fica livre pro maestro usar. Devolve (rede, workers).
+def build_sim_cluster(size, worker_cls=None, election="bully", fanout="direct",
+                      detector="single", detector_opts=None, election_opts=None, rejoin="ask", board=False,
+                      model=None):
+    worker_cls = worker_cls or Worker
+    network = SimNetwork(size)
+    # Latência, perda e partição entre os workers (ver rede.py)
+    network.model = model
+    workers = {}
+    for r in range(1, size):
+        endpoint = network.endpoint(r)
+        # Cada worker tem o próprio vigia (o estado dele é por processo)
+        worker = worker_cls(endpoint, make_election(election, **(election_opts or {})), fanout,
+                            make_detector(detector, **(detector_opts or {})), rejoin,
+                            board=endpoint.state_board(BOARD_WIDTH) if board else None)
+        workers[r] = worker
+        network.attach(r, _sim_handler(worker))
+    for worker in workers.values():
+        worker.start()
+    return network, workers
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Algoritmo do Valentão")
+    parser.add_argument("--sim", type=int, metavar="N", default=0,
+                        help="roda N ranks simulados num processo só (sem MPI)")
+    parser.add_argument("--virtual", type=int, metavar="N", default=0,
+                        help="N nós virtuais (maestro + N-1 workers, igual ao --sim e ao mpiexec -n) "
+                             "repartidos em blocos entre os processos MPI 1..P-1 "
+                             "(vários nós por processo, mensagem local não passa pelo MPI)")
+    parser.add_argument("--headless", action="store_true",
+                        help="maestro sem tela: avança os passos sozinho e mede a convergência")
+    parser.add_argument("--scenario", default="",
+                        help='roteiro do modo headless, ex: "kill:leader@5,revive:3@40"')
+    parser.add_argument("--max-steps", type=int, default=1000,
+                        help="limite de passos do modo headless")
+    parser.add_argument("--async", dest="async_mode", action="store_true",
+                        help="sem passo do maestro: cada worker anda no próprio relógio (só MPI). "
+                             "Os tempos (roteiro, --hb-*, --patience, --coord-timeout) viram ms")
+    parser.add_argument("--tick-ms", type=float, default=5.0,
+                        help="duração de um passo do worker no modo --async")
+    parser.add_argument("--max-ms", type=float, default=10000,
+                        help="limite de tempo do modo headless com --async")
+    parser.add_argument("--patience", type=int, metavar="PASSOS",
+                        help="quanto esperar OK antes de se declarar lider")
+    parser.add_argument("--coord-timeout", type=int, metavar="PASSOS",
+                        help="quanto esperar o COORD depois de receber OK")
+    parser.add_argument("--election", default="bully", choices=sorted(ELECTIONS),
+                        help="estratégia de eleição dos workers")
+    parser.add_argument("--fanout", default="direct", choices=sorted(FANOUTS),
+                        help="como ELECTION/COORD se espalham: direto ou em árvore (O(log N) saltos)")
+    parser.add_argument("--detector", default="single", choices=sorted(DETECTORS),
+                        help="quem vigia o lider: só o rank 1 ou rodízio entre todos")
+    parser.add_argument("--hb-period", type=int, metavar="PASSOS",
+                        help="intervalo entre pings no lider")
+    parser.add_argument("--hb-timeout", type=int, metavar="PASSOS",
+                        help="quanto esperar o PONG antes de desconfiar do lider")
+    parser.add_argument("--hb-cooldown", type=int, metavar="PASSOS",
+                        help="silêncio do vigia depois de ver ELECTION/OK/COORD")
+    parser.add_argument("--hb-leader-cooldown", type=int, metavar="PASSOS",
+                        help="silêncio do vigia depois de conhecer um lider novo")
+    parser.add_argument("--hb-monitors", type=int, metavar="K",
+                        help="vigias por rodada (--detector rotating)")
+    parser.add_argument("--metrics", metavar="ARQUIVO",
+                        help="no fim junta as métricas de todos os workers no rank 0 (.json ou .csv)")
+    parser.add_argument("--trace", metavar="ARQUIVO",
+                        help="grava tudo que o maestro vê num rastro binário (rever com: python rastro.py ARQUIVO)")
+    parser.add_argument("--board", action="store_true",
+                        help="workers publicam o estado numa janela RMA do rank 0 (MPI.Win) que o maestro "
+                             "lê com um Get só, em vez de mandar TAG_STATUS a cada mudança")
+    parser.add_argument("--layout", default="auto", choices=LAYOUTS,
+                        help="posição dos nós na tela: anel(éis) concêntrico(s) ou grade")
+    parser.add_argument("--profile", metavar="PASTA",
+                        help="roda cada rank com cProfile e salva PASTA/rank<N>.prof "
+                             "(no --sim é um arquivo só, com todos os workers)")
+    parser.add_argument("--rejoin", default="ask", choices=REJOINS,
+                        help="quem revive pergunta quem é o lider (ask) ou abre eleição na hora (election)")
+    # Modelo de rede entre os workers (ver rede.py), só com --sim ou --virtual
+    parser.add_argument("--latency", metavar="DIST",
+                        help='latência em passos: "3", "2-6" (uniforme), "exp:4", "normal:5:1.5"')
+    parser.add_argument("--link", action="append", default=[], metavar="A/B=DIST",
+                        help='latência entre dois grupos de nós, ex: "1-8/9-16=exp:6" (pode repetir)')
+    parser.add_argument("--drop", type=float, default=0.0, metavar="P",
+                        help="probabilidade de perder cada mensagem entre workers")
+    parser.add_argument("--partition", action="append", default=[], metavar="NÓS@INÍCIO-FIM",
+                        help='isola um grupo do resto por um tempo, ex: "1-8@20-60" (pode repetir)')
+    parser.add_argument("--net-seed", type=int, default=0, help="seed do sorteio de latência e perda")
+    return parser.parse_args(argv)
+
+# Modelo de rede da linha de comando; None se não pediu nada (rede perfeita).
+# Com --virtual cada processo sorteia os próprios envios: a seed leva o
+# rank junto, senão todos perdiam e atrasavam as mesmas mensagens.
+def network_model(args, host=None):
+    if args.latency is None and not args.link and not args.drop and not args.partition: return None
+    seed = args.net_seed if host is None else args.net_seed * 1000003 + host
+    return NetworkModel(args.latency or 1, args.drop, args.partition, args.link, seed)
+
+# Monta os parâmetros do vigia a partir da linha de comando (só os que vieram).
+# No modo --async os tempos vêm em ms e viram passos de tick_ms.
+def detector_options(args):
+    opts = {'period': args.hb_period, 'timeout': args.hb_timeout, 'cooldown': args.hb_cooldown,
+            'leader_cooldown': args.hb_leader_cooldown}
+    if args.async_mode: opts = _ms_options(opts, args.tick_ms)
+    if args.detector == "rotating": opts['monitors'] = args.hb_monitors
+    return {k: v for k, v in opts.items() if v is not None}
+
+# Mesma coisa pros timeouts da eleição
+def election_options(args):
+    opts = {'patience': args.patience, 'coord_timeout': args.coord_timeout}
+    if args.async_mode: opts = _ms_options(opts, args.tick_ms)
+    return {k: v for k, v in opts.items() if v is not None}
+
+def _ms_options(opts, tick_ms):
+    return {k: None if v is None else ms_to_ticks(v, tick_ms) for k, v in opts.items()}
 
 # Ponto de entrada do script
 if __name__ == "__main__":
-    if size < 2:
+    args = parse_args()
+    if args.sim and args.async_mode:
+        # O simulador não tem relógio: a rede só anda quando o maestro manda passo
+        print("Erro: --async precisa de MPI (não funciona com --sim)")
+        sys.exit(1)
+    if args.sim and args.virtual:
+        print("Erro: use --sim (tudo num processo) ou --virtual (blocos por processo MPI), não os dois")
+        sys.exit(1)
+    model = network_model(args)
+    if model is not None and (args.async_mode or not (args.sim or args.virtual)):
+        # O modelo conta o tempo nos passos do maestro e mora na rede simulada
+        print("Erro: --latency/--link/--drop/--partition só funcionam com --sim ou --virtual, sem --async")
+        sys.exit(1)
+    # Processo que hospeda nós virtuais (no processo 0 só mora o maestro)
+    host = None
+    if args.virtual:
+        host = VirtualNetwork(MPITransport(), args.virtual)
+        model = host.model = network_model(args, host.mpi.rank)
+        comm = host.endpoint(0) if host.mpi.rank == 0 else host.mpi
+    elif args.sim:
+        # Tudo em memória: o maestro é o rank 0 da rede simulada
+        network, workers = build_sim_cluster(args.sim, election=args.election, fanout=args.fanout,
+                                             detector=args.detector, detector_opts=detector_options(args),
+                                             election_opts=election_options(args), rejoin=args.rejoin,
+                                             board=args.board, model=model)
+        comm = network.endpoint(0)
+    else:
+        comm = MPITransport()
+    if comm.size < 2:
         print("Erro: Precisa de 2 processos")
         sys.exit(1)
-    if rank == 0: run_maestro() # Processo 0 vira tela
-    else: run_worker() # Outros viram workers
\ No newline at end of file
+    # Todo processo confere o roteiro antes da barreira, senão o maestro
+    # morre sozinho e os workers ficam presos nela
+    try:
+        parse_scenario(args.scenario, host.size if host is not None else comm.size)
+    except ValueError as e:
+        if comm.rank == 0: print(f"Erro: {e}")
+        sys.exit(1)
+    # Coletivo: todo mundo cria a janela junto, antes de se separar
+    state_board = (host or comm).state_board(BOARD_WIDTH) if args.board else None
+    with profiled(args.profile, comm.rank):
+        if comm.rank == 0:
+            if args.headless:
+                if args.async_mode:
+                    result = run_headless_async(comm, args.scenario, args.max_ms, metrics=bool(args.metrics),
+                                                trace_path=args.trace, state_board=state_board)
+                else:
+                    result = run_headless(comm, args.scenario, args.max_steps, metrics=bool(args.metrics),
+                                          trace_path=args.trace)
+                if model is not None and host is None: result['network'] = model.stats()
+                # Relatório de cada worker + o resumo do maestro
+                if args.metrics: write_metrics(args.metrics, result.pop('ranks'), result)
+            else: run_maestro(comm, args.metrics, args.trace, args.layout, state_board,
+                              args.async_mode) # Processo 0 vira tela
+        elif host is not None:
+            run_host(host, args.election, args.fanout, args.detector, detector_options(args),
+                     election_options(args), args.rejoin, state_board, args.async_mode, args.tick_ms)
+        elif args.async_mode:
+            run_worker_async(comm, args.election, args.fanout, args.detector, detector_options(args),
+                             election_options(args), args.rejoin, args.tick_ms, state_board)
+        else: run_worker(comm, args.election, args.fanout, args.detector, detector_options(args),
+                         election_options(args), args.rejoin, state_board) # Outros viram workers
+    if state_board is not None: state_board.free()
+    # Com --virtual cada processo tem o próprio modelo (decide quem manda)
+    if model is not None and (host is None or comm.rank > 0):
+        print(f"[Rede{'' if host is None else ' ' + str(comm.rank)}] {model.summary()}")
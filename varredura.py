@@ -0,0 +1,168 @@
+# ==========================================
+# VARREDURA DE PARÂMETROS
+# ==========================================
+# Pra achar os tempos certos pro tamanho do cluster sem editar constante e
+# rodar mpiexec na mão: monta a grade de todas as combinações pedidas,
+# roda cada uma no simulador (o mesmo run() do bench_cenarios.py, headless)
+# espalhando as rodadas num pool de processos, e junta por configuração:
+#   - convergência: em quantas rodadas convergiu e quantos passos levou
+#   - mensagens até convergir
+#   - alarmes falsos: fração das rodadas com pelo menos uma suspeita de
+#     lider vivo (= eleição à toa, o failover falso) e a média por rodada
+# Parâmetros varridos (lista separada por vírgula; sem lista = padrão da estratégia):
+#   --patience        espera pelo OK antes de se declarar lider (patience_timer)
+#   --coord-timeout   espera pelo COORD depois de um OK
+#   --hb-period       intervalo entre pings (check_counter)
+#   --hb-timeout      espera pelo PONG (ping_wait_timer)
+#   --hb-cooldown     silêncio depois de ELECTION/OK/COORD (heartbeat_cooldown)
+#   --hb-leader-cooldown  silêncio depois de conhecer lider novo
+# Cada rodada é independente, então com latência/perda (ver rede.py) vale
+# repetir com várias seeds (--seeds):
+#     python varredura.py --sizes 32,128 --patience 2,3,5 --hb-timeout 2,3,6 --latency exp:3 --seeds 5
+#     python varredura.py --sizes 64 --detector rotating --hb-period 2,4,8 --out varredura.csv
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import time
+
+from eleicao import ELECTIONS
+from difusao import FANOUTS
+from vigia import DETECTORS
+from bench_cenarios import SCENARIOS, run, metadata
+
+# Nome na linha de comando -> (qual estratégia, parâmetro dela)
+PARAMS = {
+    'patience': ('election', 'patience'),
+    'coord_timeout': ('election', 'coord_timeout'),
+    'hb_period': ('detector', 'period'),
+    'hb_timeout': ('detector', 'timeout'),
+    'hb_cooldown': ('detector', 'cooldown'),
+    'hb_leader_cooldown': ('detector', 'leader_cooldown'),
+}
+
+# Todas as combinações da grade, uma rodada por seed
+def grid(sizes, scenarios, elections, fanouts, detectors, latencies, drops, seeds, values, k=3, max_steps=1000):
+    names = [name for name in PARAMS if values.get(name)]
+    tasks = []
+    for combo in itertools.product(scenarios, elections, fanouts, detectors, latencies, drops, sizes,
+                                   *(values[name] for name in names)):
+        scenario, election, fanout, detector, latency, drop, n = combo[:7]
+        opts = {'election': {}, 'detector': {}}
+        for name, value in zip(names, combo[7:]):
+            strategy, key = PARAMS[name]
+            opts[strategy][key] = value
+        for seed in range(seeds):
+            tasks.append({'n': n, 'scenario': scenario, 'k': k, 'election': election, 'fanout': fanout,
+                          'detector': detector, 'max_steps': max_steps, 'latency': latency, 'drop': drop,
+                          'seed': seed, 'election_opts': opts['election'], 'detector_opts': opts['detector']})
+    return tasks
+
+# Roda dentro do pool (precisa ser função do módulo pra ir por pickle)
+def _run_task(task):
+    return run(**task)
+
+def sweep(tasks, jobs=None):
+    if jobs == 1: return [_run_task(t) for t in tasks]
+    with multiprocessing.Pool(jobs) as pool:
+        return list(pool.imap_unordered(_run_task, tasks, chunksize=1))
+
+def _mean(values):
+    return sum(values) / len(values) if values else None
+
+# Junta as seeds de cada configuração numa linha só
+def aggregate(rows):
+    cli_name = {target: name for name, target in PARAMS.items()}
+    groups = {}
+    for r in rows:
+        key = (r['scenario'], r['election'], r['fanout'], r['detector'], r['latency'] or "1", r['drop'],
+               r['workers'], tuple(sorted(r['election_opts'].items())), tuple(sorted(r['detector_opts'].items())))
+        groups.setdefault(key, []).append(r)
+    table = []
+    for key, runs in groups.items():
+        scenario, election, fanout, detector, latency, drop, n, election_opts, detector_opts = key
+        done = [r for r in runs if r['converged']]
+        table.append({
+            'scenario': scenario, 'election': election, 'fanout': fanout, 'detector': detector,
+            'latency': latency, 'drop': drop, 'workers': n,
+            'params': {**{cli_name['election', k]: v for k, v in election_opts},
+                       **{cli_name['detector', k]: v for k, v in detector_opts}},
+            'runs': len(runs),
+            'converged': len(done) / len(runs),
+            'steps_mean': _mean([r['steps'] for r in done]),
+            'steps_max': max((r['steps'] for r in done), default=None),
+            'messages_mean': _mean([r['messages'] for r in done]),
+            'false_failover_rate': sum(1 for r in runs if r['false_suspicions']) / len(runs),
+            'false_suspicions_mean': _mean([r['false_suspicions'] for r in runs]),
+            'seconds': sum(r['seconds'] for r in runs),
+        })
+    # Mais rápido primeiro (quem não converge sempre vai pro fim)
+    table.sort(key=lambda t: (t['scenario'], t['workers'], -t['converged'], t['false_failover_rate'],
+                              t['steps_mean'] if t['steps_mean'] is not None else float('inf')))
+    return table
+
+def _params_text(params):
+    return " ".join(f"{k}={v}" for k, v in params.items()) or "(padrão)"
+
+def print_table(table):
+    print(f"{'cenário':<8} {'eleição':<9} {'vigia':<8} {'latência':<9} {'perda':>5} {'workers':>7} "
+          f"{'conv':>5} {'passos':>7} {'máx':>4} {'mensagens':>10} {'falsos%':>7}  parâmetros")
+    for t in table:
+        steps = "-" if t['steps_mean'] is None else f"{t['steps_mean']:.1f}"
+        top = "-" if t['steps_max'] is None else t['steps_max']
+        msgs = "-" if t['messages_mean'] is None else f"{t['messages_mean']:.0f}"
+        print(f"{t['scenario']:<8} {t['election']:<9} {t['detector']:<8} {t['latency']:<9} {t['drop']:>5} "
+              f"{t['workers']:>7} {t['converged']:>5.0%} {steps:>7} {top:>4} {msgs:>10} "
+              f"{t['false_failover_rate']:>7.0%}  {_params_text(t['params'])}")
+
+# .csv = uma linha por configuração; senão JSON com as rodadas soltas também
+def write_results(path, table, rows):
+    if path.endswith(".csv"):
+        fields = [f for f in table[0] if f != 'params'] + sorted({k for t in table for k in t['params']})
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for t in table:
+                writer.writerow({**{k: v for k, v in t.items() if k != 'params'}, **t['params']})
+    else:
+        with open(path, "w") as f:
+            json.dump({'meta': metadata(), 'table': table, 'runs': rows}, f, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Varredura de parâmetros do protocolo em paralelo (simulador)")
+    parser.add_argument("--sizes", default="32", help="números de workers separados por vírgula")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="cenário (pode repetir; padrão: leader)")
+    parser.add_argument("--election", action="append", choices=sorted(ELECTIONS), help="(pode repetir; padrão: bully)")
+    parser.add_argument("--fanout", action="append", choices=sorted(FANOUTS), help="(pode repetir; padrão: direct)")
+    parser.add_argument("--detector", action="append", choices=sorted(DETECTORS),
+                        help="(pode repetir; padrão: single)")
+    for name in PARAMS:
+        parser.add_argument("--" + name.replace("_", "-"), metavar="PASSOS", help="valores separados por vírgula")
+    parser.add_argument("--latency", action="append", metavar="DIST",
+                        help='latência entre workers (pode repetir), ex: "3", "2-6", "exp:4"')
+    parser.add_argument("--drop", default="0", help="probabilidades de perda separadas por vírgula")
+    parser.add_argument("--seeds", type=int, default=1, help="rodadas por configuração (seeds 0..N-1)")
+    parser.add_argument("-k", type=int, default=3, help="quantos caem no cascade")
+    parser.add_argument("--max-steps", type=int, default=1000)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="processos no pool (1 = sem pool)")
+    parser.add_argument("--out", metavar="ARQUIVO", help="salva em .csv (tabela) ou .json (tabela + rodadas)")
+    args = parser.parse_args()
+    ints = lambda text: [int(x) for x in text.split(",") if x]
+
+    values = {name: ints(getattr(args, name)) for name in PARAMS if getattr(args, name)}
+    tasks = grid(ints(args.sizes), args.scenario or ["leader"], args.election or ["bully"],
+                 args.fanout or ["direct"], args.detector or ["single"], args.latency or [None],
+                 [float(x) for x in args.drop.split(",") if x], args.seeds, values, args.k, args.max_steps)
+    print(f"[Varredura] {len(tasks)} rodadas em {args.jobs} processos")
+    started = time.perf_counter()
+    rows = sweep(tasks, args.jobs)
+    elapsed = time.perf_counter() - started
+    table = aggregate(rows)
+    print_table(table)
+    print(f"[Varredura] {elapsed:.2f}s de relógio ({len(rows) / elapsed:.1f} rodadas/s)")
+    if args.out:
+        write_results(args.out, table, rows)
+        print(f"[Varredura] {len(table)} configurações salvas em {args.out}")
@@ -0,0 +1,156 @@
+# ==========================================
+# DETECTOR DE FALHAS (VIGIA)
+# ==========================================
+# Quem pinga o lider e quando desconfiar que ele morreu. Antes era fixo no
+# worker: só o rank 1 pingava, com contadores na mão. Se o rank 1 morresse
+# ninguém mais percebia a queda do lider. Agora é plugável, igual a eleição:
+#   - SingleMonitor: o jeito original, um vigia só (rank 1 por padrão).
+#   - RotatingMonitor: a cada rodada de `period` passos, `monitors` nós
+#     diferentes pingam o lider, em rodízio entre todo mundo que não é o
+#     lider. Ninguém é ponto único de falha e o lider continua recebendo só
+#     `monitors` pings por rodada (não vira enxurrada de heartbeat).
+#
+# Parâmetros (todos em passos em que o worker ficou sem ação):
+#   period   - intervalo entre pings
+#   timeout  - quanto espera o PONG antes de desconfiar
+#   cooldown - quanto fica quieto depois de ver ELECTION/OK/COORD na rede
+#   leader_cooldown - quanto fica quieto depois de conhecer um lider novo
+#
+# Ganchos que o Worker chama:
+#   on_activity (chegou ELECTION/OK/COORD), on_new_leader, on_pong,
+#   on_tick (fase C, sem ação na fila) e reset (reviveu)
+# Quando desconfia, o vigia agenda START_ELECTION e marca no frame quem ele
+# achou que morreu, pro maestro medir latência e falso positivo.
+from protocolo import TAG_PING, ARROW_PING, LBL_CHECKING, LBL_NORMAL
+
+
+class SingleMonitor:
+    name = "single"
+
+    def __init__(self, period=2, timeout=3, cooldown=10, monitor=1, leader_cooldown=1):
+        self.period = period
+        self.timeout = timeout
+        self.cooldown = cooldown
+        self.leader_cooldown = leader_cooldown
+        # Rank do vigia
+        self.monitor = monitor
+
+        self.check_counter = period - 1
+        self.waiting_pong = False
+        self.ping_wait_timer = 0
+        self.heartbeat_cooldown = 0
+        self.pinged = -1          # Quem eu pinguei por último
+        # Métricas
+        self.pings = 0
+        self.pongs = 0
+        self.suspicions = 0
+
+    # Sou eu que vigio agora?
+    def is_monitor(self, w):
+        return w.rank == self.monitor
+
+    # Já deu a hora de pingar de novo?
+    def _due(self, w):
+        if self.check_counter > 0:
+            self.check_counter -= 1
+            return False
+        return True
+
+    # Se tem agito na rede, para de fiscalizar o lider por um tempo
+    def on_activity(self, w):
+        self.heartbeat_cooldown = self.cooldown
+        self.waiting_pong = False
+
+    # Da um tempinho pro novo lider respirar
+    def on_new_leader(self, w):
+        self.heartbeat_cooldown = self.leader_cooldown
+        self.waiting_pong = False
+
+    def on_pong(self, w, source):
+        if self.waiting_pong and source == self.pinged:
+            # Recebeu! Tudo certo.
+            self.waiting_pong = False
+            self.pongs += 1
+            self.check_counter = self.period - 1
+            w.update_status_gui(LBL_NORMAL)
+
+    def reset(self):
+        self.waiting_pong = False
+        self.heartbeat_cooldown = 0
+        self.check_counter = self.period - 1
+
+    def on_tick(self, w):
+        leader = w.current_leader
+        if w.my_state != w.STATE_NORMAL or leader == w.rank or leader == -1: return
+        # Se tiver em cooldown, espera
+        if self.heartbeat_cooldown > 0:
+            self.heartbeat_cooldown -= 1
+            return
+        # Se estava esperando resposta...
+        if self.waiting_pong:
+            # Não recebeu. Espera mais um pouco pela latencia?
+            if self.ping_wait_timer > 0:
+                self.ping_wait_timer -= 1
+            else:
+                # Desistiu. Lider morreu. Inicia eleição.
+                self.waiting_pong = False
+                self.suspicions += 1
+                w.frame_suspect = self.pinged
+                w.schedule(w.ACT_START_ELECTION)
+        # Hora de checar?
+        elif self.is_monitor(w) and self._due(w):
+            # Manda o Ping
+            w.update_status_gui(LBL_CHECKING)
+            w.draw(leader, ARROW_PING)
+            w.isend_msg(leader, TAG_PING)
+            self.pings += 1
+            self.pinged = leader
+            self.waiting_pong = True
+            self.ping_wait_timer = self.timeout - 1
+
+    def stats(self):
+        return {'detector': self.name, 'pings': self.pings, 'pongs': self.pongs,
+                'suspicions': self.suspicions}
+
+
+class RotatingMonitor(SingleMonitor):
+    name = "rotating"
+
+    def __init__(self, period=4, timeout=3, cooldown=10, monitors=1, leader_cooldown=1):
+        super().__init__(period, timeout, cooldown, monitor=None, leader_cooldown=leader_cooldown)
+        # Quantos vigias por rodada
+        self.monitors = monitors
+        self.last_round = -1
+
+    # Rodada r: os candidatos (todo mundo menos o lider) em rodízio, de
+    # `monitors` em `monitors`. Todo mundo calcula igual pelo número do passo.
+    def is_monitor(self, w):
+        candidates = w.size - 2
+        if candidates <= 0: return False
+        index = w.rank - 1 if w.rank < w.current_leader else w.rank - 2
+        first = (w.step_no // self.period) * self.monitors
+        return (index - first) % candidates < min(self.monitors, candidates)
+
+    # Um ping por rodada
+    def _due(self, w):
+        current = w.step_no // self.period
+        if current == self.last_round: return False
+        self.last_round = current
+        return True
+
+    def reset(self):
+        super().reset()
+        self.last_round = -1
+
+
+# Detectores disponíveis pelo nome (usado no --detector)
+DETECTORS = {
+    SingleMonitor.name: SingleMonitor,
+    RotatingMonitor.name: RotatingMonitor,
+}
+
+def make_detector(name="single", **kwargs):
+    cls = DETECTORS.get(name)
+    if cls is None:
+        raise ValueError(f"detector desconhecido: {name!r} (opções: {', '.join(DETECTORS)})")
+    return cls(**kwargs)